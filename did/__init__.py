@@ -10,5 +10,6 @@ The `stats`_ module contains the core of the stats gathering
 functionality. Some basic functionality like exceptions, config,
 user and date handling is placed in the `base`_ module. Generic
 utilities can be found in the `utils`_ module. Option parsing
-and other command line stuff resides in the `cli`_ module.
+and other command line stuff resides in the `cli`_ module, the report
+server started by ``did serve`` lives in the `server`_ module.
 """
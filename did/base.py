@@ -1,17 +1,43 @@
-""" Config, Date, User and Exceptions """
+"""
+Config, Date, User, Cache, Cassette, SingleFlight, RateLimit,
+InflightLimit, Logins and Exceptions
+"""
 
+import base64
 import configparser
 import contextlib
 import datetime
+import email.message
+import email.utils
+import functools
+import gzip
+import hashlib
+import http.cookiejar
 import io
+import json
 import locale
 import os
 import re
 import sys
-from configparser import NoOptionError, NoSectionError
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import urllib.response
+import xml.parsers.expat
+import xmlrpc.client
+from collections import OrderedDict
+from configparser import NoSectionError
 from datetime import timedelta
-from typing import Iterator, Optional, Union
+from types import MappingProxyType
+from typing import (Any, Callable, Iterable, Iterator, Mapping, Optional,
+                    Union)
 
+import requests
+import requests.adapters
+import urllib3
 from dateutil.relativedelta import FR as FRIDAY
 from dateutil.relativedelta import MO as MONDAY
 from dateutil.relativedelta import SA as SATURDAY
@@ -42,9 +68,50 @@ WEEKDAY_MAP: dict[str, wd] = {
 # Config file location
 CONFIG = os.path.expanduser("~/.did")
 
+# Default limits of concurrently checked stats (0 means no limit)
+DEFAULT_WORKERS = 32
+DEFAULT_PLUGIN_WORKERS = 0
+DEFAULT_HOST_WORKERS = 8
+
+# Options common to all config sections, not used as plugin items
+SECTION_OPTIONS = (
+    "type", "order", "priority", "max_workers", "max_inflight_requests")
+
+# Default http cache expiration (in seconds) and size (in megabytes),
+# responses for periods including today are not cached unless enabled
+DEFAULT_CACHE_TTL = 0
+DEFAULT_CACHE_TTL_PAST = 30 * 24 * 3600
+DEFAULT_CACHE_SIZE = 100
+MEGABYTE = 1024 * 1024
+
+# Maximum size of the responses shared during a run (in megabytes)
+DEFAULT_SHARED_SIZE = 20
+
+# Read-only queries sent using POST which can be cached as well:
+# phabricator conduit searches and public-inbox mbox searches
+CACHEABLE_POST = (
+    re.compile(r"/api/[\w.]+\.search$"),
+    re.compile(r"/all/$"),
+    )
+
+# Read-only xml-rpc methods (bugzilla and trac) which can be cached
+CACHEABLE_XMLRPC = frozenset({
+    "Bug.comments", "Bug.get", "Bug.history", "Bug.search",
+    "ticket.changeLog", "ticket.get", "ticket.query",
+    })
+
+# Default http connection pool size and retry policy
+DEFAULT_POOL_SIZE = 10
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUS = (500, 502, 503, 504)
+
 # Today's date
 TODAY: datetime.date = datetime.date.today()
 
+# Units for splitting the report period into several reports
+SPLIT_UNITS = ("day", "week", "month", "quarter", "year")
+
 TEST_CONFIG = """
 [general]
 width = 79
@@ -98,10 +165,50 @@ def setlocale(category: int, value: Optional[str] = None) -> Iterator[str]:
 #  Config
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
+class CompiledConfig():
+    """
+    Immutable snapshot of the parsed config
+
+    Sections and their items are read from the parser only once and
+    typed values (such as the width or the first day of the week) are
+    computed on the first use and remembered. The snapshot never
+    changes so it can be safely shared by all threads, a new one is
+    compiled as soon as a new config string or file is parsed.
+    """
+
+    def __init__(self, parser: configparser.ConfigParser) -> None:
+        self.parser = parser
+        self.names: tuple[str, ...] = tuple(parser.sections())
+        self.items: dict[str, tuple[tuple[str, str], ...]] = {
+            name: tuple(parser.items(name)) for name in self.names}
+        self.settings: dict[str, Mapping[str, str]] = {
+            name: MappingProxyType(dict(items))
+            for name, items in self.items.items()}
+        self._values: dict[Any, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, section: str, key: str) -> Optional[str]:
+        """ Value of the key in given section, None if not defined """
+        settings = self.settings.get(section)
+        return None if settings is None else settings.get(key)
+
+    def value(self, name: Any, compute: Callable[[], Any]) -> Any:
+        """ Remembered value, computed by the function on first use """
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        value = compute()
+        with self._lock:
+            return self._values.setdefault(name, value)
+
+
 class Config():
     """ User config file """
 
     parser: Optional[configparser.ConfigParser] = None
+    _compiled: Optional[CompiledConfig] = None
+    _compiled_lock = threading.Lock()
 
     def __init__(self, config: Optional[str] = None, path: Optional[str] = None):
         """
@@ -114,12 +221,14 @@ class Config():
         # Read the config only once (unless explicitly provided)
         if self.parser is not None and config is None and path is None:
             return
-        Config.parser = configparser.ConfigParser(interpolation=None)
+        # Publish the parser only when complete, other threads use it
+        parser = configparser.ConfigParser(interpolation=None)
         # If config provided as string, parse it directly
         if config is not None:
             log.info("Inspecting config file from string")
-            log.debug(utils.pretty(config))
-            Config.parser.read_file(io.StringIO(config))
+            log.debug("%s", utils.Lazy(utils.pretty, config))
+            parser.read_file(io.StringIO(config))
+            Config.parser = parser
             return
         # Check the environment for config file override
         # (unless path is explicitly provided)
@@ -129,7 +238,7 @@ class Config():
         try:
             log.info("Inspecting config file '%s'.", path)
             with open(path, "r", encoding="utf8") as config_file:
-                Config.parser.read_file(config_file)
+                parser.read_file(config_file)
         except IOError as error:
             log.debug(error)
             Config.parser = None
@@ -139,151 +248,216 @@ class Config():
             log.error(error)
             raise ConfigFileError(
                 f"Unable to parse the config file '{path}': {error}") from error
+        Config.parser = parser
+
+    @property
+    def compiled(self) -> CompiledConfig:
+        """ Compiled snapshot of the current config """
+        parser = self.parser
+        if parser is None:
+            raise RuntimeError("Config.parser not yet initialized")
+        compiled = Config._compiled
+        if compiled is None or compiled.parser is not parser:
+            with Config._compiled_lock:
+                compiled = Config._compiled
+                if compiled is None or compiled.parser is not parser:
+                    compiled = CompiledConfig(parser)
+                    Config._compiled = compiled
+        return compiled
 
     @property
     def plugins(self) -> Optional[str]:
         """ Custom plugins """
-        if self.parser is None:
-            raise RuntimeError("Config.parser not yet initialized")
-        try:
-            return self.parser.get("general", "plugins")
-        except configparser.Error:
-            # No custom plugin listed within the configuration
-            return None
+        # None if no custom plugin listed within the configuration
+        return self.compiled.get("general", "plugins")
 
     @property
     def quarter(self) -> int:
         """ The first month of the quarter, 1 by default """
-        if self.parser is None:
-            raise RuntimeError("Config.parser not yet initialized")
-
-        month: str = self.parser.get("general", "quarter", fallback="1")
-        try:
-            int_month = int(month) % 3
-        except ValueError as exc:
-            raise ConfigError(
-                f"Invalid quarter start '{month}', should be integer.") from exc
-        return int_month
+        def compute() -> int:
+            month = self.compiled.get("general", "quarter") or "1"
+            try:
+                return int(month) % 3
+            except ValueError as exc:
+                raise ConfigError(
+                    f"Invalid quarter start '{month}', should be integer.") from exc
+        value: int = self.compiled.value("quarter", compute)
+        return value
 
     @property
     def week_start(self) -> wd:
         """ The first day of the week, defaults to Monday """
-        if self.parser is None:
-            raise RuntimeError("Config.parser not yet initialized")
-
-        day_str = self.parser.get(
-            "general", "week_start", fallback="monday").strip().lower()
-
-        # Support flexible matching (min 3 chars)
-        for day_name, weekday_const in WEEKDAY_MAP.items():
-            if day_name.startswith(day_str) and len(day_str) >= 3:
-                return weekday_const
-
-        raise ConfigError(
-            f"Invalid week_start '{day_str}'. "
-            f"Use a weekday name (e.g., 'Monday', 'Sunday', 'mon', 'sun').")
+        def compute() -> wd:
+            day_str = (
+                self.compiled.get("general", "week_start") or "monday"
+                ).strip().lower()
+            # Support flexible matching (min 3 chars)
+            for day_name, weekday_const in WEEKDAY_MAP.items():
+                if day_name.startswith(day_str) and len(day_str) >= 3:
+                    return weekday_const
+            raise ConfigError(
+                f"Invalid week_start '{day_str}'. "
+                f"Use a weekday name (e.g., 'Monday', 'Sunday', 'mon', 'sun').")
+        value: wd = self.compiled.value("week_start", compute)
+        return value
 
     @property
     def email(self) -> str:
         """ User email(s) """
-        if self.parser is None:
-            raise RuntimeError("Config.parser not yet initialized")
-        try:
-            return self.parser.get("general", "email")
-        except NoSectionError as error:
-            log.debug(error)
-            raise ConfigFileError(
-                "No general section found in the config file.") from error
-        except NoOptionError as error:
-            log.debug(error)
-            raise ConfigFileError(
-                "No email address defined in the config file.") from error
+        compiled = self.compiled
+        if "general" not in compiled.settings:
+            raise ConfigFileError("No general section found in the config file.")
+        email = compiled.get("general", "email")
+        if email is None:
+            raise ConfigFileError("No email address defined in the config file.")
+        return email
 
     @property
     def width(self) -> int:
         """ Maximum width of the report """
-        if self.parser is None:
-            raise RuntimeError("Config.parser not yet initialized")
-        try:
-            return int(self.parser.get("general", "width"))
-        except (NoOptionError, NoSectionError):
-            return MAX_WIDTH
+        width = self.compiled.get("general", "width")
+        return MAX_WIDTH if width is None else int(width)
+
+    def _integer(self, key: str, default: int, minimum: int = 0) -> int:
+        """ Integer value from the general section """
+        def compute() -> int:
+            value = self.compiled.get("general", key)
+            if value is None:
+                return default
+            try:
+                return max(int(value), minimum)
+            except ValueError as exc:
+                raise ConfigError(
+                    f"Invalid {key} '{value}', should be integer.") from exc
+        result: int = self.compiled.value(("integer", key, default, minimum), compute)
+        return result
+
+    @property
+    def parallel(self) -> int:
+        """ Number of users to gather stats for concurrently """
+        return self._integer("parallel", default=1, minimum=1)
+
+    @property
+    def workers(self) -> int:
+        """ Maximum number of stats checked at the same time """
+        return self._integer("workers", default=DEFAULT_WORKERS, minimum=1)
+
+    @property
+    def plugin_workers(self) -> int:
+        """ Maximum stats checked per section, 0 for no limit """
+        return self._integer("plugin_workers", default=DEFAULT_PLUGIN_WORKERS)
+
+    @property
+    def host_workers(self) -> int:
+        """ Maximum number of stats checked per host, 0 for no limit """
+        return self._integer("host_workers", default=DEFAULT_HOST_WORKERS)
+
+    @property
+    def cache_ttl(self) -> int:
+        """ Seconds cached responses for current periods are valid """
+        return self._integer("cache_ttl", default=DEFAULT_CACHE_TTL)
+
+    @property
+    def cache_ttl_past(self) -> int:
+        """ Seconds the cached responses for past periods are valid """
+        return self._integer("cache_ttl_past", default=DEFAULT_CACHE_TTL_PAST)
+
+    @property
+    def cache_size(self) -> int:
+        """ Maximum size of the http cache in megabytes """
+        return self._integer("cache_size", default=DEFAULT_CACHE_SIZE)
 
     @property
     def separator(self) -> str:
         """ Separator character to use for the report """
-        if self.parser is None:
-            raise RuntimeError("Config.parser not yet initialized")
-        try:
-            return self.parser.get("general", "separator")
-        except (NoOptionError, NoSectionError):
-            return DEFAULT_SEPARATOR
+        separator = self.compiled.get("general", "separator")
+        return DEFAULT_SEPARATOR if separator is None else separator
 
     @property
     def separator_width(self) -> int:
         """ Number of separator characters to use for the report """
-        if self.parser is None:
-            raise RuntimeError("Config.parser not yet initialized")
-        try:
-            return int(self.parser.get("general", "separator_width"))
-        except (NoOptionError, NoSectionError):
-            return MAX_WIDTH
+        width = self.compiled.get("general", "separator_width")
+        return MAX_WIDTH if width is None else int(width)
 
     def sections(self, kind: Optional[str] = None) -> list[str]:
         """ Return all sections (optionally of given kind only) """
-        if self.parser is None:
-            raise RuntimeError("Config.parser not yet initialized")
-        result = []
-        for section in self.parser.sections():
-            # Selected kind only if provided
-            if kind is not None:
-                try:
-                    section_type = self.parser.get(section, "type")
-                    if section_type != kind:
-                        continue
-                except NoOptionError:
-                    continue
-            result.append(section)
-        return result
+        compiled = self.compiled
+        # Selected kind only if provided
+        names: tuple[str, ...] = compiled.value(("sections", kind), lambda: tuple(
+            name for name in compiled.names
+            if kind is None or compiled.get(name, "type") == kind))
+        return list(names)
 
     def section(self,
                 section: str,
-                skip: tuple[str, ...] = ('type', 'order')) -> list[tuple[str, str]]:
+                skip: tuple[str, ...] = SECTION_OPTIONS) -> list[tuple[str, str]]:
         """
-        Return section items, skip selected (type/order by default)
+        Return section items, skip selected (common options by default)
         """
-        if self.parser is None:
-            raise RuntimeError("Config.parser not yet initialized")
-        return [(key, val) for key, val in self.parser.items(section)
-                if key not in skip]
+        items = self.compiled.items.get(section)
+        if items is None:
+            raise NoSectionError(section)
+        return [(key, val) for key, val in items if key not in skip]
+
+    def settings(self, section: str) -> Mapping[str, str]:
+        """
+        Read-only mapping of all section items (including type/order)
+
+        Cheaper than ``dict(Config().section(...))``, the mapping is
+        created only once for each parsed config.
+        """
+        try:
+            return self.compiled.settings[section]
+        except KeyError as error:
+            raise NoSectionError(section) from error
+
+    @staticmethod
+    def for_url(url: str) -> Mapping[str, str]:
+        """ Items of the section with the longest url matching """
+        compiled = Config().compiled
+
+        def prefixes() -> list[tuple[str, Mapping[str, str]]]:
+            """ Section urls sorted from the longest one """
+            result = []
+            for name in compiled.names:
+                settings = compiled.settings[name]
+                prefix = settings.get("url", "").rstrip("/")
+                if prefix:
+                    result.append((prefix, MappingProxyType({
+                        key: value for key, value in settings.items()
+                        if key not in ("type", "order")})))
+            return sorted(result, key=lambda entry: len(entry[0]), reverse=True)
+
+        for prefix, items in compiled.value("for_url", prefixes):
+            if url.startswith(prefix):
+                return items
+        return MappingProxyType({})
 
     def item(self, section: str, it: str) -> str:
         """ Return content of given item in selected section """
-        if self.parser is None:
-            raise RuntimeError("Config.parser not yet initialized")
-
-        for key, value in self.section(section, skip=()):
-            if key == it:
-                return value
-        raise ConfigError(f"Item '{it}' not found in section '{section}'")
+        value = self.settings(section).get(it)
+        if value is None:
+            raise ConfigError(f"Item '{it}' not found in section '{section}'")
+        return value
 
     @staticmethod
     def path() -> str:
         """ Detect config file path """
-        # Detect config directory
-        try:
-            directory = os.environ["DID_DIR"]
-        except KeyError:
-            directory = CONFIG
+        return Config._path(os.environ.get("DID_DIR", CONFIG), tuple(sys.argv))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=16)
+    def _path(directory: str, argv: tuple[str, ...]) -> str:
+        """ Config file path for given directory and command line """
         # Detect config file (even before options are parsed)
         filename = "config"
-        for i, a in enumerate(sys.argv):
+        for i, a in enumerate(argv):
             matched = re.match(r"--conf(?:ig?)?(?:=(.*))?$", a)
             if matched:
                 if matched.groups()[0] is not None:
                     arg = matched.groups()[0]
-                elif i + 1 < len(sys.argv):
-                    arg = sys.argv[i + 1]
+                elif i + 1 < len(argv):
+                    arg = argv[i + 1]
                 else:
                     arg = ""
                 filepath, filename = os.path.split(arg)
@@ -439,6 +613,40 @@ class Date():
 
         return since, until, period
 
+    @staticmethod
+    def split(since: "Date", until: "Date", unit: str
+              ) -> list[tuple["Date", "Date", str]]:
+        """ Split the period into parts of the unit (day, week, ...) """
+        if unit not in SPLIT_UNITS:
+            raise OptionError(
+                f"Invalid split '{unit}', use {', '.join(SPLIT_UNITS)}.")
+        parts = []
+        start = since.date
+        while start < until.date:
+            if unit == "day":
+                end = start + delta(days=1)
+                period = str(start)
+            elif unit == "week":
+                end = start + delta(days=1, weekday=Config().week_start.weekday)
+                period = f"the week {start.strftime('%V')}"
+            elif unit == "month":
+                end = start + delta(day=1, months=1)
+                with setlocale(locale.LC_TIME, "C"):
+                    period = start.strftime("%B %Y")
+            elif unit == "quarter":
+                end = start + delta(day=1, months=1)
+                while end.month % 3 != Config().quarter:
+                    end += delta(months=1)
+                with setlocale(locale.LC_TIME, "C"):
+                    period = f"the quarter since {start.strftime('%B %Y')}"
+            else:
+                end = start + delta(day=1, month=1, years=1)
+                period = f"the year {start.year}"
+            end = min(end, until.date)
+            parts.append((Date(start), Date(end), period))
+            start = end
+        return parts
+
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  User
@@ -515,7 +723,7 @@ class User():
             return
         # Attempt to use alias directly from the config section
         try:
-            config: dict[str, str] = dict(Config().section(stats))
+            config = Config().settings(stats)
             email = config.get("email", None)
             login = config.get("login", None)
         except (ConfigFileError, NoSectionError) as e:
@@ -588,3 +796,1024 @@ def get_token(
         token = None
 
     return token
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Cache
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class Cache():
+    """
+    Persistent cache of http responses
+
+    Successful responses are stored as json files in the ``cache``
+    directory under ``DID_DIR`` (``~/.did/cache`` by default). Entries
+    are keyed by the method, url, request body, a hash of the request
+    headers (which carry the credentials) and the reported period.
+
+    Responses for periods which are already over expire after
+    ``cache_ttl_past`` seconds (30 days by default). Responses for
+    periods including today are not stored unless ``cache_ttl`` is
+    set, either in the general or in individual config sections.
+    Only GET requests and the read-only queries listed in
+    ``CACHEABLE_POST`` and ``CACHEABLE_XMLRPC`` are cached. Responses
+    setting cookies (such as login handshakes) are never stored. The
+    least recently used entries are removed once the cache grows over
+    ``cache_size`` megabytes.
+
+    The cache is disabled until explicitly enabled, which is done by
+    the command line interface unless ``--no-cache`` is provided.
+    """
+
+    directory: Optional[str] = None
+    period: str = ""
+    refresh: bool = False
+    ttl: Optional[int] = DEFAULT_CACHE_TTL
+    ttls: list[tuple[str, int]] = []
+    size: int = DEFAULT_CACHE_SIZE * MEGABYTE
+    _used: Optional[int] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def enable(
+            cls,
+            since: Date,
+            until: Date,
+            refresh: bool = False,
+            directory: Optional[str] = None) -> None:
+        """ Enable the cache for reporting given period """
+        config = Config()
+        cls.directory = directory or cls.default_directory()
+        cls.period = f"{since}..{until}"
+        cls.refresh = refresh
+        cls.size = config.cache_size * MEGABYTE
+        cls._used = None
+        # Responses for periods which are already over do not change
+        # often, keep them much longer
+        if until.date <= TODAY:
+            cls.ttl = config.cache_ttl_past
+            cls.ttls = []
+            return
+        cls.ttl = config.cache_ttl
+        cls.ttls = []
+        for section in config.sections():
+            items = config.settings(section)
+            if "url" not in items or "cache_ttl" not in items:
+                continue
+            try:
+                ttl = int(items["cache_ttl"])
+            except ValueError as error:
+                raise ConfigError(
+                    f"Invalid cache_ttl '{items['cache_ttl']}' "
+                    f"in the [{section}] section, should be integer."
+                    ) from error
+            cls.ttls.append((items["url"].rstrip("/"), ttl))
+        # Prefer the most specific url when looking for the expiration
+        cls.ttls.sort(key=lambda prefix: len(prefix[0]), reverse=True)
+
+    @staticmethod
+    def default_directory() -> str:
+        """ Cache directory under the config directory """
+        return os.path.join(os.environ.get("DID_DIR", CONFIG), "cache")
+
+    @classmethod
+    def disable(cls) -> None:
+        """ Disable the cache """
+        cls.directory = None
+
+    @classmethod
+    def key(
+            cls,
+            method: str,
+            url: str,
+            body: Any,
+            headers: Iterable[tuple[str, str]]) -> Optional[str]:
+        """ Cache key for given request, None if it cannot be cached """
+        if cls.directory is None:
+            return None
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if body is not None and not isinstance(body, bytes):
+            return None
+        if not cls.readonly(method, url, body):
+            return None
+        credentials = hashlib.sha256(json.dumps(sorted(
+            (name.lower(), str(value)) for name, value in headers
+            )).encode("utf-8")).hexdigest()
+        payload = hashlib.sha256(body or b"").hexdigest()
+        return hashlib.sha256(json.dumps(
+            [method.upper(), url, payload, credentials, cls.period]
+            ).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def readonly(method: str, url: str, body: Optional[bytes]) -> bool:
+        """ True for GET and for known read-only POST requests """
+        method = method.upper()
+        if method == "GET":
+            return True
+        if method != "POST":
+            return False
+        path = urllib.parse.urlsplit(url).path
+        if any(pattern.search(path) for pattern in CACHEABLE_POST):
+            return True
+        if not body or not body.lstrip().startswith(b"<?xml"):
+            return False
+        try:
+            params, name = xmlrpc.client.loads(body)
+        except (xmlrpc.client.Error, xml.parsers.expat.ExpatError, ValueError):
+            return False
+        if name == "system.multicall" and params:
+            return all(
+                isinstance(call, dict)
+                and call.get("methodName") in CACHEABLE_XMLRPC
+                for call in params[0])
+        return name in CACHEABLE_XMLRPC
+
+    @classmethod
+    def get(cls, key: Optional[str]) -> Optional[dict[str, Any]]:
+        """ Cached response for given key if present and valid """
+        if cls.directory is None or key is None or cls.refresh:
+            return None
+        path = os.path.join(cls.directory, f"{key}.json")
+        try:
+            with open(path, encoding="utf-8") as entry_file:
+                entry: dict[str, Any] = json.load(entry_file)
+            body = base64.b64decode(entry["body"])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as error:
+            log.debug("Removing broken cache entry '%s': %s", path, error)
+            cls._remove(path)
+            return None
+        if entry["expires"] is not None and entry["expires"] < time.time():
+            cls._remove(path)
+            return None
+        # Mark the entry as recently used
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        log.debug("Using cached response for '%s'.", entry["url"])
+        entry["body"] = body
+        return entry
+
+    @classmethod
+    def put(
+            cls,
+            key: Optional[str],
+            url: str,
+            status: int,
+            reason: Optional[str],
+            headers: dict[str, str],
+            body: bytes) -> None:
+        """ Store the response under given key """
+        if cls.directory is None or key is None:
+            return
+        # Login and session handshakes must never be replayed
+        if any(name.lower() == "set-cookie" for name in headers):
+            return
+        ttl = cls.ttl
+        for prefix, prefix_ttl in cls.ttls:
+            if url.startswith(prefix):
+                ttl = prefix_ttl
+                break
+        if ttl is not None and ttl <= 0:
+            return
+        entry = {
+            "url": url,
+            "status": status,
+            "reason": reason,
+            "headers": dict(headers),
+            "body": base64.b64encode(body).decode("ascii"),
+            "expires": None if ttl is None else time.time() + ttl,
+            }
+        path = os.path.join(cls.directory, f"{key}.json")
+        try:
+            os.makedirs(cls.directory, exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(
+                dir=cls.directory, suffix=".tmp")
+            with os.fdopen(descriptor, "w", encoding="utf-8") as entry_file:
+                json.dump(entry, entry_file)
+            os.replace(temporary, path)
+            size = os.path.getsize(path)
+        except OSError as error:
+            log.debug("Unable to store cache entry '%s': %s", path, error)
+            return
+        with cls._lock:
+            if cls._used is None:
+                cls._evict()
+            else:
+                cls._used += size
+                if cls._used > cls.size:
+                    cls._evict()
+
+    @classmethod
+    def _evict(cls) -> None:
+        """ Remove least recently used entries over the size limit """
+        assert cls.directory is not None
+        entries = []
+        for name in os.listdir(cls.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(cls.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        used = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if used <= cls.size:
+                break
+            cls._remove(path)
+            used -= size
+        cls._used = used
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        """ Remove the cache entry, ignore if already gone """
+        with contextlib.suppress(OSError):
+            os.remove(path)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Cassette
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class Cassette():
+    """
+    Recorded http traffic for deterministic re-runs
+
+    When recording, every response received by the plugins (including
+    those served from the cache) is kept in memory and ``save()``
+    writes them into a gzip compressed json file. When replaying, all
+    responses are served from the file and no network connection is
+    made at all, requests which have not been recorded fail.
+
+    Requests are matched by method, url and body. Repeated identical
+    requests are replayed in the recorded order, the last response is
+    used once they are exhausted.
+    """
+
+    VERSION = 1
+
+    mode: Optional[str] = None
+    path: Optional[str] = None
+    _responses: dict[str, list[dict[str, Any]]] = {}
+    _replayed: dict[str, int] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def record(cls, path: str) -> None:
+        """ Start recording responses to be saved into given file """
+        cls.mode = "record"
+        cls.path = path
+        cls._responses = {}
+
+    @classmethod
+    def replay(cls, path: str) -> None:
+        """ Serve responses recorded in given file """
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as cassette:
+                data = json.load(cassette)
+            responses = data["responses"]
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            raise ReportError(
+                f"Unable to read recorded responses from '{path}': {error}"
+                ) from error
+        if data.get("version") != cls.VERSION:
+            raise ReportError(
+                f"Unsupported version of recorded responses in '{path}'.")
+        cls.mode = "replay"
+        cls.path = path
+        cls._responses = responses
+        cls._replayed = {}
+
+    @classmethod
+    def disable(cls) -> None:
+        """ Neither record nor replay """
+        cls.mode = None
+        cls.path = None
+        cls._responses = {}
+
+    @classmethod
+    def save(cls) -> None:
+        """ Write recorded responses into the file """
+        if cls.mode != "record" or cls.path is None:
+            return
+        with cls._lock:
+            data = {"version": cls.VERSION, "responses": cls._responses}
+            try:
+                with gzip.open(cls.path, "wt", encoding="utf-8") as cassette:
+                    json.dump(data, cassette, separators=(",", ":"))
+            except OSError as error:
+                raise ReportError(
+                    f"Unable to save recorded responses to '{cls.path}': {error}"
+                    ) from error
+        log.info("Recorded %s to '%s'.", utils.listed(
+            sum(len(responses) for responses in cls._responses.values()),
+            "response"), cls.path)
+
+    @classmethod
+    def key(cls, method: str, url: str, body: Any) -> Optional[str]:
+        """ Key identifying the request, None if it cannot be kept """
+        if cls.mode is None:
+            return None
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if body is not None and not isinstance(body, bytes):
+            return None
+        return hashlib.sha256(json.dumps([
+            method.upper(), url, hashlib.sha256(body or b"").hexdigest()
+            ]).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def get(cls, key: Optional[str], url: str) -> Optional[dict[str, Any]]:
+        """ Recorded response when replaying, None otherwise """
+        if cls.mode != "replay":
+            return None
+        with cls._lock:
+            responses = cls._responses.get(key or "")
+            if not responses:
+                raise ReportError(
+                    f"No recorded response for '{url}' in '{cls.path}'.")
+            index = cls._replayed.get(key or "", 0)
+            cls._replayed[key or ""] = index + 1
+            entry = dict(responses[min(index, len(responses) - 1)])
+        log.debug("Replaying recorded response for '%s'.", url)
+        entry["body"] = base64.b64decode(entry["body"])
+        return entry
+
+    @classmethod
+    def put(
+            cls,
+            key: Optional[str],
+            url: str,
+            status: int,
+            reason: Optional[str],
+            headers: dict[str, str],
+            body: bytes) -> None:
+        """ Keep the response if recording """
+        if cls.mode != "record" or key is None:
+            return
+        entry = {
+            "url": url,
+            "status": status,
+            "reason": reason,
+            "headers": dict(headers),
+            "body": base64.b64encode(body).decode("ascii"),
+            }
+        with cls._lock:
+            cls._responses.setdefault(key, []).append(entry)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Single Flight
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class SingleFlight():
+    """
+    Identical requests shared during a single run
+
+    Different stats and users often send exactly the same request.
+    The first one is sent to the server, identical requests (same
+    method, url, body and headers) made meanwhile wait for it and
+    later ones get its response without any network round-trip.
+
+    Only successful ``GET`` and ``HEAD`` responses which do not set
+    any cookies are shared, in all other cases the waiting requests
+    are sent as usual. Responses are kept for later requests only up
+    to ``size`` bytes in total, the least recently used ones are
+    dropped first. Sharing is disabled until explicitly enabled,
+    which is done by the command line interface for each run.
+    """
+
+    METHODS = ("GET", "HEAD")
+
+    enabled: bool = False
+    size: int = DEFAULT_SHARED_SIZE * MEGABYTE
+    _used: int = 0
+    _responses: OrderedDict[str, dict[str, Any]] = OrderedDict()
+    _pending: dict[str, tuple[int, threading.Event, list[dict[str, Any]]]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def enable(cls) -> None:
+        """ Start sharing responses from scratch """
+        cls._reset(enabled=True)
+
+    @classmethod
+    def disable(cls) -> None:
+        """ Stop sharing and forget all responses """
+        cls._reset(enabled=False)
+
+    @classmethod
+    def _reset(cls, enabled: bool) -> None:
+        """ Forget all responses, wake up requests still waiting """
+        with cls._lock:
+            pending = cls._pending
+            cls.enabled = enabled
+            cls._responses = OrderedDict()
+            cls._used = 0
+            cls._pending = {}
+        for _, landed, _ in pending.values():
+            landed.set()
+
+    @classmethod
+    def key(
+            cls,
+            method: str,
+            url: str,
+            body: Any,
+            headers: Iterable[tuple[str, str]]) -> Optional[str]:
+        """ Key identifying the request, None if it cannot be shared """
+        if not cls.enabled or method.upper() not in cls.METHODS:
+            return None
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if body is not None and not isinstance(body, bytes):
+            return None
+        return hashlib.sha256(json.dumps([
+            method.upper(), url, hashlib.sha256(body or b"").hexdigest(),
+            sorted((name.lower(), str(value)) for name, value in headers),
+            ]).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def get(cls, key: Optional[str]) -> Optional[dict[str, Any]]:
+        """
+        Shared response for given key, wait if it is being fetched
+
+        Returns None if the response is not available. Unless the same
+        request is already in flight the caller is expected to send it
+        and hand over the response using ``put()`` or ``cancel()``.
+        """
+        if key is None:
+            return None
+        with cls._lock:
+            entry = cls._responses.get(key)
+            pending = cls._pending.get(key)
+            if entry is not None:
+                cls._responses.move_to_end(key)
+            elif pending is None:
+                cls._pending[key] = (
+                    threading.get_ident(), threading.Event(), [])
+                return None
+        if entry is None and pending is not None:
+            owner, landed, landed_entry = pending
+            if owner == threading.get_ident():
+                return None
+            landed.wait()
+            # Handed over directly, the kept one may be dropped already
+            if not landed_entry:
+                return None
+            entry = landed_entry[0]
+        assert entry is not None
+        log.debug("Using shared response for '%s'.", entry["url"])
+        utils.Profiler.count("shared")
+        return entry
+
+    @classmethod
+    def put(
+            cls,
+            key: Optional[str],
+            url: str,
+            status: int,
+            reason: Optional[str],
+            headers: dict[str, str],
+            body: bytes) -> None:
+        """ Share the response with waiting and later requests """
+        if key is None:
+            return
+        if status == 200 and not any(
+                name.lower() == "set-cookie" for name in headers):
+            entry = {
+                "url": url,
+                "status": status,
+                "reason": reason,
+                "headers": dict(headers),
+                "body": body,
+                }
+            with cls._lock:
+                pending = cls._pending.get(key)
+                if pending is not None:
+                    pending[2].append(entry)
+                if key not in cls._responses and len(body) <= cls.size:
+                    cls._responses[key] = entry
+                    cls._used += len(body)
+                    while cls._used > cls.size:
+                        _, dropped = cls._responses.popitem(last=False)
+                        cls._used -= len(dropped["body"])
+        cls.cancel(key)
+
+    @classmethod
+    def cancel(cls, key: Optional[str]) -> None:
+        """ Wake up requests waiting for a response of given key """
+        if key is None:
+            return
+        with cls._lock:
+            pending = cls._pending.get(key)
+            if pending is None or pending[0] != threading.get_ident():
+                return
+            del cls._pending[key]
+        pending[1].set()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Rate Limit
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class RateLimit():
+    """
+    Rate limits of individual hosts shared by all threads
+
+    Limits are learned from the ``X-RateLimit-*`` (or ``RateLimit-*``)
+    and ``Retry-After`` response headers. Each host is handled as a
+    token bucket: the remaining requests are consumed before sending
+    and refilled when the limit is reset. Once the bucket is empty or
+    the server asks to retry later, all threads sending requests to
+    the host wait together instead of hitting the limit over and over.
+
+    Hosts reporting the ``X-RateLimit-Resource`` header (e.g. GitHub
+    with separate ``search`` and ``core`` limits) get a bucket for each
+    resource. The resource of a request is learned from the responses
+    to previous requests of the same api route.
+    """
+
+    # Remaining requests, reset time and blocked until time per bucket
+    _remaining: dict[tuple[str, Optional[str]], int] = {}
+    _reset: dict[tuple[str, Optional[str]], float] = {}
+    _blocked: dict[tuple[str, Optional[str]], float] = {}
+    # Rate limit resources of api routes
+    _resources: dict[tuple[str, str], str] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def clear(cls) -> None:
+        """ Forget all learned limits """
+        with cls._lock:
+            cls._remaining = {}
+            cls._reset = {}
+            cls._blocked = {}
+            cls._resources = {}
+
+    @staticmethod
+    def _route(url: str) -> tuple[str, str]:
+        """ Host and the leading path segments of the api call """
+        parts = urllib.parse.urlsplit(url)
+        segments = [
+            segment for segment in parts.path.split("/")
+            if segment and not re.fullmatch(r"api|v\d+", segment)]
+        return parts.netloc, "/".join(segments[:2])
+
+    @classmethod
+    def _bucket(
+            cls,
+            url: str,
+            resource: Optional[str] = None) -> tuple[str, Optional[str]]:
+        """ Host and resource whose limit applies to the url """
+        route = cls._route(url)
+        if resource:
+            cls._resources[route] = resource
+        return route[0], resource or cls._resources.get(route)
+
+    @staticmethod
+    def _header(headers: Any, name: str) -> Optional[str]:
+        """ Value of given rate limit header, with or without X- """
+        value = headers.get(f"X-RateLimit-{name}")
+        if value is None:
+            value = headers.get(f"RateLimit-{name}")
+        return value
+
+    @staticmethod
+    def _time(value: Optional[str], now: float) -> Optional[float]:
+        """ Convert seconds, epoch time or date to epoch time """
+        if value is None:
+            return None
+        value = value.strip()
+        try:
+            number = float(value)
+        except ValueError:
+            pass
+        else:
+            # Small numbers are relative, large ones are epoch seconds
+            return number if number > 1e9 else now + number
+        for parse in (
+                email.utils.parsedate_to_datetime,
+                lambda value: datetime.datetime.fromisoformat(
+                    value.replace("Z", "+00:00"))):
+            try:
+                return parse(value).timestamp()
+            except (TypeError, ValueError):
+                continue
+        return None
+
+    @classmethod
+    def wait(cls, url: str) -> None:
+        """ Wait until the host of given url can be sent a request """
+        warned = False
+        while True:
+            with cls._lock:
+                bucket = cls._bucket(url)
+                now = time.time()
+                until = cls._blocked.get(bucket, 0)
+                remaining = cls._remaining.get(bucket)
+                if remaining is not None and remaining <= 0:
+                    until = max(until, cls._reset.get(bucket, 0))
+                if until <= now:
+                    if remaining is not None:
+                        if bucket in cls._reset and cls._reset[bucket] <= now:
+                            # The limit has been reset, wait for headers
+                            del cls._remaining[bucket]
+                            del cls._reset[bucket]
+                        else:
+                            cls._remaining[bucket] = remaining - 1
+                    return
+            delay = until - now
+            if not warned:
+                host, resource = bucket
+                log.warning(
+                    "Rate limit for '%s'%s reached, waiting %s.", host,
+                    f" ({resource})" if resource else "",
+                    utils.listed(int(delay) + 1, "second"))
+                utils.Profiler.count("sleeps")
+                warned = True
+            time.sleep(min(delay, 1))
+
+    @classmethod
+    def update(cls, url: str, status: int, headers: Any) -> None:
+        """ Learn the current limits from the response headers """
+        now = time.time()
+        remaining = cls._header(headers, "Remaining")
+        reset = cls._time(cls._header(headers, "Reset"), now)
+        retry = cls._time(headers.get("Retry-After"), now)
+        with cls._lock:
+            bucket = cls._bucket(url, cls._header(headers, "Resource"))
+            if remaining is not None and remaining.strip().isdigit():
+                # Keep the lowest count from concurrent responses
+                if reset is not None and cls._reset.get(bucket) != reset:
+                    cls._remaining[bucket] = int(remaining)
+                else:
+                    cls._remaining[bucket] = min(
+                        int(remaining),
+                        cls._remaining.get(bucket, int(remaining)))
+                if reset is not None:
+                    cls._reset[bucket] = reset
+            exceeded = remaining is not None and remaining.strip() == "0"
+            if status == 429 or (status == 403 and (exceeded or retry)):
+                until = retry or (reset if exceeded else None) or now + 1
+                cls._blocked[bucket] = max(cls._blocked.get(bucket, 0), until)
+
+
+class InflightLimit():
+    """
+    Limit the number of requests sent to a host at the same time
+
+    Fragile servers can be protected using the ``max_inflight_requests``
+    option of the config section with the matching ``url``. Threads
+    sending more requests to the host wait until some of the pending
+    requests are completed. Responses served from the cache do not
+    count. Value ``0`` (the default) means no limit.
+    """
+
+    # Semaphores by host and limit
+    _semaphores: dict[tuple[str, int], threading.BoundedSemaphore] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def clear(cls) -> None:
+        """ Forget all semaphores """
+        with cls._lock:
+            cls._semaphores = {}
+
+    @staticmethod
+    def limit(url: str) -> int:
+        """ Maximum number of concurrent requests for given url """
+        config = Config.for_url(url) if Config.parser is not None else {}
+        value = config.get("max_inflight_requests", "0")
+        try:
+            return max(int(value), 0)
+        except ValueError as error:
+            raise ConfigError(
+                f"Invalid max_inflight_requests '{value}' for '{url}'.") from error
+
+    @classmethod
+    @contextlib.contextmanager
+    def slot(cls, url: str) -> Iterator[None]:
+        """ Hold one of the request slots of the host while sending """
+        limit = cls.limit(url)
+        if not limit:
+            yield
+            return
+        key = (urllib.parse.urlsplit(url).netloc, limit)
+        with cls._lock:
+            semaphore = cls._semaphores.get(key)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(limit)
+                cls._semaphores[key] = semaphore
+        if not semaphore.acquire(blocking=False):
+            log.debug("Waiting for a free request slot for '%s'.", key[0])
+            semaphore.acquire()
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Logins
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class Logins():
+    """
+    Authenticated sessions shared by all stats groups
+
+    Plugins which have to log in before sending any requests keep
+    the authenticated session here so that stats of other users (and
+    all reports generated by ``did serve``) reuse it instead of
+    logging in again. Sessions are identified by a key derived from
+    the server url and the credentials, see ``key()``.
+    """
+
+    _sessions: dict[str, requests.Session] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """ Key identifying the login (credentials are hashed) """
+        return hashlib.sha256(json.dumps(
+            [str(part) for part in parts]).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def get(cls, key: str) -> Optional[requests.Session]:
+        """ Authenticated session for given key if logged in already """
+        with cls._lock:
+            return cls._sessions.get(key)
+
+    @classmethod
+    def put(cls, key: str, authenticated: requests.Session) -> None:
+        """ Share the authenticated session """
+        with cls._lock:
+            cls._sessions[key] = authenticated
+
+    @classmethod
+    def forget(cls, key: str, expired: requests.Session) -> None:
+        """ Forget the expired session unless already replaced """
+        with cls._lock:
+            if cls._sessions.get(key) is expired:
+                del cls._sessions[key]
+
+    @classmethod
+    def clear(cls) -> None:
+        """ Forget all sessions """
+        with cls._lock:
+            cls._sessions = {}
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Http
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class CachedAdapter(requests.adapters.HTTPAdapter):
+    """ Pooled transport adapter using the persistent cache """
+
+    def __init__(self, timeout: Optional[float] = None, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.timeout = timeout
+
+    def send(  # type: ignore[override]
+            self,
+            request: requests.PreparedRequest,
+            **kwargs: Any) -> requests.Response:
+        """ Return the recorded or cached response, or send it """
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        key = tape = flight = None
+        if request.method is not None and request.url is not None \
+                and not kwargs.get("stream"):
+            key = Cache.key(
+                request.method, request.url, request.body,
+                request.headers.items())
+            tape = Cassette.key(request.method, request.url, request.body)
+            flight = SingleFlight.key(
+                request.method, request.url, request.body,
+                request.headers.items())
+        entry = Cassette.get(tape, str(request.url))
+        if entry is None:
+            entry = Cache.get(key)
+            if entry is not None:
+                utils.Profiler.count("cached")
+            else:
+                entry = SingleFlight.get(flight)
+        if entry is not None:
+            Cassette.put(
+                tape, entry["url"], entry["status"], entry["reason"],
+                entry["headers"], entry["body"])
+            response = requests.Response()
+            response.status_code = entry["status"]
+            response.reason = entry["reason"]
+            response.headers = requests.structures.CaseInsensitiveDict(
+                entry["headers"])
+            response.encoding = requests.utils.get_encoding_from_headers(
+                response.headers)
+            response._content = entry["body"]  # pylint: disable=protected-access
+            response.url = entry["url"]
+            response.request = request
+            response.connection = self
+            return response
+        try:
+            with InflightLimit.slot(str(request.url)):
+                RateLimit.wait(str(request.url))
+                response = super().send(request, **kwargs)
+        except BaseException:
+            SingleFlight.cancel(flight)
+            raise
+        RateLimit.update(str(request.url), response.status_code, response.headers)
+        if utils.Profiler.enabled:
+            utils.Profiler.count("requests")
+            retries = getattr(response.raw, "retries", None)
+            if retries is not None:
+                utils.Profiler.count("retries", len(retries.history))
+            if not kwargs.get("stream"):
+                utils.Profiler.count("bytes", len(response.content))
+        if key is not None and response.status_code == 200:
+            Cache.put(
+                key, response.url, response.status_code, response.reason,
+                dict(response.headers), response.content)
+        if tape is not None:
+            Cassette.put(
+                tape, response.url, response.status_code, response.reason,
+                dict(response.headers), response.content)
+        if flight is not None:
+            SingleFlight.put(
+                flight, response.url, response.status_code, response.reason,
+                dict(response.headers), response.content)
+        return response
+
+
+_sessions: dict[tuple[Any, ...], tuple[CachedAdapter, requests.Session]] = {}
+_sessions_lock = threading.Lock()
+
+
+def session(
+        url: str,
+        private: bool = False,
+        retry: bool = True) -> requests.Session:
+    """
+    Pooled http session for given server
+
+    Sessions are shared per host by all threads so that connections
+    are kept alive and reused across requests. Settings are taken
+    from the config section with the longest ``url`` matching given
+    url: ``pool_size`` sets the number of kept connections,
+    ``keep_alive`` can disable connection reuse, ``retries`` and
+    ``backoff`` define the retry policy for connection errors and
+    server failures, ``ssl_verify`` and ``timeout`` are used unless
+    given for the individual requests.
+
+    Shared sessions do not store any cookies. Use ``private`` to get
+    a separate session (e.g. for keeping the login cookies) which
+    still uses the connection pool of the host. Plugins which retry
+    failed requests themselves use ``retry=False`` so that the
+    attempts are not multiplied by the retry policy.
+    """
+    config = Config.for_url(url) if Config.parser is not None else {}
+    parsed = urllib.parse.urlsplit(url)
+    try:
+        pool_size = int(config.get("pool_size", DEFAULT_POOL_SIZE))
+        retries = int(config.get("retries", DEFAULT_RETRIES)) if retry else 0
+        backoff = float(config.get("backoff", DEFAULT_BACKOFF))
+        timeout = float(config["timeout"]) if "timeout" in config else None
+        keep_alive = bool(utils.strtobool(config.get("keep_alive", "yes")))
+        ssl_verify = bool(utils.strtobool(config.get("ssl_verify", "yes")))
+    except ValueError as error:
+        raise ConfigError(
+            f"Invalid http settings for '{url}': {error}") from error
+    key = (
+        parsed.scheme, parsed.netloc, pool_size, retries, backoff,
+        timeout, keep_alive, ssl_verify)
+    with _sessions_lock:
+        if key not in _sessions:
+            adapter = CachedAdapter(
+                timeout=timeout,
+                pool_connections=pool_size,
+                pool_maxsize=pool_size,
+                max_retries=urllib3.util.Retry(
+                    total=retries,
+                    backoff_factor=backoff,
+                    status_forcelist=RETRY_STATUS,
+                    raise_on_status=False))
+            shared = _new_session(adapter, keep_alive, ssl_verify)
+            # Block all cookies to keep the shared session stateless
+            shared.cookies.set_policy(
+                http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+            _sessions[key] = (adapter, shared)
+        adapter, shared = _sessions[key]
+    if private:
+        return _new_session(adapter, keep_alive, ssl_verify)
+    return shared
+
+
+def _new_session(
+        adapter: CachedAdapter,
+        keep_alive: bool,
+        ssl_verify: bool) -> requests.Session:
+    """ Create a new session using given adapter """
+    new = requests.Session()
+    new.mount("http://", adapter)
+    new.mount("https://", adapter)
+    new.verify = ssl_verify
+    if not keep_alive:
+        new.headers["Connection"] = "close"
+    return new
+
+
+def urlopen(
+        request: Union[str, urllib.request.Request]
+        ) -> urllib.response.addinfourl:
+    """ Open the url as urllib, use the recorded or cached response """
+    if isinstance(request, str):
+        request = urllib.request.Request(request)
+    key = Cache.key(
+        request.get_method(), request.full_url, request.data,
+        request.header_items())
+    tape = Cassette.key(request.get_method(), request.full_url, request.data)
+    flight = SingleFlight.key(
+        request.get_method(), request.full_url, request.data,
+        request.header_items())
+    entry = Cassette.get(tape, request.full_url)
+    if entry is None:
+        entry = Cache.get(key)
+        if entry is not None:
+            utils.Profiler.count("cached")
+        else:
+            entry = SingleFlight.get(flight)
+        if entry is None:
+            try:
+                with InflightLimit.slot(request.full_url):
+                    RateLimit.wait(request.full_url)
+                    with urllib.request.urlopen(request) as response:
+                        entry = {
+                            "url": response.geturl(),
+                            "status": response.getcode(),
+                            "reason": response.reason,
+                            "headers": dict(response.info().items()),
+                            "body": response.read(),
+                            }
+            except urllib.error.HTTPError as error:
+                RateLimit.update(request.full_url, error.code, error.headers)
+                raise
+            finally:
+                if entry is None:
+                    SingleFlight.cancel(flight)
+            RateLimit.update(request.full_url, entry["status"], entry["headers"])
+            utils.Profiler.count("requests")
+            utils.Profiler.count("bytes", len(entry["body"]))
+            if entry["status"] == 200:
+                Cache.put(key, **entry)
+            SingleFlight.put(flight, **entry)
+        Cassette.put(
+            tape, entry["url"], entry["status"], entry["reason"],
+            entry["headers"], entry["body"])
+    headers = email.message.Message()
+    for name, value in entry["headers"].items():
+        headers[name] = value
+    return urllib.response.addinfourl(
+        io.BytesIO(entry["body"]), headers, entry["url"], entry["status"])
+
+
+class XMLRPCTransport(xmlrpc.client.Transport):
+    """
+    Xml-rpc transport using ``urlopen()``
+
+    Makes xml-rpc calls recorded, replayed and cached as any other
+    http request. Pass it to the server proxy of the given url::
+
+        xmlrpc.client.ServerProxy(url, transport=XMLRPCTransport(url))
+    """
+
+    def __init__(self, url: str) -> None:
+        super().__init__()
+        self.scheme = urllib.parse.urlsplit(url).scheme or "http"
+
+    def request(  # type: ignore[override]
+            self,
+            host: str,
+            handler: str,
+            request_body: bytes,
+            verbose: bool = False) -> Any:
+        """ Send the call, parse the response """
+        self.verbose = verbose
+        host, extra_headers, _ = self.get_host_info(host)
+        url = f"{self.scheme}://{host}{handler}"
+        headers = dict(extra_headers or [])
+        headers["Content-Type"] = "text/xml"
+        headers["User-Agent"] = self.user_agent
+        request = urllib.request.Request(url, data=request_body, headers=headers)
+        try:
+            with urlopen(request) as response:
+                return self.parse_response(response)
+        except urllib.error.HTTPError as error:
+            raise xmlrpc.client.ProtocolError(
+                url, error.code, str(error.reason), dict(error.headers)
+                ) from error
+        except urllib.error.URLError as error:
+            raise ConnectionError(
+                f"Unable to connect to '{url}': {error.reason}") from error
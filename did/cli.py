@@ -6,15 +6,19 @@ running the main loop which gathers all individual stats.
 """
 
 import argparse
+import asyncio
+import copy
 import re
 import sys
-from typing import Optional, Union
+from collections import deque
+from typing import Iterator, Optional, Union
 
 from dateutil.relativedelta import relativedelta as delta
 
 import did.base
 from did import utils
-from did.stats import UserStats
+from did.stats import (Deadline, PluginTopology, Snapshot, StatsGroupPlugin,
+                       UserStats)
 from did.utils import log
 
 USAGE = """
@@ -49,11 +53,14 @@ class Options:
         if "--test" in self.arguments:
             did.base.Config(did.base.TEST_CONFIG)
 
-        # Get the default output width from the config (if available)
+        # Get the default output width and user parallelism from the
+        # config (if available)
         try:
             width = did.base.Config().width
+            parallel = did.base.Config().parallel
         except did.base.ConfigFileError:
             width = utils.MAX_WIDTH
+            parallel = 1
 
         # Time & user selection
         group = self.parser.add_argument_group("Select")
@@ -66,10 +73,15 @@ class Options:
         group.add_argument(
             "--until",
             help="End date in the YYYY-MM-DD format")
+        group.add_argument(
+            "--split", choices=did.base.SPLIT_UNITS,
+            help="Show a separate report for each day, week, month, "
+                 "quarter or year of the period")
 
-        # Create sample stats and include all stats objects options
+        # Include options of all stats objects from the sample stats
+        # (created only once for the config, shared with the team stats)
         log.debug("Loading Sample Stats group to build Options")
-        self.sample_stats = UserStats()
+        self.sample_stats = PluginTopology.get().sample
         self.sample_stats.add_option(self.parser)
         log.info("Default command line: did %s",
                  (" ".join([f'--{stat.option}' for stat in self.sample_stats.stats])))
@@ -77,8 +89,10 @@ class Options:
         # Formatting options
         group = self.parser.add_argument_group("Format")
         group.add_argument(
-            "--format", default="text", choices=["text", "markdown", "wiki"],
-            help="Output style, default: text")
+            "--format", default="text",
+            choices=["text", "markdown", "wiki", *utils.Records.FORMATS],
+            help="Output style, json and ndjson produce one record per item, "
+                 "default: text")
         group.add_argument(
             "--width", default=width, type=int,
             help="Maximum width of the report output (default: %(default)s)")
@@ -104,6 +118,39 @@ class Options:
         group.add_argument(
             "--merge", action="store_true",
             help="Merge stats of all users into a single report")
+        group.add_argument(
+            "--parallel", default=parallel, type=int, metavar="USERS",
+            help="Number of users to gather stats for concurrently "
+                 "(default: %(default)s)")
+        group.add_argument(
+            "--engine", default="threads", choices=["threads", "asyncio"],
+            help="Execution engine used for gathering stats "
+                 "(default: %(default)s)")
+        group.add_argument(
+            "--deadline", type=float, metavar="SECONDS",
+            help="Show the report after given number of seconds, "
+                 "stats not checked by then are marked as timed out")
+        group.add_argument(
+            "--no-cache", action="store_true",
+            help="Do not use the persistent cache of http responses")
+        group.add_argument(
+            "--refresh", action="store_true",
+            help="Ignore cached http responses, fetch and cache them again")
+        group.add_argument(
+            "--incremental", action="store_true",
+            help="Fetch only items newer than the last snapshot of the report")
+        group.add_argument(
+            "--profile", action="store_true",
+            help="Print time spent and http requests per section to stderr")
+        group.add_argument(
+            "--profile-trace", metavar="FILE",
+            help="Save the profile as a Chrome trace file, implies --profile")
+        group.add_argument(
+            "--record", metavar="FILE",
+            help="Save all http responses into a file for later replay")
+        group.add_argument(
+            "--replay", metavar="FILE",
+            help="Serve http responses saved using --record, no network")
         group.add_argument(
             "--debug", action="store_true",
             help="Turn on debugging output, do not catch exceptions")
@@ -160,6 +207,14 @@ class Options:
             raise RuntimeError(
                 f"Invalid date range ({opt.since} to {opt.until.date - delta(days=1)})")
 
+        # Finito
+        log.debug("Gathered options:")
+        log.debug('options = %s', opt)
+        return opt, self.header(opt, period)
+
+    @staticmethod
+    def header(opt: argparse.Namespace, period: Optional[str]) -> str:
+        """ Report header for the period given by the options """
         header = (
             f"Status report for {period} ({opt.since} "
             f"to {opt.until.date - delta(days=1)})"
@@ -168,15 +223,9 @@ class Options:
             # In markdown the first line must be a header
             # using alternate syntax allowing to use did's
             # output in commit messages as well
-            header = f"{header}\n{'=' * len(header)}"
-        else:
-            # In markdown no trailing punctuation is allowed in headings
-            header = f"{header}."
-
-        # Finito
-        log.debug("Gathered options:")
-        log.debug('options = %s', opt)
-        return opt, header
+            return f"{header}\n{'=' * len(header)}"
+        # In markdown no trailing punctuation is allowed in headings
+        return f"{header}."
 
     def check(self) -> None:
         """ Perform additional check for given options """
@@ -190,12 +239,240 @@ class Options:
         for argument in self.arg:
             if argument not in keywords:
                 raise did.base.OptionError(f"Invalid argument: '{argument}'")
+        if self.opt.record and self.opt.replay:
+            raise did.base.OptionError("Can't use --record and --replay together")
+        if self.opt.deadline is not None and self.opt.deadline <= 0:
+            raise did.base.OptionError(
+                f"Invalid deadline '{self.opt.deadline}', should be positive.")
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Main
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
+def team(
+        users: list[did.base.User],
+        options: argparse.Namespace,
+        whole: Optional[list[UserStats]] = None) -> Optional[list[UserStats]]:
+    """
+    Stats of all users with the team queries already done
+
+    Only the merged or total report needs the stats of all users
+    before showing them. Plugins able to search for several users at
+    once then fetch the stats of the whole team using a single query
+    for each chunk of users and attribute the results to individual
+    users. Returns None when there is nothing to batch.
+    """
+    if not (options.merge or options.total) or len(users) < 2:
+        return None
+    all_user_stats = []
+    for index, user in enumerate(users):
+        user_stats = UserStats(user=user, options=options)
+        if whole is not None:
+            user_stats.fill(whole[index])
+        all_user_stats.append(user_stats)
+    all_user_stats[0].check_team(all_user_stats)
+    return all_user_stats
+
+
+async def acheck(
+        all_user_stats: list[UserStats],
+        options: argparse.Namespace) -> list[UserStats]:
+    """
+    Check stats of all users on a single asyncio event loop
+
+    Up to ``--parallel`` users are checked concurrently. Plugins
+    without a native asynchronous fetch are run by the shared
+    scheduler threads.
+    """
+    semaphore = asyncio.Semaphore(max(options.parallel, 1))
+
+    async def check(user_stats: UserStats) -> UserStats:
+        async with semaphore:
+            await user_stats.acheck()
+        return user_stats
+
+    return list(await asyncio.gather(*map(check, all_user_stats)))
+
+
+def gather(
+        users: list[did.base.User],
+        options: argparse.Namespace,
+        whole: Optional[list[UserStats]] = None) -> Iterator[UserStats]:
+    """
+    Start checking stats for all users, yield them in the user order
+
+    Yielded user stats may still be in progress. Use ``stream()`` to
+    get the stats groups as soon as they are complete or ``check()``
+    to wait for all of them before requesting the next user. By
+    default users are checked one after another. When ``--parallel``
+    is greater than one, up to the given number of users are checked
+    concurrently. With ``--engine=asyncio`` all users are checked on
+    a single event loop before the first one is yielded.
+
+    Use ``whole`` to provide user stats already checked for a longer
+    period, items dated within the period are taken from them instead
+    of fetching them again. For the merged or total report the team
+    queries are done first, see ``team()``.
+    """
+    prepared = team(users, options, whole)
+
+    def create(index: int, user: did.base.User) -> UserStats:
+        if prepared is not None:
+            return prepared[index]
+        user_stats = UserStats(user=user, options=options)
+        if whole is not None:
+            user_stats.fill(whole[index])
+        return user_stats
+
+    if options.engine == "asyncio":
+        yield from asyncio.run(acheck(
+            [create(index, user) for index, user in enumerate(users)],
+            options))
+        return
+    started: deque[UserStats] = deque()
+    for index, user in enumerate(users):
+        user_stats = create(index, user)
+        user_stats.start()
+        started.append(user_stats)
+        if len(started) >= options.parallel:
+            yield started.popleft()
+    yield from started
+
+
+def periods(
+        users: list[did.base.User],
+        options: argparse.Namespace,
+        header: str) -> Iterator[tuple[
+            argparse.Namespace, str, Optional[list[UserStats]]]]:
+    """
+    Options, header and already checked stats for each reported period
+
+    Without ``--split`` there is just a single period. Otherwise stats
+    of all users are checked for the whole period first and each part
+    of the period takes the items dated within it. Stats without the
+    ``date_field`` are skipped for the whole period and fetched for
+    individual parts only.
+    """
+    if not options.split:
+        yield options, header, None
+        return
+    dated = copy.copy(options)
+    dated.dated_only = True
+    whole = list(gather(users, dated))
+    for user_stats in whole:
+        user_stats.check()
+    for since, until, period in did.base.Date.split(
+            options.since, options.until, options.split):
+        part = copy.copy(options)
+        part.since, part.until = since, until
+        yield part, Options.header(part, period), whole
+
+
+def records(
+        users: list[did.base.User],
+        options: argparse.Namespace,
+        header: str) -> tuple[list[UserStats], UserStats]:
+    """ Write item records of all users, merged or total ones too """
+    writer = utils.Records(options.format)
+    for part, _, whole in periods(users, options, header):
+        # Records of individual parts are marked with their period
+        extra = {}
+        if options.split:
+            extra = {"since": str(part.since), "until": str(part.until - 1)}
+        gathered_stats = []
+        team_stats = PluginTopology.get().team(part)
+        all_user_stats = gather(users, part, whole)
+        for _ in users:
+            user_stats = next(all_user_stats)
+            # Write records of each stats group as soon as it is done
+            if options.merge:
+                user_stats.check()
+            else:
+                for group in user_stats.stream():
+                    writer.write(
+                        {**record, **extra} for record in group.records())
+            team_stats.merge(user_stats)
+            gathered_stats.append(user_stats)
+        if options.merge or options.total:
+            writer.write(
+                {**record, **extra} for record in team_stats.records())
+    writer.close()
+    return gathered_stats, team_stats
+
+
+def report(
+        users: list[did.base.User],
+        options: argparse.Namespace,
+        header: str,
+        config: did.base.Config,
+        whole: Optional[list[UserStats]] = None
+        ) -> tuple[list[UserStats], UserStats]:
+    """ Show the report for all users, return their stats """
+    gathered_stats = []
+
+    # Print header and prepare team stats object for data merging
+    print(header)
+    team_stats = PluginTopology.get(config).team(options)
+    if options.merge:
+        utils.header(
+            "Total Report",
+            separator=config.separator,
+            separator_width=config.separator_width)
+        utils.item(f"Users: {len(users)}", options=options)
+
+    # Check individual user stats
+    all_user_stats = gather(users, options, whole)
+    for user in users:
+        if options.merge:
+            utils.item(str(user), 1, options=options)
+        else:
+            utils.header(
+                str(user),
+                separator=config.separator,
+                separator_width=config.separator_width)
+        user_stats = next(all_user_stats)
+        # Show each stats group as soon as it is done (unless merging)
+        if options.merge:
+            user_stats.check()
+        else:
+            for group in user_stats.stream():
+                group.show()
+                sys.stdout.flush()
+        team_stats.merge(user_stats)
+        gathered_stats.append(user_stats)
+
+    # Display merged team report
+    if options.merge or options.total:
+        if options.total:
+            utils.header(
+                "Total Report",
+                separator=config.separator,
+                separator_width=config.separator_width)
+        team_stats.show()
+
+    return gathered_stats, team_stats
+
+
+def finish(options: argparse.Namespace) -> None:
+    """ Save recordings and the profile, clean up the shared state """
+    # Save recorded http responses
+    if options.record:
+        did.base.Cassette.save()
+
+    # Forget responses shared during this run
+    did.base.SingleFlight.disable()
+
+    # No time limit for whatever comes next
+    Deadline.clear()
+
+    # Show the profiling summary, save the trace file if requested
+    if utils.Profiler.enabled:
+        utils.Profiler.summary()
+        if options.profile_trace:
+            utils.Profiler.trace(options.profile_trace)
+
+
 def main(arguments: Union[None, str, list[str]] = None
          ) -> tuple[list[UserStats], UserStats]:
     """
@@ -218,15 +495,14 @@ def main(arguments: Union[None, str, list[str]] = None
             f"\n{did.base.Config.example().strip()}")
         raise
 
-    # Load standard and custom plugins
-    utils.load_components("did.plugins", continue_on_error=True)
+    # Load custom plugins, standard ones are imported when configured
     if config:
         custom_plugins = config.plugins
         if custom_plugins:
             custom_plugins_list = [
                 plugin.strip()
                 for plugin in utils.split(custom_plugins)]
-            utils.load_components(*custom_plugins_list, continue_on_error=True)
+            StatsGroupPlugin.load_custom(*custom_plugins_list)
 
     # Parse options, initialize gathered stats
     options, header = Options(arguments).parse()
@@ -235,46 +511,57 @@ def main(arguments: Union[None, str, list[str]] = None
     # at this point if `--test` was used, Config() is filled.
     config = did.base.Config()
 
-    # Check for user email addresses (command line or config)
-    emails = options.emails or config.email
-    emails = utils.split(emails, separator=re.compile(r"\s*,\s*"))
-    users = [did.base.User(email=email) for email in emails]
+    # Record timing and http statistics if requested
+    if options.profile or options.profile_trace:
+        utils.Profiler.enable()
+    else:
+        utils.Profiler.disable()
 
-    # Print header and prepare team stats object for data merging
-    print(header)
-    team_stats = UserStats(options=options)
-    if options.merge:
-        utils.header(
-            "Total Report",
-            separator=config.separator,
-            separator_width=config.separator_width)
-        utils.item(f"Users: {len(users)}", options=options)
+    # Save recorded responses, show the profiling summary and clean up
+    # the shared state even if the report failed
+    try:
+        # Record http responses or serve them back from a file
+        if options.replay:
+            did.base.Cassette.replay(options.replay)
+        elif options.record:
+            did.base.Cassette.record(options.record)
+        else:
+            did.base.Cassette.disable()
 
-    # Check individual user stats
-    for user in users:
-        if options.merge:
-            utils.item(str(user), 1, options=options)
+        # Share identical http requests made during this run
+        did.base.SingleFlight.enable()
+
+        # Enable the persistent http cache unless disabled or replaying
+        if options.no_cache or options.replay:
+            did.base.Cache.disable()
         else:
-            utils.header(
-                str(user),
-                separator=config.separator,
-                separator_width=config.separator_width)
-        user_stats = UserStats(user=user, options=options)
-        user_stats.check()
-        # Show the results stats (unless merging)
-        if not options.merge:
-            user_stats.show()
-        team_stats.merge(user_stats)
-        gathered_stats.append(user_stats)
+            did.base.Cache.enable(
+                options.since, options.until, refresh=options.refresh)
 
-    # Display merged team report
-    if options.merge or options.total:
-        if options.total:
-            utils.header(
-                "Total Report",
-                separator=config.separator,
-                separator_width=config.separator_width)
-        team_stats.show()
+        # Limit the time spent checking stats if requested
+        Deadline.start(options.deadline)
+
+        # Fetch only new items of dated stats, take older ones stored
+        if options.incremental and not options.replay:
+            Snapshot.enable(refresh=options.refresh)
+        else:
+            Snapshot.disable()
+
+        # Check for user email addresses (command line or config)
+        emails = options.emails or config.email
+        emails = utils.split(emails, separator=re.compile(r"\s*,\s*"))
+        users = [did.base.User(email=email) for email in emails]
+
+        # Machine readable output contains the item records only
+        if options.format in utils.Records.FORMATS:
+            return records(users, options, header)
+
+        # Show a separate report for each period (just one unless split)
+        for part, part_header, whole in periods(users, options, header):
+            gathered_stats, team_stats = report(
+                users, part, part_header, config, whole)
+    finally:
+        finish(options)
 
-    # Return all gathered stats objects
+    # Return all gathered stats objects (of the last period if split)
     return gathered_stats, team_stats
@@ -3,7 +3,8 @@ Modules in this directory are searched for available stats. Each
 plugin should contain a single class inheriting from StatsGroup.
 Stats from this group will be included in the report if enabled in
 user config. Name of the plugin should match config section type.
-Attribute ``order`` defines the order in the final report.
+Attribute ``order`` defines the order in the final report. Only
+plugins with a section in the config file are imported.
 
 In addition to built-in plugins it is also possible to define your
 own stats. In order to enable such custom plugins add path to the
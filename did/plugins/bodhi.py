@@ -18,7 +18,7 @@ from bodhi.client.bindings import BodhiClientException
 
 from did.base import Config, ReportError, User
 from did.stats import Stats, StatsGroup
-from did.utils import listed, log, pretty
+from did.utils import Lazy, listed, log, pretty
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Investigator
@@ -55,7 +55,7 @@ class Bodhi():
                 raise ReportError('Error connecting to Bodhi server') from e
             objects: list[dict[str, Any]] = data['updates']
             log.debug("Result: %s fetched", listed(len(objects), "item"))
-            log.data(pretty(data))
+            log.data("%s", Lazy(pretty, data))
             result.extend(objects)
             if current_page < data['pages']:
                 current_page = current_page + 1
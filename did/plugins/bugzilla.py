@@ -51,9 +51,9 @@ import requests.exceptions
 from tenacity import (RetryCallState, RetryError, Retrying,
                       retry_if_exception_type, stop_after_attempt)
 
-from did.base import Config, ReportError, User
+from did.base import Config, ReportError, User, session
 from did.stats import Stats, StatsGroup
-from did.utils import log, pretty, split, strtobool
+from did.utils import Lazy, log, pretty, split, strtobool
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Constants
@@ -82,9 +82,11 @@ class Bugzilla():
         """ Connection to the server """
         if self._server is None:
             try:
+                # Private session, python-bugzilla sets its own headers
                 self._server = bugzilla.Bugzilla(
                     url=self.parent.url,  # pyright:ignore[reportArgumentType]
-                    sslverify=self.parent.ssl_verify
+                    sslverify=self.parent.ssl_verify,
+                    requests_session=session(self.parent.url, private=True)
                     )
             except requests.exceptions.ConnectionError as conn_err:
                 raise ReportError(
@@ -98,7 +100,7 @@ class Bugzilla():
         query["query_format"] = "advanced"
         query["limit"] = "0"
         log.debug("Search query:")
-        log.debug(pretty(query))
+        log.debug("%s", Lazy(pretty, query))
         # Fetch bug info
 
         def bugzilla_before_sleep(_retry_state: RetryCallState) -> None:
@@ -131,7 +133,7 @@ class Bugzilla():
             raise ReportError(
                 "Have you baked cookies using the 'bugzilla login' command?") from error
         log.debug("Search result:")
-        log.debug(pretty(result))
+        log.debug("%s", Lazy(pretty, result))
         bugs = dict((bug.id, bug) for bug in result)
         # Fetch bug history
         log.debug("Fetching bug history")
@@ -150,7 +152,7 @@ class Bugzilla():
                 result_history: dict[str, Any] = cast(
                     dict[str, Any],
                     self.server._proxy.Bug.history({'ids': list(bugs.keys())}))
-        log.debug(pretty(result))
+        log.debug("%s", Lazy(pretty, result))
         history = dict((bug["id"], bug["history"]) for bug in result_history["bugs"])
         # Fetch bug comments
         log.debug("Fetching bug comments")
@@ -165,7 +167,7 @@ class Bugzilla():
                     dict[str, Any],
                     self.server._proxy.Bug.comments({'ids': list(bugs.keys())}))
         # pylint: enable=protected-access
-        log.debug(pretty(result_comments))
+        log.debug("%s", Lazy(pretty, result_comments))
         comments = dict(
             (int(bug), data["comments"])
             for bug, data in list(result_comments["bugs"].items()))
@@ -183,6 +185,10 @@ class Bugzilla():
 class Bug():
     """ Bugzilla search """
 
+    __slots__ = (
+        "id", "title", "resolution", "history", "comments",
+        "options", "prefix", "parent")
+
     def __init__(self,
                  bug: "bugzilla.bug.Bug",
                  history: list[dict[str, Any]],
@@ -190,9 +196,17 @@ class Bug():
                  parent: "BugzillaStatsGroup") -> None:
         """ Initialize bug info and history """
         self.id: int = bug.id
-        self.bug: "bugzilla.bug.Bug" = bug
+        self.title = str(bug.summary)
+        self.resolution: Optional[str] = bug.resolution
         self.history = history
-        self.comments = comments
+        # Keep only comment numbers, authors and dates, not the text
+        self.comments = [
+            {
+                "count": comment["count"],
+                "author": comment.get("author", comment.get("creator")),
+                "creation_time": comment["creation_time"],
+                }
+            for comment in comments]
         if parent.options is None:
             raise RuntimeError("BugzillaStatsGroup not properly initialized")
         self.options: Namespace = parent.options
@@ -226,12 +240,12 @@ class Bug():
     @property
     def summary(self) -> str:
         """ Bug summary including resolution if enabled """
-        if not self.bug.resolution:
-            return str(self.bug.summary)
-        if (self.bug.resolution.lower() in self.parent.resolutions
+        if not self.resolution:
+            return self.title
+        if (self.resolution.lower() in self.parent.resolutions
                 or "all" in self.parent.resolutions):
-            return f"{self.bug.summary} [{self.bug.resolution.lower()}]"
-        return str(self.bug.summary)
+            return f"{self.title} [{self.resolution.lower()}]"
+        return self.title
 
     @property
     def logs(self) -> Generator[tuple[str, dict[str, Any]], None, None]:
@@ -329,7 +343,7 @@ class Bug():
             # Description (comment #0) is not considered as a comment
             if comment["count"] == 0:
                 continue
-            if (comment.get('author', comment.get('creator')) == user.email and
+            if (comment["author"] == user.email and
                     comment["creation_time"] >= self.options.since.date and
                     comment["creation_time"] < self.options.until.date):
                 return True
@@ -348,6 +362,9 @@ class Bug():
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 
+# Bugs have no date_field, history based stats check all changes of
+# the bug within the period which may be spread over several parts
+
 class BugzillaStats(Stats):
     """
     Abstract class for Bugzilla related Stats
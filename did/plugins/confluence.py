@@ -71,7 +71,7 @@ import re
 import time
 import urllib.parse
 from argparse import Namespace
-from datetime import datetime
+from datetime import date, datetime
 from http import HTTPStatus
 from typing import Any, Optional
 
@@ -82,9 +82,9 @@ import urllib3.exceptions
 from requests_gssapi import DISABLED  # type: ignore[import-untyped]
 from requests_gssapi import HTTPSPNEGOAuth
 
-from did.base import Config, ReportError, User, get_token
+from did.base import Config, Logins, ReportError, User, get_token, session
 from did.stats import Stats, StatsGroup
-from did.utils import listed, log, pretty, strtobool
+from did.utils import Lazy, listed, log, pretty, strtobool
 
 # Maximum number of results fetched at once
 MAX_RESULTS = 200
@@ -133,12 +133,8 @@ class Confluence():
                 # Handle the exceeded rate limit
                 if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
                     if response.headers.get("X-RateLimit-Remaining") == "0":
-                        # Wait at least a second.
-                        retry_after = max(int(response.headers["retry-after"]), 1)
-                        log.warning("Confluence rate limit exceeded.")
-                        log.warning("Sleeping now for %s.",
-                                    listed(retry_after, 'second'))
-                        time.sleep(retry_after)
+                        # Requests wait in the rate limiter until reset
+                        log.debug("Confluence rate limit exceeded.")
                         continue
                 if response.status_code == HTTPStatus.UNAUTHORIZED:
                     session = parent.renew_session()
@@ -178,7 +174,7 @@ class Confluence():
                 f"Failed to fetch confluence data at '{current_url}'. "
                 f"The reason was '{response.reason}' "
                 f"and the error was '{response_error}'.")
-        log.data(pretty(data))
+        log.data("%s", Lazy(pretty, data))
         return data
 
     @staticmethod
@@ -233,7 +229,7 @@ class Confluence():
                 batch,
                 listed(data["results"], "object")
                 )
-            log.data(pretty(data))
+            log.data("%s", Lazy(pretty, data))
             content.extend(data["results"])
             # If all issues fetched, we're done
             if data['_links'].get('next') is None:
@@ -241,6 +237,12 @@ class Confluence():
         return content
 
 
+def created(content: dict[str, Any]) -> Optional[date]:
+    """ Creation date of the content, if the history is expanded """
+    value = content.get("history", {}).get("createdDate")
+    return dateutil.parser.parse(value).date() if value else None
+
+
 class ConfluencePage(Confluence):
     """ Confluence page results """
 
@@ -249,6 +251,7 @@ class ConfluencePage(Confluence):
         self.title = page['title']
         self.url = f"{url}{page['_links']['webui']}"
         self.format = myformat
+        self.created = created(page)
 
     def __str__(self) -> str:
         """ Page title for displaying """
@@ -270,6 +273,7 @@ class ConfluenceComment(Confluence):
         self.body = re.sub('<[^<]+?>', '', self.body)
         self.url = url
         self.format = myformat
+        self.created = created(comment)
 
     def __str__(self) -> str:
         """ Confluence title & comment snippet for displaying """
@@ -306,12 +310,15 @@ class ConfluenceStats(Stats):
 class PageCreated(ConfluenceStats):
     """ Created pages """
 
+    date_field = "created"
+
     def fetch(self) -> None:
         log.info("Searching for pages created by %s", self.user)
         query = (
             f"type=page AND creator = '{self.user.login}' "
             f"AND created >= {self.options.since} AND created < {self.options.until}")
-        result = Confluence.search(query, self, timeout=self.parent.timeout)
+        result = Confluence.search(
+            query, self, expand="history", timeout=self.parent.timeout)
         self.stats = [
             ConfluencePage(
                 page,
@@ -324,6 +331,8 @@ class PageCreated(ConfluenceStats):
 class PageModified(ConfluenceStats):
     """ Modified pages """
 
+    # No date_field, pages may be modified several times in the period
+
     def fetch(self) -> None:
         log.info("Searching for pages modified by %s", self.user)
         query = (
@@ -358,6 +367,8 @@ class PageModified(ConfluenceStats):
 class CommentAdded(ConfluenceStats):
     """ Commented pages """
 
+    date_field = "created"
+
     def fetch(self) -> None:
         log.info("Searching for comments added by %s", self.user)
         query = (
@@ -369,7 +380,8 @@ class CommentAdded(ConfluenceStats):
                 self.parent.url,
                 self.options.format
                 ) for comment in Confluence.search(
-                query, self, expand="body.editor", timeout=self.parent.timeout)]
+                query, self, expand="body.editor,history",
+                timeout=self.parent.timeout)]
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -558,7 +570,18 @@ class ConfluenceStatsGroup(StatsGroup):
                 ) from error
         return response
 
+    @property
+    def login_key(self) -> str:
+        """ Key of the authenticated session shared with other users """
+        return Logins.key(
+            "confluence", self.url, self.auth_type, self.auth_url,
+            getattr(self, "auth_username", None),
+            getattr(self, "auth_password", None),
+            getattr(self, "token", None))
+
     def renew_session(self) -> requests.Session:
+        if self._session is not None:
+            Logins.forget(self.login_key, self._session)
         self._session = None
         return self.session
 
@@ -568,7 +591,12 @@ class ConfluenceStatsGroup(StatsGroup):
         # pylint: disable=too-many-branches
         if self._session is not None:
             return self._session
-        self._session = requests.Session()
+        # Reuse the session if already logged in for another user
+        shared = Logins.get(self.login_key)
+        if shared is not None:
+            self._session = shared
+            return self._session
+        self._session = session(self.url, private=True)
         # Disable SSL warning when ssl_verify is False
         if not self.ssl_verify:
             urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -580,13 +608,8 @@ class ConfluenceStatsGroup(StatsGroup):
             else:
                 response = self._gss_api_auth_session()
             if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
-                retry_after = 1
-                if response.headers.get("X-RateLimit-Remaining") == "0":
-                    retry_after = max(int(response.headers["retry-after"]), 1)
-                    log.warning("Confluence rate limit exceeded.")
-                    log.warning("Sleeping now for %s.",
-                                listed(retry_after, 'second'))
-                time.sleep(retry_after)
+                # Requests wait in the rate limiter until reset
+                log.debug("Confluence rate limit exceeded.")
                 continue
             try:
                 response.raise_for_status()
@@ -627,4 +650,5 @@ class ConfluenceStatsGroup(StatsGroup):
                     time.sleep(1)
                     continue
                 break
+        Logins.put(self.login_key, self._session)
         return self._session
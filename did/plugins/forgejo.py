@@ -32,7 +32,7 @@ import requests
 from tenacity import (RetryCallState, RetryError, Retrying,
                       retry_if_exception_type, stop_after_attempt)
 
-from did.base import Config, ReportError, User, get_token
+from did.base import Config, ReportError, User, get_token, session
 from did.stats import Stats, StatsGroup
 from did.utils import log
 
@@ -64,7 +64,7 @@ class Forgejo():
                         before_sleep=forgejo_before_sleep,
                         reraise=True):
                     with attempt:
-                        response = requests.get(
+                        response = session(self.url, retry=False).get(
                             url, headers=self.headers, timeout=self.timeout
                             )
                 log.debug("Response headers:\n%s", response.headers)
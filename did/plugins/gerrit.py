@@ -14,12 +14,12 @@ Config example::
 
 import json
 import urllib.parse
-import urllib.request
 from datetime import datetime
 
-from did.base import TODAY, Config, ReportError
+import did.base
+from did.base import Config, ReportError, urlopen
 from did.stats import Stats, StatsGroup
-from did.utils import log, pretty
+from did.utils import Lazy, log, pretty
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Change
@@ -73,7 +73,7 @@ class Gerrit():
 
     def get_query_result(self, url):
         log.debug('url = %s', url)
-        with urllib.request.urlopen(url) as res:
+        with urlopen(url) as res:
             if res.getcode() != 200:
                 raise IOError(f'Cannot retrieve list of changes ({res.getcode()})')
 
@@ -170,7 +170,7 @@ class GerritUnit(Stats):
 
             common_query_options = f'+owner:{self.user.login}'
             if not limit_since:
-                age = (TODAY - self.since_date).days
+                age = (did.base.TODAY - self.since_date).days
                 common_query_options += f'+-age:{age}d'
 
         common_query_options += (
@@ -296,7 +296,7 @@ class AddedPatches(GerritUnit):
 
             owner = changes['owner']['email']
 
-            log.debug("changes.messages = %s", pretty(changes['messages']))
+            log.debug("changes.messages = %s", Lazy(pretty, changes['messages']))
             cmnts_by_user = []
             for chg in changes['messages']:
                 # TODO This is a very bad algorithm for recognising
@@ -348,7 +348,7 @@ class ReviewedChanges(GerritUnit):
             except IOError:
                 log.debug('Failing to retrieve details for %s', tck.change_id)
                 continue
-            log.debug("changes.messages = %s", pretty(changes['messages']))
+            log.debug("changes.messages = %s", Lazy(pretty, changes['messages']))
             cmnts_by_user = []
             for chg in changes['messages']:
                 if 'author' not in chg:
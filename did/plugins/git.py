@@ -24,7 +24,43 @@ import subprocess
 
 import did.base
 from did.stats import Stats, StatsGroup
-from did.utils import item, log, pretty
+from did.utils import Lazy, item, log, pretty
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Commit
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+
+class Commit(str):
+    """ Commit message with the commit date and author """
+
+    date = None
+    author = None
+    hash = None
+
+    @classmethod
+    def parse(cls, text):
+        """ Separate the date and author prefixed to the message """
+        date, author, message = text.split("\t", 2)
+        commit = cls(message)
+        commit.date = date
+        commit.author = author
+        commit.hash = message.split(" - ", 1)[0]
+        return commit
+
+    def fields(self):
+        """ Structured fields for the json output """
+        return {
+            "hash": self.hash,
+            "date": self.date,
+            "author": self.author,
+            "text": str(self),
+            }
+
+    def by(self, login):
+        """ True if authored by given login (a fixed string) """
+        return login in self.author
+
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Git Repository
@@ -39,26 +75,37 @@ class GitRepo():
         """ Initialize the path. """
         self.path = path
 
-    # pylint: disable=too-many-branches
     def commits(self, user, options):
         """ List commits for given user. """
+        return self.team_commits([user], options)[0]
+
+    # pylint: disable=too-many-branches
+    def team_commits(self, users, options):
+        """ List commits for each of given users using one git log """
         # Prepare the command
-        command = f"git log --all --author={user.login}".split()
+        command = ["git", "log", "--all"]
+        if len(users) > 1:
+            # Authors are matched literally to attribute the commits
+            command.append("--fixed-strings")
+        command.extend(f"--author={user.login}" for user in users)
         command.append(f"--since='{options.since} 00:00:00'")
         command.append(f"--until='{options.until} 00:00:00'")
+        # Commits are prefixed with the date and author, tab separated
+        command.append("--date=short")
+        prefix = "%cd%x09%an <%ae>%x09"
         if getattr(options, 'full_message', False):
             # Full message mode: show hash and complete commit body
             # Use NULL character as separator between commits
-            command.append("--format=format:%h - %B%x00")
+            command.append(f"--format=format:{prefix}%h - %B%x00")
         elif options.verbose:
             command.append("--name-only")
             # Need an extra new line to separate merge commits otherwise
             # they are squeezed together without an empty line between
-            command.append("--format=format:%n%h - %s")
+            command.append(f"--format=format:%n{prefix}%h - %s")
         else:
-            command.append("--format=format:%h - %s")
+            command.append(f"--format=format:{prefix}%h - %s")
         log.info("Checking commits in %s", self.path)
-        log.details(pretty(command))
+        log.details("%s", Lazy(pretty, command))
 
         # Get the commit messages
         try:
@@ -76,11 +123,22 @@ class GitRepo():
                 if process.returncode != 0:
                     log.debug(errors.strip())
                     log.warning("Unable to check commits in '%s'", self.path)
-                    return []
+                    return [[] for _ in users]
         except OSError as error:
             log.debug(error)
             raise did.base.ReportError(f"Unable to access git repo '{self.path}'")
 
+        commits = self.parse(output, options)
+        if len(users) == 1:
+            return [commits]
+        # Attribute commits to users the same way as git matched them
+        return [
+            [commit for commit in commits if commit.by(user.login)]
+            for user in users]
+
+    @staticmethod
+    def parse(output, options):
+        """ Parse commits from the git log output """
         if not output:
             return []
 
@@ -94,19 +152,19 @@ class GitRepo():
                 # first line is "hash - subject" then body
                 lines = commit.split("\n")
                 if len(lines) == 1:
-                    commits.append(lines[0])
+                    commits.append(Commit.parse(lines[0]))
                 else:
                     # Indent body lines with 8 spaces for proper display
                     formatted = lines[0]
                     for line in lines[1:]:
                         if line.strip():
                             formatted += f"\n        {line}"
-                    commits.append(formatted)
+                    commits.append(Commit.parse(formatted))
             return commits
 
         # Single commit per line in non-verbose mode
         if not options.verbose:
-            return output.split("\n")
+            return [Commit.parse(line) for line in output.split("\n")]
 
         # In verbose mode commits separated by two empty lines
         commits = []
@@ -115,14 +173,15 @@ class GitRepo():
 
             # Use a single line if no files changed (e.g. merges)
             if len(lines) == 1:
-                commits.append(lines[0])
+                commits.append(Commit.parse(lines[0]))
 
             # Show the first directory with modified files
             # FIXME: But why just the first one? Shouldn't we show
             # all? Or at least more? With a maximum limit?
             else:
                 directory = re.sub("/[^/]+$", "", lines[1])
-                commits.append(f"{lines[0]}\n        * {directory}")
+                commits.append(
+                    Commit.parse(f"{lines[0]}\n        * {directory}"))
         return commits
 
 
@@ -133,6 +192,9 @@ class GitRepo():
 class GitCommits(Stats):
     """ Git commits """
 
+    date_field = "date"
+    team_size = 20
+
     def __init__(self, option, name=None, parent=None, path=None):
         super().__init__(option=option, name=name, parent=parent)
         self.path = path
@@ -141,6 +203,13 @@ class GitCommits(Stats):
     def fetch(self):
         self.stats = self.repo.commits(self.user, self.options)
 
+    def fetch_team(self, team):
+        """ Check commits of all team members at once """
+        commits = self.repo.team_commits(
+            [member.user for member in team], self.options)
+        for member, member_commits in zip(team, commits):
+            member.stats = member_commits
+
     def header(self):
         """ Show summary header. """
         # A bit different header for git stats: Work on xxx: x commit(s)
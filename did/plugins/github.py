@@ -75,16 +75,15 @@ pull-requests-merged
 
 import json
 import re
-import time
 from datetime import datetime
 
 import requests
 from tenacity import (RetryError, Retrying, retry_if_exception_type,
                       stop_after_attempt)
 
-from did.base import Config, Date, ReportError, get_token
+from did.base import Config, Date, ReportError, get_token, session
 from did.stats import Stats, StatsGroup
-from did.utils import listed, log, pretty
+from did.utils import Lazy, listed, log, pretty
 
 # Identifier padding
 PADDING = 3
@@ -95,6 +94,12 @@ PER_PAGE = 100
 # Default number of seconds waiting on GitHub before giving up
 TIMEOUT = 60
 
+# Maximum number of users searched at once (the query length is limited)
+TEAM_SIZE = 10
+
+# Maximum number of results provided by the search api for one query
+SEARCH_LIMIT = 1000
+
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Investigator
@@ -145,7 +150,7 @@ class GitHub():
                 response = self.request(url)
                 comments = response.json()
                 log.debug("%s comments fetched for %s", len(comments), url)
-                log.data(pretty(comments))
+                log.data("%s", Lazy(pretty, comments))
                 for comment in comments:
                     created_at = datetime.strptime(
                         comment["created_at"],
@@ -180,7 +185,7 @@ class GitHub():
                         before_sleep=log.debug("Trying to connect to GitHUb..."),
                         reraise=True):
                     with attempt:
-                        response = requests.get(
+                        response = session(self.url, retry=False).get(
                             url, headers=self.headers, timeout=self.timeout
                             )
                 log.debug("Response headers:\n%s", response.headers)
@@ -194,14 +199,14 @@ class GitHub():
                     "Defined token is not valid. "
                     "Either update it or remove it.")
 
-            # Handle the exceeded rate limit
+            # Handle the exceeded rate limit, the shared rate limiter
+            # makes requests to the server wait until the limit is reset
             if response.status_code in [403, 429]:
-                if response.headers.get("X-RateLimit-Remaining") == "0":
-                    reset_time = int(response.headers["X-RateLimit-Reset"])
-                    sleep_time = int(max(reset_time - time.time(), 0)) + 1
-                    log.warning("GitHub rate limit exceeded, use token to speed up.")
-                    log.warning("Sleeping now for %s.", listed(sleep_time, 'second'))
-                    time.sleep(sleep_time)
+                if response.headers.get("X-RateLimit-Remaining") == "0" \
+                        or "Retry-After" in response.headers:
+                    if not self.headers:
+                        log.warning(
+                            "GitHub rate limit exceeded, use token to speed up.")
                     continue
                 raise ReportError(f"GitHub query failed: {response.text}")
             # all good!
@@ -209,8 +214,8 @@ class GitHub():
 
         return response
 
-    def search(self, query):
-        """ Perform GitHub query """
+    def search(self, query, limit=None):
+        """ Perform GitHub query, fail if it matches more than limit """
         result = []
         url = f"{self.url}/{query}{self.filter}&per_page={PER_PAGE}"
 
@@ -227,15 +232,20 @@ class GitHub():
                     f"Failed to fetch GitHub data at '{url}'. "
                     f"The reason was '{response.reason}' "
                     f"and the error was '{error}'.")
-            log.data(pretty(response.text))
+            log.data("%s", Lazy(pretty, response.text))
             # Parse fetched json data
             try:
-                data = json.loads(response.text)["items"]
-                log.debug(data)
-                result.extend(data)
+                data = json.loads(response.text)
+                log.debug(data["items"])
+                result.extend(data["items"])
             except requests.exceptions.JSONDecodeError as error:
                 log.debug(error)
                 raise ReportError(f"GitHub JSON failed: {response.text}.") from error
+            # Results beyond the limit would be silently missing
+            if limit is not None and data.get("total_count", 0) > limit:
+                raise ReportError(
+                    f"GitHub query matched {data['total_count']} items, "
+                    f"only {limit} can be fetched.")
 
             # Update url to the next page, break if no next page
             # provided
@@ -245,10 +255,44 @@ class GitHub():
                 break
 
         log.debug("Result: %s fetched", listed(len(result), "item"))
-        log.data(pretty(result))
+        log.data("%s", Lazy(pretty, result))
         return result
 
 
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Team Search
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def qualifiers(key, team):
+    """ Search qualifiers matching any of the team members """
+    return "+".join(f"{key}:{member.user.login}" for member in team)
+
+
+def authors(issue):
+    """ Lowercase login of the issue author """
+    return {(issue.get("user") or {}).get("login", "").lower()}
+
+
+def team_search(stats, query):
+    """
+    Search issues of the whole team
+
+    The search api provides only the first SEARCH_LIMIT results. When
+    the team query matches more, the team query fails and members are
+    searched one by one instead.
+    """
+    return stats.parent.github.search(query, limit=SEARCH_LIMIT)
+
+
+def attribute(team, issues, owners, date):
+    """ Give each team member the issues they own """
+    for member in team:
+        login = member.user.login.lower()
+        member.stats = [
+            Issue(issue, member.parent, date=issue.get(date))
+            for issue in issues if login in owners(issue)]
+
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Issue
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -256,36 +300,45 @@ class GitHub():
 class Issue():
     """ GitHub Issue """
 
-    def __init__(self, data, parent):
-        self.data = data
+    __slots__ = (
+        "owner", "project", "id", "title", "url", "body", "date", "options")
+
+    def __init__(self, data, parent, date=None):
         self.title = data["title"]
+        self.url = data["html_url"]
         matched = re.search(
             r"/repos/([^/]+)/([^/]+)/issues/(\d+)", data["url"])
         self.owner = matched.groups()[0]
         self.project = matched.groups()[1]
         self.id = matched.groups()[2]
         self.options = parent.options
+        # Date of the reported action (e.g. created or closed)
+        self.date = date
+        # Keep the description only if it is going to be shown
+        self.body = None
+        if getattr(self.options, 'full_message', False):
+            self.body = data.get("body")
 
     def __str__(self):
         """ String representation """
         label = f"{self.owner}/{self.project}#{str(self.id).zfill(PADDING)}"
-        title = self.data["title"].strip() if self.data.get("title") else ""
+        title = self.title.strip() if self.title else ""
 
         # Check for full-message mode
-        if getattr(self.options, 'full_message', False) and self.data.get("body"):
-            body = self.data["body"].strip()
+        if getattr(self.options, 'full_message', False) and self.body:
+            body = self.body.strip()
             # Format body with indentation for multi-line content
             body_lines = [line for line in body.split("\n") if line.strip()]
             formatted_body = "\n        ".join(body_lines)
 
             if self.options.format == "markdown":
-                return (f'[{label}]({self.data["html_url"]}) - {title}'
+                return (f'[{label}]({self.url}) - {title}'
                         f'\n        {formatted_body}')
             return f'{label} - {title}\n        {formatted_body}'
 
         # Default: title only
         if self.options.format == "markdown":
-            return f'[{label}]({self.data["html_url"]}) - {title}'
+            return f'[{label}]({self.url}) - {title}'
         return f'{label} - {title}'
 
     def __eq__(self, other):
@@ -301,6 +354,11 @@ class Issue():
         """ Hash function """
         return hash((self.owner, self.project, self.id))
 
+    @property
+    def identity(self):
+        """ Issue key used for merging stats of multiple users """
+        return (self.owner, self.project, self.id)
+
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Stats
@@ -309,6 +367,9 @@ class Issue():
 class IssuesCreated(Stats):
     """ Issues created """
 
+    date_field = "date"
+    team_size = TEAM_SIZE
+
     def fetch(self):
         log.info("Searching for issues created by %s", self.user)
         login = self.user.login
@@ -316,12 +377,28 @@ class IssuesCreated(Stats):
         until = GitHub.until(self.options.until)
         query = f"search/issues?q=author:{login}+created:{since}..{until}+type:issue"
         self.stats = [
-            Issue(issue, self.parent) for issue in self.parent.github.search(query)]
+            Issue(issue, self.parent, date=issue.get("created_at"))
+            for issue in self.parent.github.search(query)]
+
+    def fetch_team(self, team):
+        log.info("Searching for issues created by %s", listed(
+            [str(member.user) for member in team]))
+        since = self.options.since
+        until = GitHub.until(self.options.until)
+        query = (
+            f"search/issues?q={qualifiers('author', team)}"
+            f"+created:{since}..{until}+type:issue")
+        attribute(team, team_search(self, query), authors, "created_at")
 
 
 class IssuesClosed(Stats):
     """ Issues closed """
 
+    # No team query, items can have several assignees so repeated
+    # assignee qualifiers may be combined using AND (as labels are)
+    # which would silently leave the team report empty
+    date_field = "date"
+
     def fetch(self):
         log.info("Searching for issues closed by %s", self.user)
         login = self.user.login
@@ -329,7 +406,8 @@ class IssuesClosed(Stats):
         until = GitHub.until(self.options.until)
         query = f"search/issues?q=assignee:{login}+closed:{since}..{until}+type:issue"
         self.stats = [
-            Issue(issue, self.parent) for issue in self.parent.github.search(query)]
+            Issue(issue, self.parent, date=issue.get("closed_at"))
+            for issue in self.parent.github.search(query)]
 
 
 class IssueCommented(Stats):
@@ -356,6 +434,9 @@ class IssueCommented(Stats):
 class PullRequestsCreated(Stats):
     """ Pull requests created """
 
+    date_field = "date"
+    team_size = TEAM_SIZE
+
     def fetch(self):
         log.info("Searching for pull requests created by %s", self.user)
         login = self.user.login
@@ -363,7 +444,18 @@ class PullRequestsCreated(Stats):
         until = GitHub.until(self.options.until)
         query = f"search/issues?q=author:{login}+created:{since}..{until}+type:pr"
         self.stats = [
-            Issue(issue, self.parent) for issue in self.parent.github.search(query)]
+            Issue(issue, self.parent, date=issue.get("created_at"))
+            for issue in self.parent.github.search(query)]
+
+    def fetch_team(self, team):
+        log.info("Searching for pull requests created by %s", listed(
+            [str(member.user) for member in team]))
+        since = self.options.since
+        until = GitHub.until(self.options.until)
+        query = (
+            f"search/issues?q={qualifiers('author', team)}"
+            f"+created:{since}..{until}+type:pr")
+        attribute(team, team_search(self, query), authors, "created_at")
 
 
 class PullRequestsCommented(Stats):
@@ -390,6 +482,11 @@ class PullRequestsCommented(Stats):
 class PullRequestsClosed(Stats):
     """ Pull requests closed """
 
+    # No team query, items can have several assignees so repeated
+    # assignee qualifiers may be combined using AND (as labels are)
+    # which would silently leave the team report empty
+    date_field = "date"
+
     def fetch(self):
         log.info("Searching for pull requests closed by %s", self.user)
         login = self.user.login
@@ -397,12 +494,15 @@ class PullRequestsClosed(Stats):
         until = GitHub.until(self.options.until)
         query = f"search/issues?q=assignee:{login}+closed:{since}..{until}+type:pr"
         self.stats = [
-            Issue(issue, self.parent) for issue in self.parent.github.search(query)]
+            Issue(issue, self.parent, date=issue.get("closed_at"))
+            for issue in self.parent.github.search(query)]
 
 
 class PullRequestsReviewed(Stats):
     """ Pull requests reviewed """
 
+    date_field = "date"
+
     def fetch(self):
         log.info("Searching for pull requests reviewed by %s", self.user)
         login = self.user.login
@@ -413,12 +513,15 @@ class PullRequestsReviewed(Stats):
             f"+closed:{since}..{until}+type:pr"
             )
         self.stats = [
-            Issue(issue, self.parent) for issue in self.parent.github.search(query)]
+            Issue(issue, self.parent, date=issue.get("closed_at"))
+            for issue in self.parent.github.search(query)]
 
 
 class PullRequestsMerged(Stats):
     """ Pull requests merged """
 
+    date_field = "date"
+
     def fetch(self):
         log.info("Searching for merged pull requests authored by %s", self.user)
         login = self.user.login
@@ -426,7 +529,10 @@ class PullRequestsMerged(Stats):
         until = GitHub.until(self.options.until)
         query = f"search/issues?q=author:{login}+merged:{since}..{until}+type:pr"
         self.stats = [
-            Issue(issue, self.parent) for issue in self.parent.github.search(query)]
+            Issue(
+                issue, self.parent,
+                date=issue.get("pull_request", {}).get("merged_at"))
+            for issue in self.parent.github.search(query)]
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
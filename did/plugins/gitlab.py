@@ -68,9 +68,9 @@ import requests
 import urllib3
 from urllib3.exceptions import InsecureRequestWarning
 
-from did.base import Config, ReportError, get_token
+from did.base import Config, ReportError, get_token, session
 from did.stats import Stats, StatsGroup
-from did.utils import listed, log, pretty, strtobool
+from did.utils import Lazy, listed, log, pretty, strtobool
 
 GITLAB_SSL_VERIFY = True
 GITLAB_API = 4
@@ -118,7 +118,7 @@ class GitLab():
         retries = 0
         while True:
             try:
-                api_raw = requests.get(
+                api_raw = session(self.url).get(
                     url, headers=self.headers, verify=self.ssl_verify,
                     params=params, timeout=self.timeout)
                 api_raw.raise_for_status()
@@ -154,7 +154,7 @@ class GitLab():
     def _get_gitlab_api_json(self, endpoint):
         log.debug("Query: %s", endpoint)
         result = self._get_gitlab_api(endpoint).json()
-        log.data(pretty(result))
+        log.data("%s", Lazy(pretty, result))
         return result
 
     def _get_gitlab_api_list(
@@ -167,7 +167,7 @@ class GitLab():
         result = self._get_gitlab_api(endpoint, params=params)
         result.raise_for_status()
         results.extend(result.json())
-        log.data(pretty(results))
+        log.data("%s", Lazy(pretty, results))
         while ('next' in result.links and 'url' in result.links['next'] and
                 get_all_results):
             log.debug("-> Fetching more paginated data")
@@ -322,20 +322,37 @@ class GitLab():
 class Issue():
     """ GitLab Issue """
 
+    __slots__ = (
+        "parent", "gitlabapi", "project", "project_id", "target_id",
+        "noteable_id", "endpoint", "id", "title", "date", "_body")
+
     def __init__(self, data: dict, parent: "GitLabStats", set_id=None):
         self.parent = parent
-        self.data = data
         self.gitlabapi: GitLab = parent.gitlab
+        # Keep only fields needed for fetching the body and rendering
         self.project = self.gitlabapi.get_project(data['project_id'])
+        self.project_id = data['project_id']
+        self.target_id = data.get('target_id')
+        self.noteable_id = None
+        self.endpoint = "merge_requests"
+        if data['target_type'] == 'Issue' or (
+                data['target_type'] == 'Note'
+                and data['note']['noteable_type'] == 'Issue'
+                ):
+            self.endpoint = "issues"
+        if data['target_type'] == 'Note' and data['note']['noteable_type'] in (
+                'Issue', 'MergeRequest'):
+            self.noteable_id = data['note']['noteable_id']
         self.id = set_id
         if set_id is None:
             self.id = self.iid()
         self.title = data['target_title']
+        # Time of the event, used for splitting the report
+        self.date = data.get('created_at')
         self._body: Optional[str] = None
 
     def iid(self):
-        issue = self.gitlabapi.get_project_issue(
-            self.data['project_id'], self.data['target_id'])
+        issue = self.gitlabapi.get_project_issue(self.project_id, self.target_id)
 
         if issue is not None:
             return issue['iid']
@@ -346,20 +363,36 @@ class Issue():
         """Get full issue description (lazy-loaded)"""
         if self._body is None:
             issue_data = self.gitlabapi.get_project_issue(
-                self.data['project_id'], self.data['target_id'])
+                self.project_id, self.target_id)
             self._body = issue_data.get('description', '') if issue_data else ''
         return self._body
 
+    @property
+    def href(self) -> str:
+        """ Link to the issue or merge request """
+        return (
+            f"{self.gitlabapi.url}/{self.project['path_with_namespace']}"
+            f"/-/{self.endpoint}/{str(self.id)}"
+            )
+
+    @property
+    def identity(self) -> Optional[tuple[Any, ...]]:
+        """ Issue key used for merging stats of multiple users """
+        if self.id == "unknown":
+            return None
+        return (self.project_id, self.endpoint, self.id)
+
+    def fields(self) -> dict:
+        """ Structured fields for the json output """
+        return {
+            "project": self.project['path_with_namespace'],
+            "id": self.id,
+            "title": self.title,
+            "url": self.href,
+            }
+
     def __str__(self):
         """ String representation """
-        # Determine endpoint for URL
-        endpoint = "merge_requests"
-        if self.data['target_type'] == 'Issue' or (
-                self.data['target_type'] == 'Note'
-                and self.data['note']['noteable_type'] == 'Issue'
-                ):
-            endpoint = "issues"
-
         label = f"{self.project['path_with_namespace']}#{str(self.id)}"
 
         # Check for full-message mode
@@ -369,11 +402,7 @@ class Issue():
             formatted_body = "\n        ".join(body_lines)
 
             if self.parent.options.format == "markdown":
-                href = (
-                    f"{self.gitlabapi.url}/{self.project['path_with_namespace']}"
-                    f"/-/{endpoint}/{str(self.id)}"
-                    )
-                return (f"[{label}]({href}) - {self.title}"
+                return (f"[{label}]({self.href}) - {self.title}"
                         f"\n        {formatted_body}")
             return (f"{self.project['path_with_namespace']}"
                     f"#{str(self.id).zfill(PADDING)} - {self.title}"
@@ -381,11 +410,7 @@ class Issue():
 
         # Default: title only
         if self.parent.options.format == "markdown":
-            href = (
-                f"{self.gitlabapi.url}/{self.project['path_with_namespace']}"
-                f"/-/{endpoint}/{str(self.id)}"
-                )
-            return f"[{label}]({href}) - {self.title}"
+            return f"[{label}]({self.href}) - {self.title}"
         return (
             f"{self.project['path_with_namespace']}"
             f"#{str(self.id).zfill(PADDING)} - {self.title}"
@@ -395,6 +420,8 @@ class Issue():
 class MergeRequest(Issue):
     # pylint: disable=too-few-public-methods
 
+    __slots__ = ()
+
     def __init__(self, data, parent, set_id=None):
         if set_id is None:
             merge_request = parent.gitlab.get_project_mr(
@@ -408,7 +435,7 @@ class MergeRequest(Issue):
         """Get full MR description (lazy-loaded)"""
         if self._body is None:
             mr_data = self.gitlabapi.get_project_mr(
-                self.data['project_id'], self.data['target_id'])
+                self.project_id, self.target_id)
             self._body = mr_data.get('description', '') if mr_data else ''
         return self._body
 
@@ -416,6 +443,8 @@ class MergeRequest(Issue):
 class Note(Issue):
     # pylint: disable=too-few-public-methods
 
+    __slots__ = ()
+
     def __init__(self, data, parent, set_id=None):
         if set_id is None:
             set_id = self.note_iid(data, parent.gitlab)
@@ -444,16 +473,14 @@ class Note(Issue):
     def body(self) -> str:
         """Get full issue/MR description (lazy-loaded)"""
         if self._body is None:
-            noteable_type = self.data['note']['noteable_type']
-            noteable_id = self.data['note']['noteable_id']
-            if noteable_type == 'Issue':
+            if self.noteable_id is None:
+                item_data = None
+            elif self.endpoint == 'issues':
                 item_data = self.gitlabapi.get_project_issue(
-                    self.data['project_id'], noteable_id)
-            elif noteable_type == 'MergeRequest':
-                item_data = self.gitlabapi.get_project_mr(
-                    self.data['project_id'], noteable_id)
+                    self.project_id, self.noteable_id)
             else:
-                item_data = None
+                item_data = self.gitlabapi.get_project_mr(
+                    self.project_id, self.noteable_id)
             self._body = item_data.get('description', '') if item_data else ''
         return self._body
 
@@ -461,6 +488,8 @@ class Note(Issue):
 class MergedRequest(Issue):
     # pylint: disable=too-few-public-methods
 
+    __slots__ = ()
+
     def __init__(self, data, parent):
         # Transform MR data from global API to match event structure
         # that parent Issue class expects. MR objects have 'title'
@@ -470,6 +499,10 @@ class MergedRequest(Issue):
         transformed_data['target_title'] = data['title']
         transformed_data['target_type'] = 'MergeRequest'
         super().__init__(transformed_data, parent, data['iid'])
+        self.date = data.get('merged_at')
+        # Merge request objects already contain the description
+        if getattr(parent.options, 'full_message', False):
+            self._body = data.get('description') or ''
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Stats
@@ -479,6 +512,8 @@ class MergedRequest(Issue):
 class IssuesCreated(Stats):
     """ Issue created """
 
+    date_field = "date"
+
     def fetch(self):
         log.info("Searching for Issues created by %s", self.user)
         results = self.parent.gitlab.search(
@@ -493,6 +528,8 @@ class IssuesCreated(Stats):
 class IssuesCommented(Stats):
     """ Issue commented """
 
+    date_field = "date"
+
     def fetch(self):
         log.info("Searching for Issues commented by %s", self.user)
         results = self.parent.gitlab.search(
@@ -508,6 +545,8 @@ class IssuesCommented(Stats):
 class IssuesClosed(Stats):
     """ Issue closed """
 
+    date_field = "date"
+
     def fetch(self):
         log.info("Searching for Issues closed by %s", self.user)
         results = self.parent.gitlab.search(
@@ -522,6 +561,8 @@ class IssuesClosed(Stats):
 class MergeRequestsCreated(Stats):
     """ Merge requests created """
 
+    date_field = "date"
+
     def fetch(self):
         log.info("Searching for Merge requests created by %s", self.user)
         results = self.parent.gitlab.search(
@@ -536,6 +577,8 @@ class MergeRequestsCreated(Stats):
 class MergeRequestsCommented(Stats):
     """ MergeRequests commented """
 
+    date_field = "date"
+
     def fetch(self):
         log.info("Searching for MergeRequests commented by %s", self.user)
         results = self.parent.gitlab.search(
@@ -551,6 +594,8 @@ class MergeRequestsCommented(Stats):
 class MergeRequestsClosed(Stats):
     """ Merge requests closed """
 
+    date_field = "date"
+
     def fetch(self):
         log.info("Searching for Merge requests closed by %s", self.user)
         results = self.parent.gitlab.search(
@@ -565,6 +610,8 @@ class MergeRequestsClosed(Stats):
 class MergeRequestsApproved(Stats):
     """ Merge requests approved """
 
+    date_field = "date"
+
     def fetch(self):
         log.info("Searching for Merge requests approved by %s", self.user)
         results = self.parent.gitlab.search(
@@ -579,6 +626,8 @@ class MergeRequestsApproved(Stats):
 class MergeRequestsMerged(Stats):
     """ Merge requests merged """
 
+    date_field = "date"
+
     def fetch(self):
         log.info("Searching for Merged requests authored by %s", self.user)
         results = self.parent.gitlab.get_user_mr(
@@ -25,9 +25,7 @@ from base64 import b32encode
 from hashlib import sha1
 from typing import Iterable, Optional
 
-import requests
-
-from did.base import Config, Date, ReportError, User
+from did.base import Config, Date, ReportError, User, session
 from did.stats import Stats, StatsGroup
 from did.utils import item, log
 
@@ -169,7 +167,7 @@ class Hyperkitty():
         msg_hash = initial_msg.id_hash()
         url = self.__get_url(f"export/thread.mbox.gz?thread={msg_hash}")
         log.debug("Fetching message %s thread (%s)", msg_id, url)
-        resp = requests.get(url, timeout=self.timeout)
+        resp = session(self.url).get(url, timeout=self.timeout)
         resp.raise_for_status()
         mbox = self.__get_mbox_from_content(resp.content)
         for msg in self.__get_msgs_from_mbox(mbox):
@@ -224,7 +222,7 @@ class Hyperkitty():
             f"export/latest.mbox.gz?start={since_str}&end={until_str}"
             )
         log.debug("Downloading mbox at %s", mbox_url)
-        resp = requests.get(
+        resp = session(self.url).get(
             mbox_url,
             timeout=self.timeout
             )
@@ -49,6 +49,9 @@ class ItemStats(Stats):
     def fetch(self) -> None:
         self.stats = self._items
 
+    async def afetch(self) -> None:
+        self.fetch()
+
 
 class CustomStats(StatsGroup):
     """ Custom stats """
@@ -145,9 +145,9 @@ import urllib3.exceptions
 from requests_gssapi import DISABLED  # type: ignore[import-untyped]
 from requests_gssapi import HTTPSPNEGOAuth
 
-from did.base import Config, ReportError, User, get_token
+from did.base import Config, Logins, ReportError, User, get_token, session
 from did.stats import Stats, StatsGroup
-from did.utils import listed, log, pretty, strtobool
+from did.utils import Lazy, listed, log, pretty, strtobool
 
 # Maximum number of results fetched at once
 MAX_RESULTS = 200
@@ -155,6 +155,12 @@ MAX_RESULTS = 200
 # Maximum number of batches
 MAX_BATCHES = 500
 
+# Maximum number of users searched by a single team query
+TEAM_SIZE = 10
+
+# User fields of the issue used for attributing team query results
+PEOPLE = ("creator", "assignee")
+
 # Supported authentication types
 AUTH_TYPES = ["gss", "basic", "token"]
 
@@ -176,6 +182,10 @@ DEFAULT_TRANSITION_TO = "Release Pending"
 class Issue():
     """ Jira issue investigator """
 
+    __slots__ = (
+        "parent", "options", "key", "summary", "comments", "worklogs",
+        "identifier", "prefix", "created", "resolved", "people")
+
     def __init__(self,
                  issue: dict[str, Any],
                  parent: "JiraStatsGroup"):
@@ -184,18 +194,24 @@ class Issue():
             return
         self.parent = parent
         self.options: Namespace = cast(Namespace, parent.options)
-        self.issue = issue
         self.key: str = issue["key"]
         self.summary = issue["fields"]["summary"]
-        self.comments = issue["fields"]["comment"]["comments"]
+        # Creation and resolution time, used for splitting the report
+        self.created = issue["fields"].get("created")
+        self.resolved = issue["fields"].get("resolutiondate")
+        # Keep only comment authors and dates, the text is not shown
+        self.comments: list[tuple[Optional[str], str]] = [
+            (comment.get("author", {}).get("emailAddress"), comment["created"])
+            for comment in issue["fields"]["comment"]["comments"]]
+        # Server identifies users by name, Cloud by email address
+        key = "emailAddress" if parent.is_jira_cloud else "name"
+        self.people: dict[str, Optional[str]] = {
+            field: (issue["fields"].get(field) or {}).get(key)
+            for field in PEOPLE}
         self.worklogs = []
         if "worklog" in issue["fields"]:
             worklog_data = issue["fields"].get("worklog", {})
             self.worklogs = worklog_data.get("worklogs", [])
-        if "changelog" in issue:
-            self.histories = issue["changelog"]["histories"]
-        else:
-            self.histories = {}
         matched = re.match(r"(\w+)-(\d+)", self.key)
         if matched is None:
             raise RuntimeError("invalid key format detected")
@@ -226,7 +242,7 @@ class Issue():
                 worklogs += "\n".join(
                     [f"        {line}" for line in comment.splitlines()])
         if self.options.format == "markdown":
-            href = f"{self.parent.url}/browse/{self.issue['key']}"
+            href = f"{self.parent.url}/browse/{self.key}"
             res = f"[{label}]({href}) - {self.summary}"
         else:
             res = f"{label} - {self.summary}"
@@ -241,21 +257,29 @@ class Issue():
             return NotImplemented
         return self.key == other.key
 
+    @property
+    def identity(self) -> str:
+        """ Issue key used for merging stats of multiple users """
+        return self.key
+
     @staticmethod
     def search(query: str,
                stats: "JiraStats",
                expand: str = "",
                timeout: float = TIMEOUT,
-               with_worklog: bool = False) -> list["Issue"]:
+               with_worklog: bool = False,
+               with_people: bool = False) -> list["Issue"]:
         """ Perform issue search for given stats instance """
         # pylint: disable=too-many-branches,too-many-locals
         # pylint: disable=too-many-statements
         log.debug("Search query: %s", query)
         issues = []
         # Fetch data from the server in batches of MAX_RESULTS issues
-        fields = "summary,comment"
+        fields = "summary,comment,created,resolutiondate"
         if with_worklog:
             fields += ",worklog"
+        if with_people:
+            fields += "," + ",".join(PEOPLE)
         # Use new /search/jql endpoint for Jira Cloud
         # (required as of May 2025)
         # https://developer.atlassian.com/changelog/#CHANGE-2046
@@ -303,12 +327,8 @@ class Issue():
                     # Handle the exceeded rate limit
                     if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
                         if response.headers.get("X-RateLimit-Remaining") == "0":
-                            # Wait at least a second.
-                            retry_after = max(int(response.headers["retry-after"]), 1)
+                            # Wait in the rate limiter until reset
                             log.debug("Jira rate limit exceeded.")
-                            log.debug("Sleeping now for %s.",
-                                      listed(retry_after, 'second'))
-                            time.sleep(retry_after)
                             continue
                     if response.status_code == HTTPStatus.UNAUTHORIZED:
                         stats.parent.renew_session()
@@ -362,7 +382,7 @@ class Issue():
                 batch,
                 listed(data["issues"], "issue")
                 )
-            log.data(pretty(data))
+            log.data("%s", Lazy(pretty, data))
             issues.extend(data["issues"])
 
             # Check if we're done fetching
@@ -392,14 +412,11 @@ class Issue():
 
     def commented(self, user: User, options: Namespace) -> bool:
         """ True if the issue was commented by given user """
-        for comment in self.comments:
-            created = dateutil.parser.parse(comment["created"]).date()
-            if (
-                    "author" in comment and
-                    "emailAddress" in comment["author"] and
-                    comment["author"]["emailAddress"] == user.email and
-                    options.since.date <= created < options.until.date
-                    ):
+        for email, created in self.comments:
+            if email != user.email:
+                continue
+            if options.since.date <= dateutil.parser.parse(created).date() \
+                    < options.until.date:
                 return True
         return False
 
@@ -460,6 +477,35 @@ class JiraStats(Stats):
             return self.user.email
         return self.user.login or self.user.email
 
+    def search_team(
+            self,
+            team: list["JiraStats"],
+            field: str,
+            condition: str) -> None:
+        """
+        Search issues of the whole team and attribute them by ``field``
+
+        Issues which cannot be matched to any of the team members (e.g.
+        when Jira Cloud hides the email address) make the team query
+        fail so that members are searched one by one instead.
+        """
+        members = {
+            member._get_user_identifier().lower(): member for member in team}
+        users = ", ".join(f"'{identifier}'" for identifier in members)
+        query = f"{field} in ({users}) AND {condition}"
+        if self.parent.project:
+            query = query + f" AND project in ({self.parent.project})"
+        issues = Issue.search(
+            query, stats=self, timeout=self.parent.timeout, with_people=True)
+        for member in team:
+            member.stats = []
+        for issue in issues:
+            owner = members.get((issue.people.get(field) or "").lower())
+            if owner is None:
+                raise ReportError(
+                    f"Unable to find the {field} of {issue.key} in the team.")
+            owner.stats.append(issue)
+
     def fetch(self) -> None:
         raise NotImplementedError()
 
@@ -467,6 +513,9 @@ class JiraStats(Stats):
 class JiraCreated(JiraStats):
     """ Created issues """
 
+    date_field = "created"
+    team_size = TEAM_SIZE
+
     def fetch(self) -> None:
         self.parent: JiraStatsGroup
         log.info(
@@ -485,6 +534,15 @@ class JiraCreated(JiraStats):
         self.stats = Issue.search(query, stats=self, timeout=self.parent.timeout)
         log.info("[%s] done issues created", self.option)
 
+    def fetch_team(self, team: list["JiraStats"]) -> None:
+        log.info(
+            "[%s] Searching for issues created by %s", self.option,
+            listed([str(member.user) for member in team]))
+        self.search_team(
+            team, "creator",
+            f"created >= {self.options.since} "
+            f"AND created < {self.options.until}")
+
 
 class JiraCommented(JiraStats):
     """ Commented issues """
@@ -556,6 +614,9 @@ class JiraUpdated(JiraStats):
 class JiraResolved(JiraStats):
     """ Resolved issues """
 
+    date_field = "resolved"
+    team_size = TEAM_SIZE
+
     def fetch(self) -> None:
         self.parent: JiraStatsGroup
         log.info(
@@ -574,10 +635,21 @@ class JiraResolved(JiraStats):
         self.stats = Issue.search(query, stats=self, timeout=self.parent.timeout)
         log.info("[%s] done issues resolved", self.option)
 
+    def fetch_team(self, team: list["JiraStats"]) -> None:
+        log.info(
+            "[%s] Searching for issues resolved by %s", self.option,
+            listed([str(member.user) for member in team]))
+        self.search_team(
+            team, "assignee",
+            f"resolved >= {self.options.since} "
+            f"AND resolved < {self.options.until}")
+
 
 class JiraTested(JiraStats):
     """ Tested issues """
 
+    date_field = "resolved"
+
     def fetch(self) -> None:
         self.parent: JiraStatsGroup
         log.info(
@@ -600,6 +672,8 @@ class JiraTested(JiraStats):
 class JiraContributed(JiraStats):
     """ Contributed issues """
 
+    date_field = "resolved"
+
     def fetch(self) -> None:
         self.parent: JiraStatsGroup
         log.info(
@@ -985,8 +1059,19 @@ class JiraStatsGroup(StatsGroup):
                 ) from error
         return response
 
+    @property
+    def login_key(self) -> str:
+        """ Key of the authenticated session shared with other users """
+        return Logins.key(
+            "jira", self.url, self.auth_type, self.auth_url,
+            getattr(self, "auth_username", None),
+            getattr(self, "auth_password", None),
+            getattr(self, "token", None))
+
     def renew_session(self) -> requests.Session:
         with self._session_lock:
+            if self._session is not None:
+                Logins.forget(self.login_key, self._session)
             self._session = None
         return self.session
 
@@ -1005,8 +1090,14 @@ class JiraStatsGroup(StatsGroup):
             if self._session is not None:
                 return self._session
 
+            # Reuse the session if already logged in for another user
+            shared = Logins.get(self.login_key)
+            if shared is not None:
+                self._session = shared
+                return self._session
+
             # Do not set it to self._session until it is fully ready
-            _session = requests.Session()
+            _session = session(self.url, private=True)
             # Disable SSL warning when ssl_verify is False
             if not self.ssl_verify:
                 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -1018,13 +1109,8 @@ class JiraStatsGroup(StatsGroup):
                 else:
                     response = self._gss_api_auth_session(_session)
                 if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
-                    retry_after = 1
-                    if response.headers.get("X-RateLimit-Remaining") == "0":
-                        retry_after = max(int(response.headers["retry-after"]), 1)
-                        log.debug("Jira rate limit exceeded.")
-                        log.debug("Sleeping now for %s.",
-                                  listed(retry_after, 'second'))
-                    time.sleep(retry_after)
+                    # Requests wait in the rate limiter until reset
+                    log.debug("Jira rate limit exceeded.")
                     continue
                 try:
                     response.raise_for_status()
@@ -1065,5 +1151,6 @@ class JiraStatsGroup(StatsGroup):
                         time.sleep(1)
                         continue
                     break
+            Logins.put(self.login_key, _session)
             self._session = _session
             return self._session
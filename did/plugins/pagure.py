@@ -26,9 +26,9 @@ from typing import Any, Optional
 
 import requests
 
-from did.base import Config, ReportError, get_token
+from did.base import Config, ReportError, get_token, session
 from did.stats import Stats, StatsGroup
-from did.utils import listed, log, pretty
+from did.utils import Lazy, listed, log, pretty
 
 # Default number of seconds waiting on Pagure before giving up
 TIMEOUT = 60
@@ -97,8 +97,9 @@ class Pagure():
             query = f"{query}?grouped=true"
         log.debug("Pagure get_activities query: %s", query)
         try:
-            response = requests.get(query, headers=self.headers, timeout=self.timeout)
-            log.data(f"Response headers:\n{response.headers}")
+            response = session(self.url).get(
+                query, headers=self.headers, timeout=self.timeout)
+            log.data("Response headers:\n%s", response.headers)
         except (requests.Timeout, requests.RequestException) as error:
             log.error(error)
             raise ReportError(
@@ -118,9 +119,10 @@ class Pagure():
         while url:
             log.debug("Pagure query: %s", url)
             try:
-                response = requests.get(url, headers=self.headers, timeout=self.timeout)
+                response = session(self.url).get(
+                    url, headers=self.headers, timeout=self.timeout)
                 response.raise_for_status()
-                log.data(f"Response headers:\n{response.headers}")
+                log.data("Response headers:\n%s", response.headers)
             except (requests.Timeout, requests.RequestException) as error:
                 log.error(error)
                 raise ReportError(
@@ -136,7 +138,7 @@ class Pagure():
 
             objects = data[result_field]
             log.debug("Result: %s fetched", listed(len(objects), "item"))
-            log.data(pretty(data))
+            log.data("%s", Lazy(pretty, data))
             if not objects:
                 break
             result.extend(objects)
@@ -152,10 +154,14 @@ class Issue():
     """ Pagure Issue or Pull Request """
     # pylint: disable=too-few-public-methods
 
+    __slots__ = (
+        "options", "title", "url", "project", "identifier", "created",
+        "closed", "closed_by")
+
     def __init__(self, data: dict[str, Any], options):
         self.options = options
-        self.data: dict[str, Any] = data
         self.title: str = data['title']
+        self.url: str = data['full_url']
         self.project: str = data['project']['fullname']
         self.identifier: str = data['id']
         self.created: datetime.date = datetime.datetime.fromtimestamp(
@@ -170,13 +176,13 @@ class Issue():
         except TypeError:
             self.closed_by = None
 
-        log.details(f'[{self.created}] {self}')
+        log.details("[%s] %s", self.created, self)
 
     def __str__(self):
         """ String representation """
         label = f"{self.project}#{self.identifier}"
         if self.options.format == "markdown":
-            return f'[{label}]({self.data["full_url"]}) - {self.title}'
+            return f'[{label}]({self.url}) - {self.title}'
         # plain text
         return f'{label} - {self.title}'
 
@@ -208,6 +214,8 @@ class Comment():
 class IssuesCreated(Stats):
     """ Issues created """
 
+    date_field = "created"
+
     def fetch(self):
         log.info('Searching for issues created by %s', self.user)
         issues = [Issue(issue, self.options) for issue in self.parent.pagure.search(
@@ -222,6 +230,8 @@ class IssuesCreated(Stats):
 class IssuesClosed(Stats):
     """ Issues closed """
 
+    date_field = "closed"
+
     def fetch(self):
         log.info('Searching for issues closed by %s', self.user)
         issues = [Issue(issue, self.options) for issue in self.parent.pagure.search(
@@ -241,6 +251,8 @@ class IssuesClosed(Stats):
 class PullRequestsCreated(Stats):
     """ Pull requests created """
 
+    date_field = "created"
+
     def fetch(self):
         log.info('Searching for pull requests created by %s', self.user)
         issues = [Issue(issue, self.options) for issue in self.parent.pagure.search(
@@ -284,6 +296,8 @@ class PullRequestsClosed(Stats):
     https://pagure.io/pagure/issue/4329.
     """
 
+    date_field = "closed"
+
     def fetch(self):
         log.info('Searching for pull requests closed by %s', self.user)
         issues = [Issue(issue, self.options) for issue in self.parent.pagure.search(
@@ -40,9 +40,9 @@ from urllib.parse import urlencode
 
 import requests
 
-from did.base import Config, ConfigError, ReportError, get_token
+from did.base import Config, ConfigError, ReportError, get_token, session
 from did.stats import Stats, StatsGroup
-from did.utils import listed, log, pretty
+from did.utils import Lazy, listed, log, pretty
 
 # Default number of seconds waiting on Phabricator before giving up
 TIMEOUT = 60
@@ -125,7 +125,7 @@ class Phabricator:
             #             or before a particular time.
             data_dict['constraints[createdEnd]'] = until.strftime("%s")
         result = set(Differential(diff) for diff in self._get_all_pages(url, data_dict))
-        log.data(pretty(result))
+        log.data("%s", Lazy(pretty, result))
         return result
 
     def search_transactions(
@@ -142,8 +142,8 @@ class Phabricator:
         if author_phids is not None:
             for idx, phid in enumerate(set(author_phids)):
                 data_dict[f'constraints[authorPHIDs][{idx}]'] = phid
-        log.data(pretty(url))
-        log.data(pretty(data_dict))
+        log.data("%s", Lazy(pretty, url))
+        log.data("%s", Lazy(pretty, data_dict))
         events = self._get_all_pages(url, data_dict)
         return set(TransactionEvent(event) for event in events)
 
@@ -184,7 +184,7 @@ class Phabricator:
         if "api.token" not in data_dict:
             data_dict['api.token'] = self.token
         try:
-            response = requests.post(url, data=data_dict, timeout=self.timeout)
+            response = session(self.url).post(url, data=data_dict, timeout=self.timeout)
             log.debug("Response headers: %s", response.headers)
             log.debug("MANUAL REQ: curl -sL -X POST %s -d '%s' | jq .",
                       url, urlencode(data_dict))
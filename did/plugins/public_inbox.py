@@ -28,7 +28,7 @@ from tenacity import (RetryCallState, RetryError, Retrying,
                       retry_if_exception_type, stop_after_attempt,
                       wait_exponential)
 
-from did.base import Config, Date, ReportError, User
+from did.base import Config, Date, ReportError, User, session
 from did.stats import Stats, StatsGroup
 from did.utils import item, log
 
@@ -160,7 +160,7 @@ class PublicInbox():
                     before_sleep=inbox_before_sleep,
                     reraise=True):
                 with attempt:
-                    response = requests.get(
+                    response = session(self.url, retry=False).get(
                         url,
                         headers={'User-Agent': USER_AGENT},
                         timeout=self.timeout)
@@ -212,7 +212,7 @@ class PublicInbox():
 
         log.info("Fetching all mails on server %s from %s between %s and %s",
                  self.url, self.user, since_str, until_str)
-        resp = requests.post(
+        resp = session(self.url, retry=False).post(
             self.__get_url("/all/"),
             headers={"Content-Length": "0", "User-Agent": USER_AGENT},
             params={
@@ -17,7 +17,7 @@ import gssapi
 
 from did.base import Config, ReportError
 from did.stats import Stats, StatsGroup
-from did.utils import log, pretty
+from did.utils import Lazy, log, pretty
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  RequestTracker
@@ -56,7 +56,7 @@ class RequestTracker():
                 f"Failed to fetch tickets: {response.status}")
         lines = response.read().decode("utf8").strip().split("\n")[1:]
         log.debug("Tickets fetched:")
-        log.debug(pretty(lines))
+        log.debug("%s", Lazy(pretty, lines))
         return lines
 
     def search(self, query):
@@ -25,9 +25,9 @@ import re
 import dateutil
 import requests
 
-from did.base import Config, ConfigError, ReportError, get_token
+from did.base import Config, ConfigError, ReportError, get_token, session
 from did.stats import Stats, StatsGroup
-from did.utils import listed, log, pretty
+from did.utils import Lazy, listed, log, pretty
 
 NEXT_PAGE = re.compile('<([^>]+)>; rel="next"; results="true"')
 
@@ -108,14 +108,15 @@ class Sentry():
             # Fetch one page of activities
             try:
                 log.debug('Fetching activity data: %s', url)
-                response = requests.get(url, headers=self.headers, timeout=self.timeout)
+                response = session(self.url).get(
+                    url, headers=self.headers, timeout=self.timeout)
                 if not response.ok:
                     log.error(response.text)
                     raise ReportError('Failed to fetch Sentry activities.')
                 data = response.json()
-                log.data(f"Response headers:\n{pretty(response.headers)}")
+                log.data("Response headers:\n%s", Lazy(pretty, response.headers))
                 log.debug("Fetched %s.", listed(len(data), 'activity'))
-                log.data(pretty(data))
+                log.data("%s", Lazy(pretty, data))
                 for activity in [Activity(item) for item in data]:
                     # We've reached the last page, older records not
                     # relevant
@@ -123,7 +124,7 @@ class Sentry():
                         return activities
                     # Store only relevant activities (before until date)
                     if activity.created < self.stats.options.until.date:
-                        log.details(f"Activity: {activity}")
+                        log.details("Activity: %s", activity)
                         activities.append(activity)
             except requests.RequestException as error:
                 log.debug(error)
@@ -141,6 +142,9 @@ class Sentry():
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 
+# Issues have no date_field, each of them stands for all activities
+# of the kind done within the period, possibly on different days
+
 class ResolvedIssues(Stats):
     """ Issues resolved """
 
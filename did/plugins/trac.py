@@ -11,11 +11,12 @@ Config example::
 
 import http.client
 import re
+import threading
 import xmlrpc.client
 
-from did.base import Config, ReportError
+from did.base import Config, ReportError, XMLRPCTransport
 from did.stats import Stats, StatsGroup
-from did.utils import log, pretty
+from did.utils import Lazy, log, pretty
 
 INTERESTING_RESOLUTIONS = ["canceled"]
 MAX_TICKETS = 1000000
@@ -90,9 +91,9 @@ class Trac():
         # Print debugging info
         for ticket, changelog in zip(tickets, changelogs):
             log.debug("Fetched ticket #%s", ticket[0])
-            log.debug(pretty(ticket))
+            log.debug("%s", Lazy(pretty, ticket))
             log.debug("Changelog:")
-            log.debug(pretty(changelog))
+            log.debug("%s", Lazy(pretty, changelog))
         # Return the list of ticket objects
         return [
             Trac(ticket, changelg, parent=parent, options=options)
@@ -218,7 +219,7 @@ class TracStats(StatsGroup):
         if "url" not in config:
             raise ReportError(f"No trac url set in the [{option}] section")
         self.url = re.sub("/rpc$", "", config["url"])
-        self.proxy = xmlrpc.client.ServerProxy(f"{self.url}/rpc")
+        self._local = threading.local()
         # Make sure we have prefix set
         if "prefix" not in config:
             raise ReportError(f"No prefix set in the [{option}] section")
@@ -238,3 +239,11 @@ class TracStats(StatsGroup):
                 option=f"{option}-closed", parent=self,
                 name=f"Tickets closed in {option}"),
             ]
+
+    @property
+    def proxy(self) -> xmlrpc.client.ServerProxy:
+        """ Server proxy of the current thread """
+        if not hasattr(self._local, "proxy"):
+            self._local.proxy = xmlrpc.client.ServerProxy(
+                f"{self.url}/rpc", transport=XMLRPCTransport(self.url))
+        return self._local.proxy
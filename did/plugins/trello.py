@@ -46,7 +46,7 @@ import urllib.request
 
 from did.base import Config, ReportError, get_token
 from did.stats import Stats, StatsGroup
-from did.utils import listed, log, pretty, split
+from did.utils import Lazy, listed, log, pretty, split
 
 DEFAULT_FILTERS = [
     "commentCard", "createCard", "updateCard",
@@ -107,7 +107,7 @@ class TrelloAPI():
             f"{self.stats.url}/members/{self.username}/actions?{actions}")
 
         actions = json.loads(resp.read())
-        log.data(pretty(actions))
+        log.data("%s", Lazy(pretty, actions))
         # print[act for act in actions if "shortLink" not in
         # act['data']['board'].keys()]
         actions = [act for act in actions if act['data']
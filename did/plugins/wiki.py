@@ -18,7 +18,7 @@ xmlrpc api endpoint::
 
 import xmlrpc.client
 
-from did.base import Config, ConfigError, ReportError
+from did.base import SECTION_OPTIONS, Config, ConfigError, ReportError
 from did.stats import Stats, StatsGroup
 from did.utils import item
 
@@ -88,7 +88,7 @@ class WikiStats(StatsGroup):
             api = Config().item(option, 'api')
         except ConfigError:
             api = None
-        for wiki, url in Config().section(option, skip=['type', 'api']):
+        for wiki, url in Config().section(option, skip=(*SECTION_OPTIONS, 'api')):
             self.stats.append(WikiChanges(
                 option=wiki, parent=self, url=url, api=api,
                 name=f"Updates on {wiki}"))
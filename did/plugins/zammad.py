@@ -19,9 +19,9 @@ import urllib.parse
 import urllib.request
 from datetime import datetime
 
-from did.base import Config, ReportError, get_token
+from did.base import Config, ReportError, get_token, urlopen
 from did.stats import Stats, StatsGroup
-from did.utils import listed, log, pretty
+from did.utils import Lazy, listed, log, pretty
 
 # Identifier padding
 PADDING = 3
@@ -51,7 +51,7 @@ class Zammad():
         log.debug("Zammad query: %s", url)
         try:
             request = urllib.request.Request(url, headers=self.headers)
-            with urllib.request.urlopen(request) as response:
+            with urlopen(request) as response:
                 log.debug("Response headers:\n%s", str(response.info()).strip())
                 return json.loads(response.read())
         except urllib.error.URLError as error:
@@ -66,13 +66,13 @@ class Zammad():
         except KeyError:
             result = {}
         log.debug("Result: %s fetched", listed(len(result), "item"))
-        log.data(pretty(result))
+        log.data("%s", Lazy(pretty, result))
         return result
 
     def get_articles(self, ticket_id):
         result = self.perform_search("/ticket_articles/by_ticket/" + str(ticket_id))
         log.debug("Result: %s fetched", listed(len(result), "item"))
-        log.data(pretty(result))
+        log.data("%s", Lazy(pretty, result))
         return result
 
 
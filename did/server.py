@@ -0,0 +1,341 @@
+"""
+Report server keeping the config, sessions and caches warm
+
+Start a long-running process using ``did serve`` and request reports
+over http instead of running ``did`` again and again. The config is
+parsed, plugins imported, pooled connections opened and logins done
+only once, responses stay in the persistent cache. Reports accept the
+command line arguments selecting the period, users, stats and output
+format, either in the ``args`` query parameter or posted as a json
+list::
+
+    did serve --port 8000
+    curl 'localhost:8000/report?args=last+week+--email+some@email.org'
+    curl -H 'Content-Type: application/json' \
+        -d '["last", "month", "--format", "json"]' localhost:8000/report
+
+Options reading or writing files or changing the config (such as
+``--config``, ``--record`` or ``--profile-trace``) are rejected.
+Cross-site requests from browsers are rejected as well and, unless
+the ``--token`` is given, only requests addressed to the local host
+are served. Clients of a server with a token have to send it in the
+``Authorization: Bearer TOKEN`` header.
+
+Use ``--socket PATH`` to listen on a unix socket instead. Reports
+are generated one after another, stats within each report are
+checked concurrently as usual. Use ``/health`` to check that the
+server is up.
+"""
+
+import argparse
+import contextlib
+import datetime
+import hmac
+import http.server
+import io
+import json
+import os
+import shlex
+import socketserver
+import sys
+import threading
+import urllib.parse
+from typing import Any, Optional, Union
+
+import did.base
+import did.cli
+from did import utils
+from did.stats import PluginTopology
+from did.utils import log
+
+USAGE = """
+did serve [--host HOST] [--port PORT] [--socket PATH] [--token TOKEN]
+
+Generate reports over http, keep the config, sessions and caches warm.
+""".strip()
+
+# Default address of the server
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+# Host names served without a token
+LOCAL_HOSTS = frozenset({"localhost", "127.0.0.1", "::1"})
+
+# Options affecting the report only, the stats switches are allowed too
+REPORT_OPTIONS = frozenset({
+    "--email", "--since", "--until", "--split",
+    "--format", "--width", "--brief", "--verbose", "--full-message",
+    "--total", "--merge", "--engine", "--deadline",
+    "--no-cache", "--refresh", "--incremental",
+    "--help", "-h",
+    })
+
+# Content types of the individual output formats
+CONTENT_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "markdown": "text/markdown",
+    }
+
+# Reports share the global state (period, cache, profile), one at a time
+_lock = threading.Lock()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Report
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def content_type(arguments: list[str]) -> str:
+    """ Content type of the report for given arguments """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--format", default="text")
+    try:
+        options, _ = parser.parse_known_args(arguments)
+    except SystemExit:
+        options = argparse.Namespace(format="text")
+    return f"{CONTENT_TYPES.get(options.format, 'text/plain')}; charset=utf-8"
+
+
+def check(arguments: list[str]) -> None:
+    """ Make sure that only report options are given """
+    sample = PluginTopology.get().sample
+    allowed = REPORT_OPTIONS.union(
+        f"--{stats.option}"
+        for group in sample.stats
+        for stats in [group, *group.stats])
+    for argument in arguments:
+        option = argument.split("=", 1)[0]
+        if option.startswith("-") and option not in allowed:
+            raise did.base.OptionError(
+                f"Option '{option}' is not allowed in the server mode")
+
+
+def report(arguments: list[str]) -> tuple[int, str, str]:
+    """
+    Generate the report for given command line arguments
+
+    Returns the http status, content type and the report output (or
+    the error message). Invalid arguments are reported with status
+    400, unexpected errors of the plugins with status 500.
+    """
+    output = io.StringIO()
+    errors = io.StringIO()
+    with _lock:
+        # Keep up with the date when running for several days
+        did.base.TODAY = datetime.date.today()
+        try:
+            check(arguments)
+            with contextlib.redirect_stdout(output), \
+                    contextlib.redirect_stderr(errors):
+                did.cli.main(arguments)
+        except (did.base.GeneralError, RuntimeError) as error:
+            # Invalid options, config problems, wrong date range
+            log.error(error)
+            return 400, "text/plain; charset=utf-8", f"{error}\n"
+        except SystemExit as error:
+            # Help message or invalid options reported by argparse
+            status = 200 if not error.code else 400
+            return (
+                status, "text/plain; charset=utf-8",
+                output.getvalue() + errors.getvalue())
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            log.exception("Unable to generate the report")
+            return 500, "text/plain; charset=utf-8", f"{error}\n"
+        finally:
+            # Profiling summary and other messages stay on the console
+            if errors.getvalue():
+                sys.stderr.write(errors.getvalue())
+    return 200, content_type(arguments), output.getvalue()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Server
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """ Serve reports and the health check """
+
+    server_version = "did"
+
+    # Token expected in the authorization header
+    token: Optional[str] = None
+    # Host names allowed without a token, None to allow any
+    hosts: Optional[frozenset[str]] = None
+
+    def forbidden(self) -> Optional[str]:
+        """ Reason for rejecting the request, None if it is allowed """
+        # Browsers tell about cross-site requests
+        if self.headers.get("Sec-Fetch-Site", "none") not in (
+                "none", "same-origin"):
+            return "Cross-site requests are not allowed"
+        host = self.headers.get("Host", "")
+        origin = self.headers.get("Origin")
+        if origin is not None and urllib.parse.urlsplit(origin).netloc != host:
+            return "Cross-origin requests are not allowed"
+        if self.token is not None:
+            given = self.headers.get("Authorization", "").encode("utf-8")
+            if not hmac.compare_digest(
+                    given, f"Bearer {self.token}".encode("utf-8")):
+                return "Missing or invalid token"
+            return None
+        # Other names may point to us to bypass the same-origin policy
+        name = urllib.parse.urlsplit(f"//{host}").hostname
+        if self.hosts is not None and name not in self.hosts:
+            return f"Host '{name}' is not allowed, use a token"
+        return None
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """ Report arguments given in the ``args`` query parameter """
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == "/health":
+            self.respond(200, "text/plain; charset=utf-8", "OK\n")
+            return
+        if url.path != "/report":
+            self.respond(404, "text/plain; charset=utf-8", "Not found\n")
+            return
+        reason = self.forbidden()
+        if reason is not None:
+            self.respond(403, "text/plain; charset=utf-8", f"{reason}\n")
+            return
+        query = urllib.parse.parse_qs(url.query)
+        try:
+            arguments = [
+                argument
+                for value in query.get("args", [])
+                for argument in shlex.split(value)]
+        except ValueError as error:
+            self.respond(400, "text/plain; charset=utf-8", f"{error}\n")
+            return
+        self.respond(*report(arguments))
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """ Report arguments given as a json list """
+        if urllib.parse.urlsplit(self.path).path != "/report":
+            self.respond(404, "text/plain; charset=utf-8", "Not found\n")
+            return
+        reason = self.forbidden()
+        if reason is not None:
+            self.respond(403, "text/plain; charset=utf-8", f"{reason}\n")
+            return
+        # Simple requests from browsers cannot send json
+        if self.headers.get_content_type() != "application/json":
+            self.respond(
+                415, "text/plain; charset=utf-8",
+                "Arguments should be posted as application/json.\n")
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            arguments: Any = json.loads(self.rfile.read(length))
+        except ValueError as error:
+            self.respond(400, "text/plain; charset=utf-8", f"{error}\n")
+            return
+        if not isinstance(arguments, list) or not all(
+                isinstance(argument, str) for argument in arguments):
+            self.respond(
+                400, "text/plain; charset=utf-8",
+                "Arguments should be a list of strings.\n")
+            return
+        self.respond(*report(arguments))
+
+    def respond(self, status: int, content_type_: str, text: str) -> None:
+        """ Send the response """
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type_)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        """ Unix socket clients have no address """
+        if isinstance(self.client_address, tuple):
+            return str(self.client_address[0])
+        return "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        """ Use the did logger """
+        # pylint: disable=redefined-builtin
+        log.info("%s %s", self.address_string(), format % args)
+
+
+class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """ Threading http server listening on a unix socket """
+
+    daemon_threads = True
+
+
+class Server():
+    """ Long-running report server """
+
+    def __init__(
+            self,
+            host: str = DEFAULT_HOST,
+            port: int = DEFAULT_PORT,
+            socket: Optional[str] = None,
+            token: Optional[str] = None) -> None:
+        """ Bind the tcp port or the unix socket """
+        self.socket = socket
+        self.server: Union[http.server.ThreadingHTTPServer, UnixServer]
+        # Unix sockets are protected by the file permissions
+        hosts = None if socket is not None else LOCAL_HOSTS | {host}
+        handler = type("Handler", (Handler,), {"token": token, "hosts": hosts})
+        if socket is not None:
+            # Remove the socket left behind by a previous server
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(socket)
+            self.server = UnixServer(socket, handler)
+            self.address = socket
+        else:
+            self.server = http.server.ThreadingHTTPServer((host, port), handler)
+            self.address = f"http://{host}:{self.server.server_address[1]}"
+
+    def serve(self) -> None:
+        """ Serve reports until interrupted """
+        log.warning("Serving reports on %s", self.address)
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            log.info("Interrupted, shutting down the server")
+        finally:
+            self.close()
+
+    def shutdown(self) -> None:
+        """ Stop serving (call from another thread) """
+        self.server.shutdown()
+
+    def close(self) -> None:
+        """ Close the server, remove the unix socket """
+        self.server.server_close()
+        if self.socket is not None:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.socket)
+
+
+def main(arguments: Optional[list[str]] = None) -> None:
+    """ Parse the server options, load the config and serve reports """
+    parser = argparse.ArgumentParser(usage=USAGE)
+    parser.add_argument(
+        "--host", default=DEFAULT_HOST,
+        help="Address to listen on (default: %(default)s)")
+    parser.add_argument(
+        "--port", default=DEFAULT_PORT, type=int,
+        help="Port to listen on (default: %(default)s)")
+    parser.add_argument(
+        "--socket", metavar="PATH",
+        help="Listen on the unix socket instead of the tcp port")
+    parser.add_argument(
+        "--token", default=os.environ.get("DID_SERVER_TOKEN"),
+        help="Require the token from clients, allow any host name "
+             "(default: DID_SERVER_TOKEN environment variable)")
+    parser.add_argument(
+        "--config", metavar="FILE",
+        help="Use alternate configuration file (default: 'config')")
+    parser.add_argument(
+        "--debug", action="store_true",
+        help="Turn on debugging output")
+    options = parser.parse_args(arguments)
+    if options.debug:
+        log.setLevel(utils.LOG_DEBUG)
+    # Parse the config now to detect problems before serving
+    did.base.Config()
+    Server(options.host, options.port, options.socket, options.token).serve()
@@ -3,16 +3,146 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import configparser
+import copy
+import datetime
+import functools
+import hashlib
+import importlib
+import json
+import os
+import pkgutil
 import re
 import sys
+import tempfile
+import threading
+import time
+import urllib.parse
 import xmlrpc.client
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, Optional
+from bisect import insort
+from concurrent.futures import Future
+from concurrent.futures import wait as wait_futures
+from itertools import count
+from typing import Any, Callable, Iterator, Optional
 
 import did.base
 from did import utils
 from did.utils import log
 
+# Errors which mark stats as failed instead of stopping the report
+FETCH_ERRORS = (xmlrpc.client.Fault, did.base.ConfigError, ConnectionError)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Stats List
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# Marker for items which cannot be indexed
+UNHASHABLE = object()
+
+
+class StatsList(list):  # type: ignore[type-arg]
+    """
+    Ordered list of stats items with a hash index
+
+    Membership tests use an index of item identity keys so that
+    merging stats of many users stays linear. Item classes can
+    define an ``identity`` attribute holding a hashable key which
+    must be equal for items comparing equal. Otherwise the item
+    itself is used if it is hashable. Remaining items are compared
+    one by one as in a plain list.
+    """
+
+    def __init__(self, items: Any = ()) -> None:
+        super().__init__(items)
+        self._keys: Optional[set[Any]] = None
+        self._unindexed: list[Any] = []
+
+    @staticmethod
+    def kind(item: Any) -> str:
+        """ Class name of the item, the original one if restored """
+        if isinstance(item, SnapshotItem) and item.kind is not None:
+            return item.kind
+        return f"{type(item).__module__}.{type(item).__qualname__}"
+
+    @staticmethod
+    def key(item: Any) -> Any:
+        """ Identity key of given item, UNHASHABLE if there is none """
+        identity = getattr(item, "identity", None)
+        if identity is not None:
+            return (StatsList.kind(item), identity)
+        try:
+            hash(item)
+        except TypeError:
+            return UNHASHABLE
+        return item
+
+    def _index(self, items: Any) -> None:
+        """ Add given items to the index """
+        assert self._keys is not None
+        for item in items:
+            key = self.key(item)
+            if key is UNHASHABLE:
+                self._unindexed.append(item)
+            else:
+                self._keys.add(key)
+
+    def _invalidate(self) -> None:
+        """ Drop the index, it will be built again when needed """
+        self._keys = None
+        self._unindexed = []
+
+    def __contains__(self, item: Any) -> bool:
+        key = self.key(item)
+        if key is UNHASHABLE:
+            return super().__contains__(item)
+        if self._keys is None:
+            self._keys = set()
+            self._index(self)
+        return key in self._keys or any(
+            other == item for other in self._unindexed)
+
+    def append(self, item: Any) -> None:
+        super().append(item)
+        if self._keys is not None:
+            self._index([item])
+
+    def extend(self, items: Any) -> None:
+        items = list(items)
+        super().extend(items)
+        if self._keys is not None:
+            self._index(items)
+
+    def __iadd__(self, items: Any) -> StatsList:  # type: ignore[override]
+        self.extend(items)
+        return self
+
+    def insert(self, index: Any, item: Any) -> None:
+        super().insert(index, item)
+        if self._keys is not None:
+            self._index([item])
+
+    def remove(self, item: Any) -> None:
+        super().remove(item)
+        self._invalidate()
+
+    def pop(self, index: Any = -1) -> Any:
+        self._invalidate()
+        return super().pop(index)
+
+    def clear(self) -> None:
+        super().clear()
+        self._invalidate()
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        super().__setitem__(index, value)
+        self._invalidate()
+
+    def __delitem__(self, index: Any) -> None:
+        super().__delitem__(index)
+        self._invalidate()
+
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Stats
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -27,6 +157,15 @@ class Stats():
     dest: str
     user: Optional[did.base.User]
     parent: Optional[StatsGroup] = None
+    # Item attribute holding the date used for splitting the report
+    date_field: Optional[str] = None
+    # Items taken from stats of a longer period, nothing to fetch
+    _filled: bool = False
+    # Maximum number of users searched by a single team query
+    team_size: int = 0
+    # Not checked before the report deadline, checked (or failed)
+    timeout: bool = False
+    _finished: bool = False
 
     def __init__(
             self, /,
@@ -40,7 +179,7 @@ class Stats():
         self.dest = self.option.replace("-", "_")
         self._name = name
         self.parent = parent
-        self._stats: list[Any] = []
+        self._stats: list[Any] = StatsList()
         # Save user and options (get it directly or from parent)
         self.options = options or getattr(self.parent, 'options', None)
         if user is None and self.parent is not None:
@@ -56,7 +195,7 @@ class Stats():
 
     @stats.setter
     def stats(self, value: list[Any]) -> None:
-        self._stats = value
+        self._stats = value if isinstance(value, StatsList) else StatsList(value)
 
     @property
     def name(self) -> str:
@@ -75,7 +214,12 @@ class Stats():
         """ Check whether we're enabled (or if parent is). """
         # Cache into ._enabled
         if self._enabled is None:
-            if self.parent is not None and self.parent.enabled():
+            if (getattr(self.options, "dated_only", False)
+                    and self.date_field is None
+                    and not isinstance(self, StatsGroup)):
+                # Items which cannot be split are fetched for each part
+                self._enabled = False
+            elif self.parent is not None and self.parent.enabled():
                 self._enabled = True
             else:
                 # Default to Enabled if not otherwise disabled
@@ -86,22 +230,106 @@ class Stats():
         """ Fetch the stats (to be implemented by respective class). """
         raise NotImplementedError()
 
+    def fetch_team(self, team: list[Stats]) -> None:
+        """
+        Fetch the stats of several users at once (optional)
+
+        Plugins able to search for several users using a single query
+        set ``team_size`` to the maximum number of users per query and
+        implement this method to fill ``stats`` of all given team
+        members (the first one being self) from the results.
+        """
+        raise NotImplementedError()
+
+    def check_team(self, team: list[Stats]) -> None:
+        """
+        Fetch the stats of all team members using a single query
+
+        Members are marked as filled so that they are not fetched
+        again. If the team query fails they are left to be checked
+        one by one as usual.
+        """
+        section = self.parent.option if self.parent is not None else self.option
+        try:
+            with utils.Profiler.span(self.option, section):
+                self.fetch_team(team)
+        except (did.base.ReportError, *FETCH_ERRORS) as error:
+            log.debug("Team query for %s failed: %s", self.option, error)
+            for member in team:
+                member.stats = []
+            return
+        for member in team:
+            member._filled = True
+
     def check(self) -> None:
         """ Check the stats if enabled. """
-        if not self.enabled():
+        if not self.enabled() or self._filled:
             return
         try:
-            self.fetch()
-        except (
-                xmlrpc.client.Fault,
-                did.base.ConfigError,
-                ConnectionError
-                ) as error:
-            log.error(error)
-            self.error = True
-            # Raise the exception if debugging
-            if not self.options or self.options.debug:
+            self._fetch()
+        except FETCH_ERRORS as error:
+            if self._failed(error):
+                raise
+        finally:
+            self._finished = True
+
+    async def acheck(self) -> None:
+        """ Check the stats if enabled, asynchronous version. """
+        if not self.enabled() or self._filled:
+            return
+        finished = True
+        try:
+            await self.afetch()
+        except asyncio.CancelledError:
+            # Abandoned at the deadline, to be marked as timed out
+            finished = False
+            raise
+        except FETCH_ERRORS as error:
+            if self._failed(error):
                 raise
+        finally:
+            self._finished = finished
+
+    async def afetch(self) -> None:
+        """
+        Fetch the stats on the asyncio event loop
+
+        Plugins able to fetch the data without blocking override this
+        method. Otherwise the synchronous ``fetch()`` is executed by
+        the shared scheduler so that the concurrency limits, profiling
+        and snapshots apply the same way as for the threads engine.
+        """
+        parent = self.parent
+        if parent is None:
+            future = Scheduler().submit(self._fetch)
+        else:
+            future = Scheduler().submit(
+                self._fetch, priority=parent.priority,
+                plugin=parent.option, plugin_workers=parent.max_workers,
+                host=parent.host)
+        await asyncio.wrap_future(future)
+
+    def expire(self) -> None:
+        """ Mark the stats as timed out unless already checked """
+        if self.enabled() and not self._filled and not self._finished:
+            log.debug("Report deadline reached, %s not checked", self.option)
+            self.timeout = True
+
+    def _fetch(self) -> None:
+        """ Fetch the stats, measure the time spent when profiling """
+        section = self.parent.option if self.parent is not None else self.option
+        with utils.Profiler.span(self.option, section):
+            if Snapshot.supports(self):
+                Snapshot.fetch(self)
+            else:
+                self.fetch()
+
+    def _failed(self, error: Exception) -> bool:
+        """ Log the error, mark stats, True if it should be raised """
+        log.error(error)
+        self.error = True
+        # Raise the exception if debugging
+        return not self.options or self.options.debug
 
     def header(self) -> None:
         """ Show summary header. """
@@ -111,20 +339,605 @@ class Stats():
 
     def show(self) -> None:
         """ Display indented statistics. """
+        if self.timeout:
+            # Items stored later by the abandoned check are ignored
+            utils.item(f"{self.name}: ? (timeout)", options=self.options)
+            return
         if not self.error and not self.stats:
             return
         self.header()
         for stat in self.stats:
             utils.item(stat, level=1, options=self.options)
 
+    def records(self) -> Iterator[dict[str, Any]]:
+        """ Structured records of all items for the json output """
+        if not self.error and not self.timeout and not self.stats:
+            return
+        record = {
+            "user": self.user.email if self.user is not None else None,
+            "section": self.parent.option if self.parent is not None else None,
+            "stats": self.option,
+            "name": self.name,
+            }
+        if self.timeout:
+            yield {**record, "timeout": True}
+        elif self.error:
+            yield {**record, "error": True}
+        elif self.options is not None and self.options.brief:
+            yield {**record, "count": len(self.stats)}
+        else:
+            for stat in self.stats:
+                yield {**record, **utils.fields(stat)}
+
+    def within(
+            self,
+            since: did.base.Date,
+            until: did.base.Date) -> Optional[list[Any]]:
+        """
+        Items dated within given period, None if they cannot be split
+
+        The date of each item is taken from its ``date_field``
+        attribute. Stats without any items have no items in any part
+        of the period either.
+        """
+        if self.error or self.date_field is None:
+            return None
+        if not self.stats:
+            return []
+        items = []
+        for item in self.stats:
+            date = utils.to_date(getattr(item, self.date_field, None))
+            if date is None:
+                return None
+            if since.date <= date < until.date:
+                items.append(item)
+        return items
+
+    def fill(self, other: Stats) -> None:
+        """
+        Take items of the same stats checked for a longer period
+
+        Only items dated within our own period are used. Stats which
+        items cannot be split are left to be fetched as usual.
+        """
+        if self.options is None:
+            return
+        # Items standing for several changes, possibly in different
+        # parts (such as bugs with their history or sentry issues with
+        # their activities) have no date, fetch them for each part
+        if self.date_field is None:
+            log.debug("Items of %s not dated, fetching them", self.option)
+            return
+        items = other.within(self.options.since, self.options.until)
+        if items is not None:
+            self.stats = items
+            self._filled = True
+
     def merge(self, other: Stats) -> None:
-        """ Merge another stats. """
+        """ Merge another stats, skip items already present """
+        if other.timeout:
+            self.timeout = True
+            return
+        stats = self.stats
+        # Subclasses overriding the stats property need their own index
+        seen = stats if isinstance(stats, StatsList) else StatsList(stats)
         for other_stat in other.stats:
-            if other_stat not in self.stats:
-                self.stats.append(other_stat)
+            if other_stat not in seen:
+                stats.append(other_stat)
+                if seen is not stats:
+                    seen.append(other_stat)
         if other.error:
             self.error = True
 
+    def derive(
+            self,
+            parent: Optional[StatsGroup] = None,
+            options: Optional[argparse.Namespace] = None) -> Stats:
+        """
+        Copy the stats structure (without any items) for another report
+
+        Plugins are configured once for the sample stats, the copy just
+        gets new parent and options. Only stats without a user can be
+        shared this way, user stats are created by the plugins.
+        """
+        derived = copy.copy(self)
+        derived.parent = parent
+        derived.options = options or getattr(parent, "options", None)
+        derived._stats = StatsList()
+        # Forget the state of the original, class defaults apply
+        for name in ("_enabled", "error", "timeout", "_filled", "_finished"):
+            derived.__dict__.pop(name, None)
+        return derived
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Snapshot
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class SnapshotItem():
+    """
+    Report item restored from the snapshot
+
+    The ``identity`` and the ``kind`` (class name) of the original
+    item are restored as well so that merging stats of several users
+    recognizes the stored items as the same as the fetched ones.
+    """
+
+    def __init__(
+            self,
+            text: str,
+            fields: dict[str, Any],
+            date_field: str,
+            date: datetime.date,
+            identity: Any = None,
+            kind: Optional[str] = None) -> None:
+        self.text = text
+        self._fields = fields
+        self.identity = identity
+        self.kind = kind
+        setattr(self, date_field, date)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __eq__(self, other: object) -> bool:
+        if self.identity is not None:
+            return StatsList.key(self) == StatsList.key(other)
+        return str(self) == str(other)
+
+    def __hash__(self) -> int:
+        if self.identity is not None:
+            return hash(StatsList.key(self))
+        return hash(self.text)
+
+    def fields(self) -> dict[str, Any]:
+        """ Fields of the original item for the json output """
+        return self._fields
+
+
+class Snapshot():
+    """
+    Persisted items of dated stats for the incremental mode
+
+    Items of stats which provide the ``date_field`` are stored as json
+    files in the ``snapshots`` directory under ``DID_DIR`` together
+    with the watermark, the date until which the items are considered
+    complete. Snapshots are keyed by the user, section, stats, start
+    of the reported period, output options and the section config.
+
+    When the same report is generated again, stored items older than
+    the watermark are used and the stats are fetched only from the
+    watermark on, which turns into ``--since`` or ``created >=`` in
+    the plugin queries. Items changed upstream after they have been
+    stored are not updated, use ``--refresh`` to fetch everything
+    again and store new snapshots.
+    """
+
+    directory: Optional[str] = None
+    refresh: bool = False
+
+    @classmethod
+    def enable(cls, refresh: bool = False, directory: Optional[str] = None) -> None:
+        """ Enable snapshots, ignore the stored ones if refreshing """
+        cls.directory = directory or os.path.join(
+            os.environ.get("DID_DIR", did.base.CONFIG), "snapshots")
+        cls.refresh = refresh
+
+    @classmethod
+    def disable(cls) -> None:
+        """ Disable snapshots """
+        cls.directory = None
+
+    @classmethod
+    def supports(cls, stats: Stats) -> bool:
+        """ True if snapshots are enabled and usable for the stats """
+        return (
+            cls.directory is not None
+            and stats.date_field is not None
+            and stats.options is not None)
+
+    @staticmethod
+    def key(stats: Stats) -> str:
+        """ Snapshot key of given stats """
+        options = stats.options
+        section = stats.parent.option if stats.parent is not None else None
+        try:
+            config = sorted(did.base.Config().section(section)) if section else []
+        except (configparser.Error, did.base.ConfigError, RuntimeError):
+            config = []
+        return hashlib.sha256(json.dumps([
+            stats.user.email if stats.user is not None else None,
+            section, stats.option, str(options.since), options.format,
+            options.verbose, getattr(options, "full_message", False),
+            config], default=str).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def fetch(cls, stats: Stats) -> None:
+        """ Fetch the stats since the watermark, add stored items """
+        assert cls.directory is not None and stats.date_field is not None
+        key = cls.key(stats)
+        path = os.path.join(cls.directory, f"{key}.json")
+        entry = None if cls.refresh else cls.get(path, stats.date_field)
+        original = stats.options
+        until = original.until
+        stored: list[Any] = []
+        if entry is not None:
+            watermark, items = entry
+            stored = [
+                item for item in items
+                if getattr(item, stats.date_field) < min(watermark.date, until.date)]
+            if watermark.date >= until.date:
+                log.debug("Using snapshot of %s for %s", stats.option, stats.user)
+                stats.stats = stored
+                return
+            log.debug(
+                "Fetching %s for %s since the snapshot watermark %s",
+                stats.option, stats.user, watermark)
+            stats.options = copy.copy(original)
+            stats.options.since = watermark
+        try:
+            stats.fetch()
+        finally:
+            stats.options = original
+        fetched = list(stats.stats)
+        keys = {cls.identity(item) for item in fetched}
+        stored = [item for item in stored if cls.identity(item) not in keys]
+        # Stored items are older, keep the order used by the plugin
+        if cls.newest_first(stats, stored) or cls.newest_first(stats, fetched):
+            stats.stats = fetched + stored
+        else:
+            stats.stats = stored + fetched
+        # Days before yesterday are complete (whatever the time zone)
+        watermark = did.base.Date(max(original.since.date, min(
+            until.date, did.base.TODAY - datetime.timedelta(days=1))))
+        cls.put(path, stats, watermark)
+
+    @staticmethod
+    def identity(item: Any) -> Any:
+        """ Key telling whether a stored item has been fetched again """
+        if getattr(item, "identity", None) is not None:
+            return StatsList.key(item)
+        return str(item)
+
+    @staticmethod
+    def hashable(value: Any) -> Any:
+        """ Identity loaded from json, lists turned back into tuples """
+        if isinstance(value, list):
+            return tuple(Snapshot.hashable(member) for member in value)
+        return value
+
+    @staticmethod
+    def newest_first(stats: Stats, items: list[Any]) -> bool:
+        """ True if given items are listed from the newest ones """
+        assert stats.date_field is not None
+        dates = [
+            date for date in (
+                utils.to_date(getattr(item, stats.date_field, None))
+                for item in items)
+            if date is not None]
+        pairs = list(zip(dates, dates[1:]))
+        return (
+            any(first > second for first, second in pairs)
+            and all(first >= second for first, second in pairs))
+
+    @staticmethod
+    def get(
+            path: str,
+            date_field: str) -> Optional[tuple[did.base.Date, list[SnapshotItem]]]:
+        """ Stored watermark and items, None if missing or broken """
+        try:
+            with open(path, encoding="utf-8") as snapshot:
+                entry = json.load(snapshot)
+            watermark = did.base.Date(entry["watermark"])
+            items = [
+                SnapshotItem(
+                    record["text"], record["fields"], date_field,
+                    datetime.date.fromisoformat(record["date"]),
+                    identity=Snapshot.hashable(record.get("identity")),
+                    kind=record.get("kind"))
+                for record in entry["items"]]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError,
+                did.base.OptionError) as error:
+            log.debug("Ignoring broken snapshot '%s': %s", path, error)
+            return None
+        return watermark, items
+
+    @classmethod
+    def put(cls, path: str, stats: Stats, watermark: did.base.Date) -> None:
+        """ Store items of the stats, skip if any of them is undated """
+        assert cls.directory is not None and stats.date_field is not None
+        items = []
+        for item in stats.stats:
+            date = utils.to_date(getattr(item, stats.date_field, None))
+            if date is None:
+                log.debug("Not storing snapshot of %s, undated item", stats.option)
+                return
+            record = {
+                "text": str(item),
+                "date": date.isoformat(),
+                "fields": utils.fields(item)}
+            # Only identities surviving the json round trip are kept
+            identity = getattr(item, "identity", None)
+            if identity is not None and cls.hashable(
+                    json.loads(json.dumps(identity, default=repr))) == identity:
+                record["identity"] = identity
+                record["kind"] = StatsList.kind(item)
+            items.append(record)
+        try:
+            os.makedirs(cls.directory, exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(
+                dir=cls.directory, suffix=".tmp")
+            with os.fdopen(descriptor, "w", encoding="utf-8") as snapshot:
+                json.dump({"watermark": str(watermark), "items": items}, snapshot)
+            os.replace(temporary, path)
+        except OSError as error:
+            log.debug("Unable to store snapshot '%s': %s", path, error)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Deadline
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class Deadline():
+    """
+    Time limit for checking all stats of the report
+
+    Stats groups wait for their children only until the deadline.
+    Children which are not complete by then are cancelled (if still
+    waiting in the queue) and marked as timed out, the rest of the
+    report is shown as usual. Checks which are already running cannot
+    be interrupted, their results are ignored.
+    """
+
+    end: Optional[float] = None
+
+    @classmethod
+    def start(cls, seconds: Optional[float]) -> None:
+        """ Set the deadline given number of seconds from now """
+        cls.end = None if seconds is None else time.monotonic() + seconds
+
+    @classmethod
+    def clear(cls) -> None:
+        """ No time limit """
+        cls.end = None
+
+    @classmethod
+    def remaining(cls) -> Optional[float]:
+        """ Seconds left until the deadline, None if there is none """
+        if cls.end is None:
+            return None
+        return max(cls.end - time.monotonic(), 0)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Scheduler
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class Task():
+    """ Function waiting in the scheduler queue """
+
+    def __init__(
+            self,
+            function: Callable[[], Any],
+            priority: int,
+            limits: dict[str, int]) -> None:
+        self.function = function
+        self.priority = priority
+        self.limits = limits
+        self.future: Future[Any] = Future()
+
+    def run(self) -> None:
+        """ Run the function, store the result into the future """
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = self.function()
+        except BaseException as error:  # pylint: disable=broad-exception-caught
+            self.future.set_exception(error)
+        else:
+            self.future.set_result(result)
+
+
+class Scheduler():
+    """
+    Process-wide bounded pool shared by all stats
+
+    Instead of creating a new thread pool for each stats group, all
+    stats checks are submitted to a single scheduler which executes
+    them using a limited number of worker threads. Tasks with higher
+    priority are started first. Optional limits can be applied for
+    the number of tasks running against the same section (plugin)
+    or the same server (host). Defaults are taken from the general
+    section of the config file::
+
+        [general]
+        workers = 32
+        plugin_workers = 0
+        host_workers = 8
+
+    Individual sections can override the plugin limit and the
+    priority using the ``max_workers`` and ``priority`` options.
+
+    Stats groups are coordinator tasks which only submit their stats
+    and wait for them. While waiting, worker threads run the pending
+    tasks themselves, nested groups included, so that groups waiting
+    for their children cannot exhaust the pool and deadlock.
+    """
+
+    _instance: Optional["Scheduler"] = None
+    _instance_lock = threading.Lock()
+
+    # Shared state, initialized only once in __new__
+    _condition: threading.Condition
+    _queue: list[tuple[int, int, Task]]
+    _running: dict[str, int]
+    _threads: list[threading.Thread]
+    _local: threading.local
+    _counter: Iterator[int]
+    _idle: int
+
+    # Limits
+    workers: int
+    plugin_workers: int
+    host_workers: int
+
+    def __new__(cls, *args: Any, **kwargs: Any) -> "Scheduler":
+        """ Make sure we create a single instance only """
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super().__new__(cls)
+                instance._condition = threading.Condition()
+                instance._queue = []
+                instance._running = {}
+                instance._threads = []
+                instance._local = threading.local()
+                instance._counter = count()
+                instance._idle = 0
+                cls._instance = instance
+        return cls._instance
+
+    def __init__(
+            self,
+            workers: Optional[int] = None,
+            plugin_workers: Optional[int] = None,
+            host_workers: Optional[int] = None) -> None:
+        """ Set the limits, use config defaults unless provided """
+        # Nothing to do if already initialized and no change requested
+        configured = hasattr(self, "workers")
+        if configured and workers is None \
+                and plugin_workers is None and host_workers is None:
+            return
+        try:
+            config = did.base.Config()
+            defaults = (
+                config.workers, config.plugin_workers, config.host_workers)
+        except (did.base.ConfigFileError, RuntimeError):
+            defaults = (
+                did.base.DEFAULT_WORKERS,
+                did.base.DEFAULT_PLUGIN_WORKERS,
+                did.base.DEFAULT_HOST_WORKERS)
+        if configured:
+            defaults = (self.workers, self.plugin_workers, self.host_workers)
+        with self._condition:
+            self.workers = max(
+                workers if workers is not None else defaults[0], 1)
+            self.plugin_workers = (
+                plugin_workers if plugin_workers is not None else defaults[1])
+            self.host_workers = (
+                host_workers if host_workers is not None else defaults[2])
+            self._condition.notify_all()
+        log.debug(
+            "Scheduler limits: %s workers, %s per plugin, %s per host",
+            self.workers, self.plugin_workers or "no limit",
+            self.host_workers or "no limit")
+
+    def submit(
+            self,
+            function: Callable[[], Any], *,
+            priority: int = 0,
+            plugin: Optional[str] = None,
+            plugin_workers: Optional[int] = None,
+            host: Optional[str] = None,
+            leaf: bool = True) -> Future[Any]:
+        """
+        Submit function for execution, return its future
+
+        Use ``leaf=False`` for tasks which wait for other tasks (like
+        stats groups), the plugin and host limits do not apply to them.
+        The ``plugin_workers`` limit overrides the default one.
+        """
+        limits = {}
+        if plugin_workers is None:
+            plugin_workers = self.plugin_workers
+        if leaf and plugin and plugin_workers:
+            limits[f"plugin:{plugin}"] = plugin_workers
+        if leaf and host and self.host_workers:
+            limits[f"host:{host}"] = self.host_workers
+        task = Task(function, priority, limits)
+        with self._condition:
+            # Unique counter keeps the order within the same priority
+            insort(self._queue, (-priority, next(self._counter), task))
+            if self._idle == 0 and len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._worker, name=f"did-worker-{len(self._threads)}",
+                    daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._condition.notify()
+        return task.future
+
+    def wait(
+            self,
+            futures: list[Future[Any]],
+            timeout: Optional[float] = None) -> None:
+        """
+        Wait for futures, help with pending stats if a worker
+
+        Returns after ``timeout`` seconds even if some of the futures
+        are not done yet. Worker threads stop picking up pending stats
+        once the timeout is over.
+        """
+        if not getattr(self._local, "worker", False):
+            wait_futures(futures, timeout=timeout)
+            return
+        end = None if timeout is None else time.monotonic() + timeout
+        pending = list(futures)
+        while True:
+            with self._condition:
+                pending = [future for future in pending if not future.done()]
+                if not pending:
+                    return
+                left = None if end is None else end - time.monotonic()
+                if left is not None and left <= 0:
+                    return
+                task = self._next()
+                if task is None:
+                    # Any task completion notifies the condition
+                    self._condition.wait(timeout=left)
+                    continue
+            self._run(task)
+
+    def _next(self) -> Optional[Task]:
+        """ Pick the first runnable task (call with the lock held) """
+        for index, (_, _, task) in enumerate(self._queue):
+            if all(self._running.get(key, 0) < limit
+                   for key, limit in task.limits.items()):
+                del self._queue[index]
+                for key in task.limits:
+                    self._running[key] = self._running.get(key, 0) + 1
+                return task
+        return None
+
+    def _run(self, task: Task) -> None:
+        """ Run the task and release its limits """
+        try:
+            task.run()
+        finally:
+            with self._condition:
+                for key in task.limits:
+                    self._running[key] -= 1
+                self._condition.notify_all()
+
+    def _worker(self) -> None:
+        """ Worker thread loop """
+        self._local.worker = True
+        current = threading.current_thread()
+        while True:
+            with self._condition:
+                task = self._next()
+                while task is None:
+                    # Shrink the pool if the limit has been lowered
+                    if len(self._threads) > self.workers:
+                        self._threads.remove(current)
+                        return
+                    self._idle += 1
+                    self._condition.wait()
+                    self._idle -= 1
+                    task = self._next()
+            self._run(task)
+
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Stats Group
@@ -132,6 +945,10 @@ class Stats():
 
 class StatsGroupPlugin(type):
     registry: dict[str, "StatsGroupPlugin"] = {}
+    # Built-in plugin modules by type name, detected without importing
+    modules: Optional[dict[str, str]] = None
+    # Custom plugin modules by type name, provided by the manifest
+    custom: dict[str, str] = {}
     ignore = set([
         "StatsGroupPlugin",
         "StatsGroup",
@@ -152,6 +969,152 @@ class StatsGroupPlugin(type):
 
         registry[plugin_name] = cls
 
+    @staticmethod
+    def available() -> dict[str, str]:
+        """ Module paths of all built-in plugins by their type name """
+        if StatsGroupPlugin.modules is None:
+            package = importlib.import_module("did.plugins")
+            StatsGroupPlugin.modules = {
+                name: f"{package.__name__}.{name}"
+                for _, name, is_package in pkgutil.iter_modules(package.__path__)
+                if not is_package}
+        return StatsGroupPlugin.modules
+
+    @staticmethod
+    def lookup(type_: str) -> Optional[StatsGroupPlugin]:
+        """ Stats group class for the type, import plugin if needed """
+        registry = StatsGroupPlugin.registry
+        # Custom plugins take precedence over the built-in ones
+        module = StatsGroupPlugin.custom.get(type_)
+        current = registry.get(type_)
+        if module is not None and (
+                current is None or current.__module__ != module):
+            utils.import_component(module)
+        elif current is None:
+            module = StatsGroupPlugin.available().get(type_)
+            if module is not None:
+                utils.import_component(module)
+        return registry.get(type_)
+
+    @staticmethod
+    def load_custom(*paths: str) -> None:
+        """
+        Register custom plugins from given paths
+
+        Plugin directories are scanned and all modules imported only
+        when the plugin manifest is missing or outdated. Otherwise the
+        manifest is used to import only the modules providing plugin
+        types which are actually needed, see ``PluginManifest``.
+        """
+        manifest = PluginManifest()
+        for path in paths:
+            types = manifest.types(path)
+            if types is None:
+                types = manifest.scan(path)
+            if types is not None:
+                StatsGroupPlugin.custom.update(types)
+        manifest.save()
+
+
+class PluginManifest():
+    """
+    Cached list of modules found on custom plugin paths
+
+    For each configured path the manifest records the python path
+    base, modification times of the package directories and module
+    files and the plugin types registered by each of the modules. It
+    is stored as ``plugins.manifest`` in the cache directory and a
+    path is scanned again as soon as any of the recorded times change.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or os.path.join(
+            did.base.Cache.default_directory(), "plugins.manifest")
+        self.changed = False
+        try:
+            with open(self.path, encoding="utf-8") as manifest:
+                self.paths: dict[str, Any] = json.load(manifest)
+        except FileNotFoundError:
+            self.paths = {}
+        except (OSError, ValueError) as error:
+            log.debug("Ignoring broken plugin manifest: %s", error)
+            self.paths = {}
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[float]:
+        """ Modification time of the path, None if it does not exist """
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def types(self, path: str) -> Optional[dict[str, str]]:
+        """ Plugin types and their modules if the record is current """
+        entry = self.paths.get(path)
+        if entry is None:
+            return None
+        recorded = list(entry["directories"].items()) + [
+            (module["file"], module["mtime"])
+            for module in entry["modules"].values()]
+        if any(self._mtime(file) != mtime for file, mtime in recorded):
+            log.debug("Plugin manifest for '%s' is outdated.", path)
+            return None
+        if entry["base"] not in sys.path:
+            sys.path.insert(0, entry["base"])
+        return {
+            type_: name
+            for name, module in entry["modules"].items()
+            for type_ in module["types"]}
+
+    def scan(self, path: str) -> Optional[dict[str, str]]:
+        """ Import all modules on the path, record registered types """
+        found = utils.find_components(path)
+        if found is None:
+            # Not on the filesystem, nothing to record
+            utils.load_components(path, continue_on_error=True)
+            return None
+        base, files = found
+        if base not in sys.path:
+            sys.path.insert(0, base)
+        registry = StatsGroupPlugin.registry
+        modules: dict[str, Any] = {}
+        directories: dict[str, Optional[float]] = {}
+        for name, file in files.items():
+            before = dict(registry)
+            utils.import_component(name)
+            modules[name] = {
+                "file": file,
+                "mtime": self._mtime(file),
+                "types": [
+                    type_ for type_, plugin in registry.items()
+                    if before.get(type_) is not plugin
+                    or plugin.__module__ == name],
+                }
+            directory = os.path.dirname(file)
+            directories[directory] = self._mtime(directory)
+        self.paths[path] = {
+            "base": base, "directories": directories, "modules": modules}
+        self.changed = True
+        return {
+            type_: name
+            for name, module in modules.items()
+            for type_ in module["types"]}
+
+    def save(self) -> None:
+        """ Store the manifest if anything changed """
+        if not self.changed:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(
+                dir=os.path.dirname(self.path), suffix=".tmp")
+            with os.fdopen(descriptor, "w", encoding="utf-8") as manifest:
+                json.dump(self.paths, manifest)
+            os.replace(temporary, self.path)
+        except OSError as error:
+            log.debug("Unable to store the plugin manifest: %s", error)
+        self.changed = False
+
 
 class StatsGroup(Stats, metaclass=StatsGroupPlugin):
     """ Stats group """
@@ -159,6 +1122,16 @@ class StatsGroup(Stats, metaclass=StatsGroupPlugin):
     # Default order
     order = 500
 
+    # Stats with higher priority are checked first
+    priority = 0
+
+    # Limit of concurrently checked children stats (default if None)
+    max_workers: Optional[int] = None
+
+    # Futures of the submitted children stats and the submission time
+    _futures: Optional[list[Future[Any]]] = None
+    _started: Optional[float] = None
+
     def add_option(self, parser: argparse.ArgumentParser) -> None:
         """ Add option group and all children options. """
 
@@ -168,25 +1141,184 @@ class StatsGroup(Stats, metaclass=StatsGroupPlugin):
 
         group.add_argument(f"--{self.option}", action="store_true", help="All above")
 
+    @property
+    def host(self) -> Optional[str]:
+        """ Server host name, used for limiting concurrent requests """
+        url = getattr(self, "url", None)
+        if not isinstance(url, str):
+            try:
+                url = did.base.Config().settings(self.option).get("url")
+            except (configparser.Error, did.base.ConfigError, RuntimeError):
+                url = None
+        if not url:
+            return None
+        return urllib.parse.urlparse(url).hostname
+
+    def start(self) -> None:
+        """ Submit all children stats to the shared scheduler """
+        if self._futures is not None:
+            return
+        self._started = time.perf_counter()
+        scheduler = Scheduler()
+        futures = []
+        for stat in self.stats:
+            if isinstance(stat, StatsGroup):
+                futures.append(scheduler.submit(
+                    stat.check, priority=stat.priority, leaf=False))
+            else:
+                futures.append(scheduler.submit(
+                    stat.check, priority=self.priority,
+                    plugin=self.option, plugin_workers=self.max_workers,
+                    host=self.host))
+        self._futures = futures
+
+    def stream(self) -> Iterator[Stats]:
+        """
+        Check all children stats, yield them in order when complete
+
+        Each child is yielded as soon as it and all children before
+        it are checked. Children are checked only once, streaming the
+        stats again just yields the already checked children.
+        """
+        self.start()
+        assert self._futures is not None
+        scheduler = Scheduler()
+        for stat, future in zip(self.stats, self._futures):
+            scheduler.wait([future], timeout=Deadline.remaining())
+            if not future.done():
+                future.cancel()
+                stat.expire()
+                yield stat
+                continue
+            # Raise exceptions if raised within the scheduler.
+            try:
+                future.result()
+            except did.base.ReportError as error:
+                log.error("Skipping %s due to %s", stat.option, error)
+                sys.stdout.flush()
+                sys.stderr.flush()
+            yield stat
+        # Wall time of plugin groups for the profiling summary
+        if self.parent is not None and self._started is not None:
+            utils.Profiler.record(
+                self.option, self.option, "group",
+                self._started, time.perf_counter())
+            self._started = None
+
     def check(self) -> None:
-        """ Check all children stats. """
-        with ThreadPoolExecutor() as executor:
-            result_futures = []
-            for stat in self.stats:
-                result_futures.append(executor.submit(stat.check))
-            for f in as_completed(result_futures):
-                # Raise exceptions if raised within the executor.
-                try:
-                    f.result()
-                except did.base.ReportError as error:
-                    log.error("Skipping %s due to %s", f, error)
-                    sys.stdout.flush()
-                    sys.stderr.flush()
+        """ Check all children stats using the shared scheduler. """
+        for _ in self.stream():
+            pass
+
+    async def acheck(self) -> None:
+        """
+        Check all children stats on the asyncio event loop
+
+        Children are checked concurrently until the deadline, children
+        still running then are cancelled and marked as timed out. Groups
+        with a custom ``check()`` are run by the shared scheduler as a
+        whole. Streaming the checked group just yields the children.
+        """
+        if self._futures is not None:
+            return
+        if type(self).check is not StatsGroup.check:
+            await asyncio.wrap_future(Scheduler().submit(
+                self.check, priority=self.priority, leaf=False))
+            return
+        self._started = time.perf_counter()
+        tasks = [asyncio.ensure_future(stat.acheck()) for stat in self.stats]
+        try:
+            if tasks:
+                await asyncio.wait(tasks, timeout=Deadline.remaining())
+        finally:
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+        futures: list[Future[Any]] = []
+        for stat, task in zip(self.stats, tasks):
+            error = None if task.cancelled() else task.exception()
+            if task.cancelled():
+                stat.expire()
+            elif isinstance(error, did.base.ReportError):
+                log.error("Skipping %s due to %s", stat.option, error)
+                sys.stdout.flush()
+                sys.stderr.flush()
+            elif error is not None:
+                raise error
+            future: Future[Any] = Future()
+            future.set_result(None)
+            futures.append(future)
+        self._futures = futures
+
+    def check_team(self, team: list[Stats]) -> None:
+        """
+        Check children stats of all team members using team queries
+
+        Children are matched across the members by their option. Stats
+        supporting team queries are fetched in chunks of their
+        ``team_size``, all other stats are left for the usual check.
+        """
+        members = [{stat.option: stat for stat in group.stats} for group in team]
+        scheduler = Scheduler()
+        futures = []
+        for stat in self.stats:
+            children = [member.get(stat.option) for member in members]
+            if any(child is None or type(child) is not type(stat)
+                   or child._filled for child in children):
+                continue
+            # Groups are disabled when only some of their stats are
+            # selected, leave it for the children to decide
+            if isinstance(stat, StatsGroup):
+                futures.append(scheduler.submit(
+                    functools.partial(stat.check_team, children),
+                    priority=stat.priority, leaf=False))
+                continue
+            # Incremental mode fetches less than the team query would
+            if (stat.team_size < 2 or Snapshot.supports(stat)
+                    or not all(child.enabled() for child in children)):
+                continue
+            for start in range(0, len(children), stat.team_size):
+                chunk = children[start:start + stat.team_size]
+                if len(chunk) > 1:
+                    futures.append(scheduler.submit(
+                        functools.partial(chunk[0].check_team, chunk),
+                        priority=self.priority,
+                        plugin=self.option, plugin_workers=self.max_workers,
+                        host=self.host))
+        scheduler.wait(futures, timeout=Deadline.remaining())
+        for future in futures:
+            if future.done():
+                future.result()
+            else:
+                # Members are left to be checked (and expired) as usual
+                future.cancel()
 
     def show(self) -> None:
         """ List all children stats. """
         for stat in self.stats:
-            stat.show()
+            # Plugins with custom show() do not know about timeouts
+            if stat.timeout:
+                Stats.show(stat)
+            else:
+                stat.show()
+
+    def records(self) -> Iterator[dict[str, Any]]:
+        """ Records of all children stats. """
+        for stat in self.stats:
+            yield from stat.records()
+
+    def expire(self) -> None:
+        """ Mark children which are not checked yet as timed out """
+        for stat in self.stats:
+            stat.expire()
+
+    def fill(self, other: Stats) -> None:
+        """ Fill all children stats from the longer period. """
+        for this, other_stats in zip(self.stats, other.stats):
+            if this.option == other_stats.option:
+                this.fill(other_stats)
 
     def merge(self, other: Stats) -> None:
         """ Merge all children stats. """
@@ -195,6 +1327,18 @@ class StatsGroup(Stats, metaclass=StatsGroupPlugin):
 
         self.error = any(stat.error for stat in self.stats)
 
+    def derive(
+            self,
+            parent: Optional[StatsGroup] = None,
+            options: Optional[argparse.Namespace] = None) -> Stats:
+        """ Copy the group and all children stats """
+        derived = super().derive(parent, options)
+        assert isinstance(derived, StatsGroup)
+        derived.__dict__.pop("_futures", None)
+        derived.__dict__.pop("_started", None)
+        derived.stats = [stat.derive(derived) for stat in self.stats]
+        return derived
+
     def fetch(self) -> None:
         """ Stats groups do not fetch anything """
 
@@ -203,6 +1347,81 @@ class StatsGroup(Stats, metaclass=StatsGroupPlugin):
 #  User Stats
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
+class PluginTopology():
+    """
+    Plugins configured in the config sections
+
+    Plugin types of all sections are looked up and the custom order,
+    priority and workers limit checked only once for each parsed
+    config. The topology also keeps
+    the sample stats without a user which is used for building the
+    command line options and copied for the team stats.
+    """
+
+    def __init__(self, config: did.base.Config) -> None:
+        self.config = config
+        self.plugins: list[tuple[str, StatsGroupPlugin, dict[str, int]]] = []
+        self._sample: Optional[UserStats] = None
+        self._lock = threading.Lock()
+        for section in config.sections():
+            if section == "general":
+                continue
+
+            data = config.settings(section)
+            type_ = data.get("type")
+
+            if not type_:
+                msg = "Plugin type not defined in section '{0}'."
+                raise did.base.ConfigError(msg.format(section))
+
+            # Some plugins (like public-inbox) need to have underscores
+            # in their names to follow python modules conventions, but
+            # it's more user-friendly to have dashes instead, so let's
+            # replace all the dashes by underscores.
+            type_ = type_.replace('-', '_')
+
+            statsgroup = StatsGroupPlugin.lookup(type_)
+            if statsgroup is None:
+                raise did.base.ConfigError(
+                    f"Invalid plugin type '{type_}' in section '{section}'.")
+
+            # Override default order, priority or workers limit if set
+            overrides = {}
+            for key in ("order", "priority", "max_workers"):
+                if key not in data:
+                    continue
+                try:
+                    overrides[key] = int(data[key])
+                except ValueError as exc:
+                    raise did.base.GeneralError(
+                        f"Invalid {key} '{data[key]}' "
+                        f"in the '{section}' section.") from exc
+            self.plugins.append((section, statsgroup, overrides))
+
+    @staticmethod
+    def get(config: Optional[did.base.Config] = None) -> PluginTopology:
+        """ Topology of the current config, created on the first use """
+        config = config or did.base.Config()
+        topology: PluginTopology = config.compiled.value(
+            "topology", lambda: PluginTopology(config))
+        return topology
+
+    @property
+    def sample(self) -> UserStats:
+        """ Stats without user and options, created only once """
+        with self._lock:
+            if self._sample is None:
+                log.debug("Loading Sample Stats group")
+                self._sample = UserStats(config=self.config)
+            return self._sample
+
+    def team(self, options: argparse.Namespace) -> UserStats:
+        """ Empty team stats for merging stats of all users """
+        team = self.sample.derive(options=options)
+        assert isinstance(team, UserStats)
+        return team
+
+
 class UserStats(StatsGroup):
     """ User statistics in one place """
 
@@ -227,43 +1446,15 @@ class UserStats(StatsGroup):
     def configured_plugins(self, config: did.base.Config) -> list[StatsGroup]:
         """ Create a StatsGroup instance for each configured plugin """
         results: list[StatsGroup] = []
-        for section in config.sections():
-            if section == "general":
-                continue
-
-            data = dict(config.section(section, skip=()))
-            type_ = data.get("type")
-
-            if not type_:
-                msg = "Plugin type not defined in section '{0}'."
-                raise did.base.ConfigError(msg.format(section))
-
-            # Some plugins (like public-inbox) need to have underscores
-            # in their names to follow python modules conventions, but
-            # it's more user-friendly to have dashes instead, so let's
-            # replace all the dashes by underscores.
-            type_ = type_.replace('-', '_')
-
-            if type_ not in StatsGroupPlugin.registry:
-                raise did.base.ConfigError(
-                    f"Invalid plugin type '{type_}' in section '{section}'.")
-
+        for section, statsgroup, overrides in PluginTopology.get(config).plugins:
             user = self.user.clone(section) if self.user else None
-            statsgroup = StatsGroupPlugin.registry[type_]
             try:
                 obj = statsgroup(option=section, parent=self, user=user)
-                orig_order = obj.order
-                # Override default order if requested
-                if 'order' in data:
-                    try:
-                        obj.order = int(data['order'])
-                    except ValueError as exc:
-                        raise did.base.GeneralError(
-                            f"Invalid order '{data['order']}' "
-                            f"in the '{section}' section.") from exc
-                if orig_order != obj.order:
-                    log.debug("Reordered %s from %s to %s",
-                              repr(obj), orig_order, obj.order)
+                for key, value in overrides.items():
+                    if getattr(obj, key) != value:
+                        log.debug("Changed %s of %s from %s to %s",
+                                  key, repr(obj), getattr(obj, key), value)
+                        setattr(obj, key, value)
                 results.append(obj)
             except did.base.ReportError as re_err:
                 log.error("Skipping section %s due to error: %s", section, re_err)
@@ -296,9 +1487,16 @@ class EmptyStats(Stats):
         item = re.sub(r"\\n", "\n", self.name)
         utils.item(item, options=self.options)
 
+    def records(self) -> Iterator[dict[str, Any]]:
+        """ Header and footer are not part of the records """
+        return iter(())
+
     def fetch(self) -> None:
         """ Nothing to do for empty stats """
 
+    async def afetch(self) -> None:
+        """ Nothing to wait for either """
+
 
 class EmptyStatsGroup(StatsGroup):
     """ Header & Footer stats group """
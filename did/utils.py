@@ -1,17 +1,24 @@
 """ Logging, config, constants & utilities """
 
+import contextlib
+import datetime
 import enum
 import importlib
+import io
+import json
 import logging
 import os
 import pkgutil
 import re
 import sys
+import threading
+import time
 from argparse import Namespace
 # pylint:disable=unused-import
 from pprint import pformat as pretty  # noqa: F401 (used by other modules)
 from types import ModuleType
-from typing import Any, Literal, Optional, Type, Union, cast
+from typing import (Any, Iterable, Iterator, Literal, Optional, TextIO, Type,
+                    Union, cast)
 
 __all__ = ["pretty", "EMAIL_REGEXP"]
 
@@ -91,6 +98,11 @@ def _import(path: str, continue_on_error: bool) -> Optional[ModuleType]:
     return None
 
 
+def import_component(path: str) -> Optional[ModuleType]:
+    """ Import a single module, log the failure if it cannot """
+    return _import(path, continue_on_error=True)
+
+
 def _load_components(
         path: str,
         include: str = ".*",
@@ -131,6 +143,51 @@ def _load_components(
     return num_loaded
 
 
+def find_components(
+        path: str,
+        include: str = ".*",
+        exclude: str = "test") -> Optional[tuple[str, dict[str, str]]]:
+    """
+    Find components on the filesystem path without importing them
+
+    Returns the base directory which has to be on the python path and
+    a dictionary of module names and their files in the order in which
+    ``load_components()`` would import them. None is returned if the
+    path is not a python module or package on the filesystem.
+    """
+    fs_path = os.path.realpath(os.path.expandvars(os.path.expanduser(path)))
+    if not os.path.exists(fs_path):
+        return None
+    base = _find_base(fs_path)
+    if not base:
+        return None
+    do_include = re.compile(include).search if include else lambda x: True
+    do_exclude = re.compile(exclude).search if exclude else lambda x: False
+    modules: dict[str, str] = {}
+
+    def module_name(file_path: str) -> str:
+        name, _ = os.path.splitext(os.path.relpath(file_path, base))
+        return name.replace(os.sep, ".")
+
+    def walk(directory: str) -> None:
+        package = os.path.join(directory, "__init__.py")
+        modules[module_name(directory + ".py")] = package
+        for _, name, is_pkg in pkgutil.iter_modules(path=[directory]):
+            if is_pkg:
+                walk(os.path.join(directory, name))
+                continue
+            file_path = os.path.join(directory, f"{name}.py")
+            if do_include(module_name(file_path)) \
+                    and not do_exclude(module_name(file_path)):
+                modules[module_name(file_path)] = file_path
+
+    if os.path.isdir(fs_path):
+        walk(fs_path)
+    else:
+        modules[module_name(fs_path)] = fs_path
+    return base, modules
+
+
 def load_components(
         *paths: str, include: str = ".*",
         exclude: str = "test",
@@ -362,10 +419,122 @@ def info(message: str, newline: bool = True) -> None:
     sys.stderr.write(message + ("\n" if newline else ""))
 
 
+def to_date(value: Any) -> Optional[datetime.date]:
+    """ Convert a date, datetime or an iso formatted string to date """
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    return None
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Records
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# Attributes of report items never included in the records
+PRIVATE_FIELDS = {"parent", "options"}
+
+
+def fields(item: Any) -> dict[str, Any]:
+    """
+    Structured fields of a report item
+
+    Items can provide their own ``fields()`` method. Otherwise all
+    public attributes holding a string, number, boolean or date are
+    used. Plain text items and items without any such attributes are
+    represented by their text.
+    """
+    custom = getattr(item, "fields", None)
+    if callable(custom):
+        return dict(custom())
+    if isinstance(item, str):
+        return {"text": item}
+    names: list[str] = []
+    for cls in type(item).__mro__:
+        slots = getattr(cls, "__slots__", ())
+        names.extend([slots] if isinstance(slots, str) else slots)
+    names.extend(getattr(item, "__dict__", {}))
+    result: dict[str, Any] = {}
+    for name in names:
+        if name.startswith("_") or name in PRIVATE_FIELDS or name in result:
+            continue
+        value = getattr(item, name, None)
+        if isinstance(value, (datetime.date, datetime.time)):
+            value = value.isoformat()
+        if value is None or isinstance(value, (str, int, float)):
+            result[name] = value
+    return result or {"text": str(item)}
+
+
+class Records():
+    """
+    Streaming writer of the ``json`` and ``ndjson`` output
+
+    Report items are written as separate records, either as a single
+    json list or as newline delimited json with one record per line.
+    Records are buffered and written to the stream at once for each
+    completed stats group using ``write()``.
+    """
+
+    FORMATS = ("json", "ndjson")
+
+    def __init__(self, format_: str, stream: Optional[TextIO] = None) -> None:
+        if format_ not in self.FORMATS:
+            raise ValueError(f"Invalid records format '{format_}'.")
+        self.format = format_
+        self.stream = stream or sys.stdout
+        self.count = 0
+
+    def write(self, records: Iterable[dict[str, Any]]) -> None:
+        """ Write given records to the stream """
+        buffer = io.StringIO()
+        for record in records:
+            text = json.dumps(record, ensure_ascii=False, default=str)
+            if self.format == "ndjson":
+                buffer.write(f"{text}\n")
+            else:
+                buffer.write(f"{',' if self.count else '['}\n  {text}")
+            self.count += 1
+        self.stream.write(buffer.getvalue())
+        self.stream.flush()
+
+    def close(self) -> None:
+        """ Finish the output """
+        if self.format == "json":
+            self.stream.write("\n]\n" if self.count else "[]\n")
+        self.stream.flush()
+
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Logging
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
+class Lazy():
+    """
+    Log message argument evaluated only when really logged
+
+    Use for expensive formatting of large payloads so that the cost
+    is paid only if the log level is enabled::
+
+        log.data("%s", Lazy(pretty, data))
+    """
+
+    __slots__ = ("function", "args")
+
+    def __init__(self, function: Any, *args: Any) -> None:
+        self.function = function
+        self.args = args
+
+    def __str__(self) -> str:
+        return str(self.function(*self.args))
+
+
 class DidLogger(logging.Logger):
     """
     Additional logging constants and methods
@@ -376,14 +545,14 @@ class DidLogger(logging.Logger):
     DETAILS = LOG_DETAILS
     ALL = LOG_ALL
 
-    def details(self, message: str) -> None:
-        self.log(LOG_DETAILS, message)
+    def details(self, message: Any, *args: Any) -> None:
+        self.log(LOG_DETAILS, message, *args)
 
-    def data(self, message: str) -> None:
-        self.log(LOG_DATA, message)
+    def data(self, message: Any, *args: Any) -> None:
+        self.log(LOG_DATA, message, *args)
 
-    def all(self, message: str) -> None:
-        self.log(LOG_ALL, message)
+    def all(self, message: Any, *args: Any) -> None:
+        self.log(LOG_ALL, message, *args)
 
 
 class Logging():
@@ -598,6 +767,161 @@ class Coloring():
         return self._mode == ColorMode.COLOR_ON
 
 
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Profiling
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class Profiler():
+    """
+    Timing and http statistics collected for ``--profile``
+
+    Time spent in stats fetching is recorded using ``span()`` which
+    also sets the current config section for the thread. Counters
+    such as http requests, transferred bytes, retries, rate limit
+    sleeps, cache hits and shared responses are attributed to that
+    section. Nothing is recorded unless the profiler is enabled.
+    """
+
+    # Columns of the summary table and their counters
+    COLUMNS = [
+        ("Stats", "stats"),
+        ("Wall", "wall"),
+        ("Fetch", "fetch"),
+        ("Requests", "requests"),
+        ("Bytes", "bytes"),
+        ("Retries", "retries"),
+        ("Sleeps", "sleeps"),
+        ("Cached", "cached"),
+        ("Shared", "shared"),
+        ]
+
+    enabled = False
+    _start = 0.0
+    _events: list[dict[str, Any]] = []
+    _sections: dict[str, dict[str, float]] = {}
+    _lock = threading.Lock()
+    _local = threading.local()
+
+    @classmethod
+    def enable(cls) -> None:
+        """ Start profiling from scratch """
+        with cls._lock:
+            cls.enabled = True
+            cls._start = time.perf_counter()
+            cls._events = []
+            cls._sections = {}
+
+    @classmethod
+    def disable(cls) -> None:
+        """ Stop profiling """
+        cls.enabled = False
+
+    @classmethod
+    def section(cls) -> str:
+        """ Config section currently processed by the thread """
+        return getattr(cls._local, "section", None) or "other"
+
+    @classmethod
+    @contextlib.contextmanager
+    def span(
+            cls,
+            name: str,
+            section: str,
+            category: str = "fetch") -> Iterator[None]:
+        """ Measure wall time of the block, count it to the section """
+        if not cls.enabled:
+            yield
+            return
+        previous = getattr(cls._local, "section", None)
+        cls._local.section = section
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            cls._local.section = previous
+            cls.record(name, section, category, start, time.perf_counter())
+
+    @classmethod
+    def record(
+            cls,
+            name: str,
+            section: str,
+            category: str,
+            start: float,
+            finish: float) -> None:
+        """ Record a finished span """
+        if not cls.enabled:
+            return
+        with cls._lock:
+            counters = cls._sections.setdefault(section, {})
+            if category == "group":
+                counters["wall"] = counters.get("wall", 0) + finish - start
+            else:
+                counters[category] = counters.get(category, 0) + finish - start
+                counters["stats"] = counters.get("stats", 0) + 1
+            cls._events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - cls._start) * 1e6,
+                "dur": (finish - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": {"section": section},
+                })
+
+    @classmethod
+    def count(
+            cls,
+            counter: str,
+            value: float = 1,
+            section: Optional[str] = None) -> None:
+        """ Increase the counter of the current (or given) section """
+        if not cls.enabled:
+            return
+        section = section or cls.section()
+        with cls._lock:
+            counters = cls._sections.setdefault(section, {})
+            counters[counter] = counters.get(counter, 0) + value
+
+    @classmethod
+    def totals(cls) -> dict[str, float]:
+        """ Counters summed across all sections """
+        totals: dict[str, float] = {}
+        with cls._lock:
+            for counters in cls._sections.values():
+                for counter, value in counters.items():
+                    totals[counter] = totals.get(counter, 0) + value
+        return totals
+
+    @classmethod
+    def summary(cls, stream: Optional[TextIO] = None) -> None:
+        """ Print the summary table (to stderr by default) """
+        stream = stream or sys.stderr
+        width = max([len("Section")] + [len(name) for name in cls._sections])
+        lines = ["Section".ljust(width) + "".join(
+            f"{title:>10}" for title, _ in cls.COLUMNS)]
+        for section, counters in sorted(
+                cls._sections.items(),
+                key=lambda item: item[1].get("wall", item[1].get("fetch", 0)),
+                reverse=True):
+            cells = []
+            for _, counter in cls.COLUMNS:
+                value = counters.get(counter, 0)
+                if counter in ("wall", "fetch"):
+                    cells.append(f"{value:>9.2f}s")
+                else:
+                    cells.append(f"{int(value):>10}")
+            lines.append(section.ljust(width) + "".join(cells))
+        print("\n".join(lines), file=stream)
+
+    @classmethod
+    def trace(cls, path: str) -> None:
+        """ Save recorded spans as a Chrome trace event file """
+        with open(path, "w", encoding="utf-8") as trace:
+            json.dump({"traceEvents": cls._events}, trace)
+
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Default Logger
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -26,7 +26,7 @@ install_requires = [
     ]
 extras_require = {
     'bodhi': ['bodhi-client'],
-    'bugzilla': ['python-bugzilla'],
+    'bugzilla': ['python-bugzilla>=3.0'],
     'docs': ['sphinx==8.2.3', 'sphinx-rtd-theme==3.0.2'],
     'google': ['google-api-python-client', 'oauth2client'],
     'jira': ['requests_gssapi'],
@@ -0,0 +1,880 @@
+# coding: utf-8
+"""
+Local stand-in servers for the benchmark suite
+
+Each server answers the subset of the remote api used by the plugin
+with a synthetic dataset generated on the fly. Number of users, the
+reported period, number of items per user and week and the latency
+of each response are configurable so that the whole report can be
+measured without network access.
+"""
+
+import contextlib
+import datetime
+import functools
+import gzip
+import http.server
+import json
+import math
+import re
+import socketserver
+import threading
+import time
+import urllib.parse
+import xmlrpc.server
+from email.utils import format_datetime
+from typing import Any, Callable, Iterator, Optional
+
+# Default number of items generated for each user and query per week
+DENSITY = 2
+
+# Identifier blocks reserved for individual users
+BLOCK = 100000
+
+# Number of items in a single synthetic project
+PROJECT_SIZE = 100
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Dataset
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class Dataset():
+    """
+    Synthetic users and their activity in the reported period
+
+    Items are identified by integers, each user owns a block of
+    ``BLOCK`` identifiers, the last block is a shared pool used for
+    queries which do not mention any user. Items are spread evenly
+    across the period so that each of them can be reconstructed from
+    its identifier alone.
+    """
+
+    def __init__(
+            self,
+            users: int,
+            since: datetime.date,
+            until: datetime.date,
+            density: int = DENSITY,
+            latency: float = 0.0):
+        self.logins = [f"bench{index:03}" for index in range(users)]
+        self.since = since
+        self.until = until
+        self.density = density
+        self.latency = latency
+
+    @staticmethod
+    def email(login: str) -> str:
+        """ Email address of the given user """
+        return f"{login}@example.org"
+
+    @property
+    def emails(self) -> list[str]:
+        """ Email addresses of all users """
+        return [self.email(login) for login in self.logins]
+
+    @property
+    def days(self) -> int:
+        """ Number of days in the reported period """
+        return (self.until - self.since).days + 1
+
+    @property
+    def count(self) -> int:
+        """ Number of items returned for a single query """
+        return max(1, self.density * self.days // 7)
+
+    def login(self, text: str) -> Optional[str]:
+        """ The first known user mentioned in the query (if any) """
+        for login in self.logins:
+            if login in text:
+                return login
+        return None
+
+    def items(self, login: Optional[str] = None) -> list[int]:
+        """ Identifiers of items belonging to the user (or the pool) """
+        block = self.logins.index(login) if login else len(self.logins)
+        return [block * BLOCK + number + 1 for number in range(self.count)]
+
+    def author(self, identifier: int) -> str:
+        """ Login of the user who owns given item """
+        block, number = divmod(identifier - 1, BLOCK)
+        if block < len(self.logins):
+            return self.logins[block]
+        return self.logins[number % len(self.logins)]
+
+    def moment(self, identifier: int) -> datetime.datetime:
+        """ Time of the activity related to given item (utc) """
+        number = (identifier - 1) % BLOCK
+        span = datetime.timedelta(days=self.days) / self.count
+        start = datetime.datetime.combine(
+            self.since, datetime.time(), tzinfo=datetime.timezone.utc)
+        return start + span * (number + 0.5)
+
+    @functools.cached_property
+    def activity(self) -> list[int]:
+        """ Items of all users, newest first (organization feeds) """
+        return sorted(
+            [item for login in self.logins for item in self.items(login)],
+            key=self.moment, reverse=True)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Servers
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class Stub():
+    """ Request counting, latency and background thread of a server """
+
+    dataset: Dataset
+    requests: int
+    server_address: tuple[str, int]
+    serve_forever: Callable[[], None]
+    shutdown: Callable[[], None]
+    server_close: Callable[[], None]
+
+    def prepare(self, dataset: Dataset, path: str = "") -> None:
+        """ Initialize the stub state """
+        self.dataset = dataset
+        self.path = path
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def hit(self) -> None:
+        """ Count the request and simulate the network latency """
+        with self._lock:
+            self.requests += 1
+        if self.dataset.latency:
+            time.sleep(self.dataset.latency)
+
+    @property
+    def url(self) -> str:
+        """ Base url of the server """
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+
+    def start(self) -> None:
+        """ Serve requests in a background thread """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        """ Stop serving and close the socket """
+        self.shutdown()
+        self.server_close()
+
+
+class StubServer(Stub, http.server.ThreadingHTTPServer):
+    """ Stand-in http server with json (or mbox) responses """
+
+    daemon_threads = True
+
+    def __init__(self, dataset: Dataset, handler: type, path: str = ""):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.prepare(dataset, path)
+
+
+class StubXMLRPCServer(
+        Stub, socketserver.ThreadingMixIn, xmlrpc.server.SimpleXMLRPCServer):
+    """ Stand-in xml-rpc server """
+
+    daemon_threads = True
+
+    def __init__(self, dataset: Dataset, path: str):
+        super().__init__(
+            ("127.0.0.1", 0), requestHandler=XMLRPCHandler,
+            logRequests=False, allow_none=True)
+        self.prepare(dataset, path)
+
+
+class XMLRPCHandler(xmlrpc.server.SimpleXMLRPCRequestHandler):
+    """ Count xml-rpc requests and keep the output quiet """
+
+    rpc_paths = ("/rpc", "/xmlrpc.cgi")
+
+    def do_POST(self) -> None:
+        self.server.hit()
+        super().do_POST()
+
+    def log_message(self, *args: Any) -> None:
+        """ No logging """
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    """ Dispatch requests to handler methods listed in ``routes`` """
+
+    # Keep connections alive so that session pooling is measured,
+    # send headers and body at once to avoid delayed acknowledgement
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    # List of (method, path regular expression, handler name) tuples
+    routes: list[tuple[str, str, str]] = []
+
+    query: dict[str, list[str]] = {}
+
+    def log_message(self, *args: Any) -> None:
+        """ No logging """
+
+    def do_GET(self) -> None:
+        self.dispatch("GET")
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.dispatch("POST")
+
+    @property
+    def dataset(self) -> Dataset:
+        """ Dataset served by the server """
+        return self.server.dataset
+
+    @property
+    def base(self) -> str:
+        """ Server url used to build links """
+        return self.server.url
+
+    def dispatch(self, method: str) -> None:
+        """ Find the matching route and call its handler """
+        self.server.hit()
+        split = urllib.parse.urlsplit(self.path)
+        self.query = urllib.parse.parse_qs(split.query)
+        for verb, pattern, name in self.routes:
+            matched = re.fullmatch(self.server.path + pattern, split.path)
+            if verb == method and matched:
+                getattr(self, name)(*matched.groups())
+                return
+        self.reply(b"Not found", status=404, content_type="text/plain")
+
+    def param(self, name: str, default: Any = None) -> Any:
+        """ Single query parameter """
+        return self.query.get(name, [default])[0]
+
+    def reply(
+            self,
+            body: bytes,
+            status: int = 200,
+            content_type: str = "application/json",
+            headers: Optional[dict[str, str]] = None) -> None:
+        """ Send the response """
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def json(self, data: Any, headers: Optional[dict[str, str]] = None) -> None:
+        """ Send json data """
+        self.reply(json.dumps(data).encode("utf-8"), headers=headers)
+
+    def page_url(self, **changes: Any) -> str:
+        """ Url of the current request with updated query parameters """
+        query = {key: values[0] for key, values in self.query.items()}
+        query.update(changes)
+        path = urllib.parse.urlsplit(self.path).path
+        return f"{self.base}{path[len(self.server.path):]}?" + \
+            urllib.parse.urlencode(query)
+
+    def paginate(
+            self,
+            items: list[Any],
+            per_page: int,
+            wrap: Callable[[list[Any]], Any] = lambda chunk: chunk) -> None:
+        """ Send a page of items, link the next one in the header """
+        page = int(self.param("page", 1))
+        headers = {
+            "X-Total-Pages": str(max(1, math.ceil(len(items) / per_page)))}
+        if page * per_page < len(items):
+            headers["Link"] = f'<{self.page_url(page=page + 1)}>; rel="next"'
+        self.json(wrap(items[(page - 1) * per_page:page * per_page]), headers)
+
+
+def timestamp(moment: datetime.datetime) -> str:
+    """ Iso format with the 'Z' suffix """
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  GitHub
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class GitHubHandler(StubHandler):
+    """ Issue search and issue comments """
+
+    routes = [
+        ("GET", r"/search/issues", "search"),
+        ("GET", r"/repos/([^/]+)/([^/]+)/issues/(\d+)/comments", "comments"),
+        ]
+
+    def search(self) -> None:
+        query = self.param("q", "")
+        kind = "pull" if "type:pr" in query else "issues"
+        items = []
+        for identifier in self.dataset.items(self.dataset.login(query)):
+            author = self.dataset.author(identifier)
+            url = f"{self.base}/repos/{author}/project/issues/{identifier}"
+            items.append({
+                "url": url,
+                "html_url": f"{self.base}/{author}/project/{kind}/{identifier}",
+                "comments_url": f"{url}/comments",
+                "title": f"Synthetic {kind} {identifier}",
+                "body": f"Description of {kind} {identifier}",
+                })
+        self.paginate(
+            items, int(self.param("per_page", 30)),
+            lambda chunk: {"total_count": len(items), "items": chunk})
+
+    def comments(self, owner: str, _project: str, number: str) -> None:
+        self.paginate([{
+            "created_at": timestamp(self.dataset.moment(int(number))),
+            "user": {"login": owner},
+            "body": "Synthetic comment",
+            }], int(self.param("per_page", 30)))
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  GitLab
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# Event kinds as (target type, action name, noteable type)
+GITLAB_EVENTS = [
+    ("Issue", "opened", None),
+    ("Note", "commented on", "Issue"),
+    ("Issue", "closed", None),
+    ("MergeRequest", "opened", None),
+    ("Note", "commented on", "MergeRequest"),
+    ("MergeRequest", "approved", None),
+    ("MergeRequest", "accepted", None),
+    ]
+
+# Default number of items per page
+GITLAB_PER_PAGE = 20
+
+
+class GitLabHandler(StubHandler):
+    """ Users, user events, projects, issues and merge requests """
+
+    routes = [
+        ("GET", r"/api/v4/users", "user"),
+        ("GET", r"/api/v4/users/(\d+)/events", "events"),
+        ("GET", r"/api/v4/projects/(\d+)", "project"),
+        ("GET", r"/api/v4/projects/(\d+)/(issues|merge_requests)", "listing"),
+        ("GET", r"/api/v4/merge_requests", "merge_requests"),
+        ]
+
+    def per_page(self) -> int:
+        return int(self.param("per_page", GITLAB_PER_PAGE))
+
+    def user(self) -> None:
+        login = self.param("username")
+        if login not in self.dataset.logins:
+            self.json([])
+            return
+        self.json([{
+            "id": self.dataset.logins.index(login) + 1, "username": login}])
+
+    def events(self, user_id: str) -> None:
+        login = self.dataset.logins[int(user_id) - 1]
+        events = []
+        for identifier in reversed(self.dataset.items(login)):
+            target, action, noteable = GITLAB_EVENTS[
+                identifier % len(GITLAB_EVENTS)]
+            event = {
+                "project_id": identifier // PROJECT_SIZE,
+                "target_id": identifier,
+                "target_iid": identifier % PROJECT_SIZE + 1,
+                "target_type": target,
+                "target_title": f"Synthetic {target} {identifier}",
+                "action_name": action,
+                "created_at": timestamp(self.dataset.moment(identifier)),
+                }
+            if noteable:
+                event["note"] = {
+                    "noteable_type": noteable,
+                    "noteable_id": identifier,
+                    "body": "Synthetic comment",
+                    }
+            events.append(event)
+        self.paginate(events, self.per_page())
+
+    def project(self, project_id: str) -> None:
+        self.json({
+            "id": int(project_id),
+            "path_with_namespace": f"bench/project{project_id}",
+            })
+
+    def listing(self, project_id: str, kind: str) -> None:
+        first = int(project_id) * PROJECT_SIZE
+        self.paginate([{
+            "id": identifier,
+            "iid": identifier % PROJECT_SIZE + 1,
+            "title": f"Synthetic {kind} {identifier}",
+            "description": f"Description of {kind} {identifier}",
+            } for identifier in range(first, first + PROJECT_SIZE)],
+            self.per_page())
+
+    def merge_requests(self) -> None:
+        login = self.param("author_username", "")
+        self.paginate([{
+            "id": identifier,
+            "iid": identifier % PROJECT_SIZE + 1,
+            "project_id": identifier // PROJECT_SIZE,
+            "title": f"Synthetic merge request {identifier}",
+            "description": f"Description of merge request {identifier}",
+            "merged_at": timestamp(self.dataset.moment(identifier)),
+            } for identifier in self.dataset.items(self.dataset.login(login))],
+            self.per_page())
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Pagure
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# Default number of items per page
+PAGURE_PER_PAGE = 20
+
+
+class PagureHandler(StubHandler):
+    """ User issues, pull requests and daily activity """
+
+    routes = [
+        ("GET", r"/user/([^/]+)/issues", "issues"),
+        ("GET", r"/user/([^/]+)/requests/(filed|actionable)", "requests"),
+        ("GET", r"/user/([^/]+)/activity/([\d-]+)", "activity"),
+        ]
+
+    def issue(self, identifier: int, login: str) -> dict[str, Any]:
+        moment = self.dataset.moment(identifier).timestamp()
+        return {
+            "id": identifier,
+            "title": f"Synthetic issue {identifier}",
+            "project": {"fullname": "bench/project"},
+            "full_url": f"{self.base}/bench/project/issue/{identifier}",
+            "date_created": str(int(moment)),
+            "closed_at": str(int(moment)),
+            "closed_by": {"name": login},
+            }
+
+    def listing(self, login: str, field: str, pagination: str) -> None:
+        items = [
+            self.issue(identifier, login)
+            for identifier in self.dataset.items(login)]
+        page = int(self.param("page", 1))
+        pages = max(1, math.ceil(len(items) / PAGURE_PER_PAGE))
+        self.json({
+            field: items[(page - 1) * PAGURE_PER_PAGE:page * PAGURE_PER_PAGE],
+            pagination: {
+                "page": page,
+                "pages": pages,
+                "per_page": PAGURE_PER_PAGE,
+                "next": self.page_url(page=page + 1) if page < pages else None,
+                },
+            })
+
+    def issues(self, login: str) -> None:
+        kind = "assigned" if self.param("author") == "false" else "created"
+        self.listing(login, f"issues_{kind}", f"pagination_issues_{kind}")
+
+    def requests(self, login: str, _kind: str) -> None:
+        self.listing(login, "requests", "pagination")
+
+    def activity(self, login: str, date: str) -> None:
+        self.json({"activities": [{
+            "date": date,
+            "date_created": str(int(self.dataset.moment(identifier).timestamp())),
+            "description_mk": (
+                '<div class="markdown"><p>Commented on '
+                f'<a href="/bench/project/issue/{identifier}">'
+                f'#{identifier}</a></p></div>'),
+            "id": identifier,
+            "ref_id": str(identifier),
+            "type": "commented",
+            "user": {"name": login},
+            } for identifier in self.dataset.items(login)
+            if self.dataset.moment(identifier).date().isoformat() == date]})
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Sentry
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# Number of activities per page
+SENTRY_PER_PAGE = 100
+
+
+class SentryHandler(StubHandler):
+    """ Organization activity feed with cursor pagination """
+
+    routes = [("GET", r"/organizations/([^/]+)/activity/", "activity")]
+
+    def activity(self, _organization: str) -> None:
+        cursor = int(self.param("cursor", 0))
+        chunk = self.dataset.activity[cursor:cursor + SENTRY_PER_PAGE]
+        more = cursor + SENTRY_PER_PAGE < len(self.dataset.activity)
+        link = (
+            f'<{self.page_url(cursor=cursor + SENTRY_PER_PAGE)}>; '
+            f'rel="next"; results="{"true" if more else "false"}"')
+        self.json([{
+            "issue": {
+                "shortId": f"BENCH-{identifier}",
+                "title": f"Synthetic error {identifier}",
+                },
+            "user": {"email": self.dataset.email(self.dataset.author(identifier))},
+            "type": "set_resolved" if identifier % 2 else "note",
+            "dateCreated": timestamp(self.dataset.moment(identifier)),
+            } for identifier in chunk], headers={"Link": link})
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Gerrit
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# Prefix protecting json responses against xssi
+GERRIT_MAGIC = ")]}'\n"
+
+
+class GerritHandler(StubHandler):
+    """ Change queries and change details """
+
+    routes = [
+        ("GET", r"/changes/", "changes"),
+        ("GET", r"/changes/I([0-9a-f]+)/detail", "detail"),
+        ]
+
+    def gerrit(self, data: Any) -> None:
+        self.reply((GERRIT_MAGIC + json.dumps(data)).encode("utf-8"))
+
+    def change(self, identifier: int) -> dict[str, Any]:
+        return {
+            "_number": identifier,
+            "change_id": f"I{identifier:040x}",
+            "project": "bench/project",
+            "subject": f"Synthetic change {identifier}",
+            "created": self.dataset.moment(identifier).strftime(
+                "%Y-%m-%d %H:%M:%S.000000000"),
+            "owner": {"email": self.dataset.email(
+                self.dataset.author(identifier))},
+            }
+
+    def changes(self) -> None:
+        results = [
+            [self.change(identifier)
+             for identifier in self.dataset.items(self.dataset.login(query))]
+            for query in self.query.get("q", [])]
+        # Multiple queries are answered with a list of lists
+        self.gerrit(results[0] if len(results) == 1 else results)
+
+    def detail(self, change: str) -> None:
+        identifier = int(change, 16)
+        owner = self.dataset.email(self.dataset.author(identifier))
+        date = self.dataset.moment(identifier).strftime("%Y-%m-%d %H:%M:%S")
+        self.gerrit({
+            "owner": {"email": owner},
+            "messages": [{
+                "author": {"email": owner},
+                "date": date,
+                "_revision_number": revision,
+                "message": f"Uploaded patch set {revision}.",
+                } for revision in (1, 2)],
+            })
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Public Inbox
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class PublicInboxHandler(StubHandler):
+    """
+    Message search and thread download, both as gzipped mbox
+
+    Every other message found for the user is a reply to a thread
+    started by somebody else so that thread roots are fetched too.
+    """
+
+    routes = [
+        ("POST", r"/all/", "search"),
+        ("GET", r"/all/([^/]+)/t\.mbox\.gz", "thread"),
+        ]
+
+    def message(
+            self,
+            identifier: int,
+            root: bool,
+            reply: Optional[bool] = None) -> str:
+        author = self.dataset.author(identifier)
+        moment = self.dataset.moment(identifier)
+        if root:
+            sender = "someone@example.org" if reply else self.dataset.email(author)
+            headers = [
+                f"Message-Id: <root-{identifier}@example.org>",
+                f"Date: {format_datetime(moment - datetime.timedelta(hours=1))}",
+                ]
+        else:
+            sender = self.dataset.email(author)
+            headers = [
+                f"Message-Id: <reply-{identifier}@example.org>",
+                f"In-Reply-To: <root-{identifier}@example.org>",
+                f"Date: {format_datetime(moment)}",
+                ]
+        return "\n".join([
+            "From mboxrd@z Thu Jan  1 00:00:00 1970",
+            f"From: {sender}",
+            f"Subject: {'' if root else 'Re: '}Synthetic thread {identifier}",
+            *headers,
+            "",
+            "Synthetic message body",
+            "",
+            ""])
+
+    def mbox(self, messages: list[str]) -> None:
+        self.reply(
+            gzip.compress("".join(messages).encode("utf-8")),
+            content_type="application/gzip")
+
+    def search(self) -> None:
+        login = self.dataset.login(self.param("q", ""))
+        if login is None:
+            self.reply(b"", status=404, content_type="text/plain")
+            return
+        self.mbox([
+            self.message(identifier, root=bool(identifier % 2))
+            for identifier in self.dataset.items(login)])
+
+    def thread(self, message_id: str) -> None:
+        identifier = int(re.sub(r"^\w+-(\d+)@.*$", r"\1", message_id))
+        self.mbox([
+            self.message(identifier, root=True, reply=True),
+            self.message(identifier, root=False)])
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Jira
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def atlassian(moment: datetime.datetime) -> str:
+    """ Timestamp in the format used by Jira and Confluence """
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+
+
+class JiraHandler(StubHandler):
+    """ Token check and issue search (Server / Data Center api) """
+
+    routes = [
+        ("GET", r"/rest/api/[^/]+/myself", "myself"),
+        ("GET", r"/rest/api/[^/]+/search", "search"),
+        ]
+
+    def myself(self) -> None:
+        self.json({"name": "bench", "emailAddress": "bench@example.org"})
+
+    def issue(self, identifier: int, expand: str) -> dict[str, Any]:
+        login = self.dataset.author(identifier)
+        author = {"name": login, "emailAddress": self.dataset.email(login)}
+        created = atlassian(self.dataset.moment(identifier))
+        issue: dict[str, Any] = {
+            "key": f"BENCH-{identifier}",
+            "fields": {
+                "summary": f"Synthetic issue {identifier}",
+                "comment": {"comments": [{
+                    "author": author, "created": created,
+                    "body": "Synthetic comment"}]},
+                "worklog": {"worklogs": [{
+                    "author": author, "created": created,
+                    "timeSpent": "1h", "comment": "Synthetic work"}]},
+                },
+            }
+        if "changelog" in expand:
+            issue["changelog"] = {"histories": [{
+                "author": author, "created": created,
+                "items": [{"field": "status", "toString": "Closed"}]}]}
+        return issue
+
+    def search(self) -> None:
+        start = int(self.param("startAt", 0))
+        limit = int(self.param("maxResults", 50))
+        items = self.dataset.items(self.dataset.login(self.param("jql", "")))
+        self.json({
+            "startAt": start,
+            "maxResults": limit,
+            "total": len(items),
+            "issues": [
+                self.issue(identifier, self.param("expand", ""))
+                for identifier in items[start:start + limit]],
+            })
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Confluence
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class ConfluenceHandler(StubHandler):
+    """ Token check, cql search and page versions """
+
+    routes = [
+        ("GET", r"/rest/api/content", "content"),
+        ("GET", r"/rest/api/content/search", "search"),
+        ("GET", r"/rest/experimental/content/(\d+)/version", "versions"),
+        ]
+
+    def content(self) -> None:
+        self.json({"results": [], "_links": {}})
+
+    def search(self) -> None:
+        query = self.param("cql", "")
+        start = int(self.param("start", 0))
+        limit = int(self.param("limit", 25))
+        items = self.dataset.items(self.dataset.login(query))
+        results: list[dict[str, Any]] = []
+        for identifier in items[start:start + limit]:
+            result = {
+                "id": str(identifier),
+                "title": f"Synthetic page {identifier}",
+                "_links": {"webui": f"/pages/{identifier}"},
+                }
+            if "type=comment" in query:
+                result["title"] = f"Re: {result['title']}"
+                result["body"] = {
+                    "editor": {"value": "<p>Synthetic</p><p>comment</p>"}}
+            results.append(result)
+        links = {}
+        if start + limit < len(items):
+            links["next"] = self.page_url(start=start + limit)
+        self.json({"results": results, "_links": links})
+
+    def versions(self, page: str) -> None:
+        identifier = int(page)
+        self.json({"results": [{
+            "by": {"username": self.dataset.author(identifier)},
+            "when": atlassian(self.dataset.moment(identifier)),
+            "number": 1,
+            }]})
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Trac
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def trac(server: StubXMLRPCServer) -> None:
+    """ Register ticket query, ticket details and ticket history """
+    dataset = server.dataset
+
+    def query(text: str) -> list[int]:
+        return dataset.items(dataset.login(text))
+
+    def get(identifier: int) -> list[Any]:
+        moment = dataset.moment(identifier)
+        return [identifier, moment, moment, {
+            "summary": f"Synthetic ticket {identifier}",
+            "resolution": "fixed",
+            "status": "closed",
+            "owner": dataset.author(identifier),
+            }]
+
+    def change_log(identifier: int) -> list[list[Any]]:
+        moment = dataset.moment(identifier)
+        who = dataset.author(identifier)
+        return [
+            [moment, who, "status", "new", "accepted", True],
+            [moment, who, "comment", "", "Synthetic comment", True],
+            [moment, who, "status", "accepted", "closed", True],
+            ]
+
+    server.register_function(query, "ticket.query")
+    server.register_function(get, "ticket.get")
+    server.register_function(change_log, "ticket.changeLog")
+    server.register_multicall_functions()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Bugzilla
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# Status changes recorded in the history of each bug
+BUGZILLA_WORKFLOW = ["NEW", "ASSIGNED", "POST", "MODIFIED", "VERIFIED", "CLOSED"]
+
+
+def bugzilla(server: StubXMLRPCServer) -> None:
+    """ Register version check, bug search, history and comments """
+    dataset = server.dataset
+
+    def version() -> dict[str, str]:
+        return {"version": "5.0.4"}
+
+    def extensions() -> dict[str, Any]:
+        return {"extensions": {}}
+
+    def search(query: dict[str, Any]) -> dict[str, Any]:
+        return {"bugs": [{
+            "id": identifier,
+            "summary": f"Synthetic bug {identifier}",
+            "status": "CLOSED",
+            "resolution": "ERRATA",
+            "assigned_to": dataset.email(dataset.author(identifier)),
+            } for identifier in dataset.items(dataset.login(str(query)))]}
+
+    def history(query: dict[str, Any]) -> dict[str, Any]:
+        bugs = []
+        for identifier in query["ids"]:
+            who = dataset.email(dataset.author(identifier))
+            changes = [
+                {"field_name": "status", "removed": removed, "added": added}
+                for removed, added in zip(
+                    BUGZILLA_WORKFLOW, BUGZILLA_WORKFLOW[1:])]
+            changes.append(
+                {"field_name": "keywords", "removed": "", "added": "Patch"})
+            changes.append({"field_name": "cc", "removed": "", "added": who})
+            bugs.append({"id": identifier, "history": [{
+                "when": dataset.moment(identifier),
+                "who": who,
+                "changes": changes,
+                }]})
+        return {"bugs": bugs}
+
+    def comments(query: dict[str, Any]) -> dict[str, Any]:
+        bugs = {}
+        for identifier in query["ids"]:
+            who = dataset.email(dataset.author(identifier))
+            moment = dataset.moment(identifier)
+            bugs[str(identifier)] = {"comments": [{
+                "count": count,
+                "creator": who,
+                "creation_time": moment,
+                "text": "Synthetic comment",
+                } for count in (0, 1)]}
+        return {"bugs": bugs, "comments": {}}
+
+    server.register_function(version, "Bugzilla.version")
+    server.register_function(extensions, "Bugzilla.extensions")
+    server.register_function(search, "Bug.search")
+    server.register_function(history, "Bug.history")
+    server.register_function(comments, "Bug.comments")
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  All Servers
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@contextlib.contextmanager
+def servers(dataset: Dataset) -> Iterator[dict[str, Stub]]:
+    """ Start stand-in servers for all services, stop them after """
+    stubs: dict[str, Stub] = {
+        "github": StubServer(dataset, GitHubHandler),
+        "gitlab": StubServer(dataset, GitLabHandler),
+        "pagure": StubServer(dataset, PagureHandler, "/api/0"),
+        "sentry": StubServer(dataset, SentryHandler, "/api/0"),
+        "gerrit": StubServer(dataset, GerritHandler, "/gerrit"),
+        "public_inbox": StubServer(dataset, PublicInboxHandler),
+        "jira": StubServer(dataset, JiraHandler),
+        "confluence": StubServer(dataset, ConfluenceHandler),
+        "trac": StubXMLRPCServer(dataset, "/rpc"),
+        "bugzilla": StubXMLRPCServer(dataset, "/xmlrpc.cgi"),
+        }
+    trac(stubs["trac"])
+    bugzilla(stubs["bugzilla"])
+    for stub in stubs.values():
+        stub.start()
+    try:
+        yield stubs
+    finally:
+        for stub in stubs.values():
+            stub.stop()
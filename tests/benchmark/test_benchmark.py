@@ -0,0 +1,126 @@
+# coding: utf-8
+"""
+End-to-end benchmark of the report against local stand-in servers
+
+The smallest scenario runs as part of the regular test suite, set the
+``DID_BENCHMARK`` environment variable to run the whole matrix::
+
+    DID_BENCHMARK=1 pytest -s -m benchmark tests/benchmark
+
+Dataset size (items per user and week) and the latency of each
+response can be adjusted using ``DID_BENCHMARK_DENSITY`` and
+``DID_BENCHMARK_LATENCY`` (in seconds). Wall time, number of http
+requests as seen by the client and by the servers, transferred bytes
+and peak memory allocated during the run are reported for each
+scenario. Memory is traced using ``tracemalloc`` which slows down the
+whole run, timing is comparable only between runs of this suite.
+"""
+
+import datetime
+import os
+import time
+import tracemalloc
+
+import pytest
+
+import did.base
+import did.cli
+import did.stats
+import did.utils
+from tests.benchmark.servers import DENSITY, Dataset, servers
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Constants
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# Number of users and reported periods
+USERS = [1, 10, 100]
+PERIODS = {
+    "week": (datetime.date(2024, 3, 4), datetime.date(2024, 3, 10)),
+    "quarter": (datetime.date(2024, 1, 1), datetime.date(2024, 3, 31)),
+    "year": (datetime.date(2023, 1, 1), datetime.date(2023, 12, 31)),
+    }
+
+# Dataset size and response latency
+DENSITY = int(os.environ.get("DID_BENCHMARK_DENSITY", DENSITY))
+LATENCY = float(os.environ.get("DID_BENCHMARK_LATENCY", 0))
+
+# Config sections for individual services, plugins which cannot be
+# imported (missing dependencies) are left out
+SECTIONS = {
+    "github": "type = github\nurl = {url}\ntoken = bench",
+    "gitlab": "type = gitlab\nurl = {url}\ntoken = bench",
+    "pagure": "type = pagure\nurl = {url}",
+    "sentry": "type = sentry\nurl = {url}\norganization = bench\ntoken = bench",
+    "gerrit": "type = gerrit\nurl = {url}/\nprefix = GR",
+    "public_inbox": "type = public-inbox\nurl = {url}",
+    "jira": (
+        "type = jira\nurl = {url}\nauth_type = token\ntoken = bench\n"
+        "project = BENCH"),
+    "confluence": "type = confluence\nurl = {url}\nauth_type = token\ntoken = bench",
+    "trac": "type = trac\nurl = {url}\nprefix = TR",
+    "bugzilla": "type = bugzilla\nurl = {url}\nprefix = BZ",
+    }
+
+# The full matrix is run on demand only
+FULL = pytest.mark.skipif(
+    "DID_BENCHMARK" not in os.environ,
+    reason="Set DID_BENCHMARK to run the whole benchmark matrix")
+SCENARIOS = [
+    pytest.param(
+        users, period,
+        id=f"{users}-{period}",
+        marks=[] if (users, period) == (1, "week") else [FULL])
+    for users in USERS for period in PERIODS]
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Tests
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def available(service: str) -> bool:
+    """ Check whether the plugin can be imported """
+    return did.stats.StatsGroupPlugin.lookup(service) is not None
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("users, period", SCENARIOS)
+def test_benchmark(users: int, period: str) -> None:
+    """ Full report for given number of users and period """
+    since, until = PERIODS[period]
+    dataset = Dataset(users, since, until, density=DENSITY, latency=LATENCY)
+    with servers(dataset) as stubs:
+        services = [service for service in SECTIONS if available(service)]
+        did.base.Config("\n".join(
+            [f"[general]\nemail = {dataset.emails[0]}"] + [
+                f"[{service}]\n" + SECTIONS[service].format(
+                    url=stubs[service].url)
+                for service in services]))
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            gathered, _ = did.cli.main([
+                "--since", str(since), "--until", str(until),
+                "--no-cache", "--profile",
+                *[f"--email={email}" for email in dataset.emails]])
+            wall = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+            did.utils.Profiler.disable()
+        served = {service: stubs[service].requests for service in services}
+    totals = did.utils.Profiler.totals()
+
+    # Every service has been asked and every user has been reported
+    assert len(gathered) == users
+    assert all(served.values()), served
+    assert totals.get("requests", 0) > 0
+
+    print(
+        f"\n{users:>3} users, {period:<7} {wall:8.2f}s"
+        f"{int(totals.get('requests', 0)):>8} client requests"
+        f"{sum(served.values()):>8} served"
+        f"{int(totals.get('bytes', 0)) / did.base.MEGABYTE:>9.1f} MB"
+        f"{peak / did.base.MEGABYTE:>9.1f} MB peak memory"
+        f"\n    " + ", ".join(
+            f"{service} {count}" for service, count in served.items()))
@@ -8,6 +8,7 @@ from _pytest.logging import LogCaptureFixture
 
 import did.cli
 import did.utils
+from did.plugins.git import Commit
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Constants
@@ -87,6 +88,23 @@ def test_git_nothing():
     assert stats == []
 
 
+def test_git_fields():
+    """ Structured fields of a commit """
+    commit = Commit.parse(
+        "2015-09-08\tPetr Splichal <psplicha@redhat.com>\t4a3b2c1 - Fix")
+    assert commit == "4a3b2c1 - Fix"
+    assert did.utils.fields(commit) == {
+        "hash": "4a3b2c1",
+        "date": "2015-09-08",
+        "author": "Petr Splichal <psplicha@redhat.com>",
+        "text": "4a3b2c1 - Fix",
+        }
+    # Authors are matched literally as git log --fixed-strings does
+    assert commit.by("psplicha@redhat.com")
+    assert not commit.by("psplicha@redhat.c.m")
+    assert not commit.by("Petr|Someone")
+
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Errors
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -11,6 +11,7 @@ from _pytest.logging import LogCaptureFixture
 
 import did.base
 import did.cli
+import did.plugins.github
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Constants
@@ -200,3 +201,34 @@ def test_github_pull_requests_merged():
     assert any(
         "psss/did#214 - Enable copr builds in Packit" in str(stat)
         for stat in stats)
+
+
+def test_github_team_query(monkeypatch: pytest.MonkeyPatch):
+    """ Team query sent to GitHub, closed items searched per user """
+    queries = []
+
+    def search(self, query, limit=None):
+        queries.append(query)
+        return []
+
+    monkeypatch.setattr(did.plugins.github.GitHub, "search", search)
+    did.base.Config("""
+[general]
+email = alice@example.org
+
+[gh]
+type = github
+url = https://api.github.com/
+""")
+    did.cli.main([
+        "--gh-issues-created", "--gh-issues-closed", "--merge",
+        "--email", "alice@example.org", "--email", "bob@example.org",
+        "--since", "2015-09-05", "--until", "2015-09-06"])
+    assert sorted(queries) == sorted([
+        "search/issues?q=author:alice+author:bob"
+        "+created:2015-09-05..2015-09-06+type:issue",
+        "search/issues?q=assignee:alice"
+        "+closed:2015-09-05..2015-09-06+type:issue",
+        "search/issues?q=assignee:bob"
+        "+closed:2015-09-05..2015-09-06+type:issue",
+        ])
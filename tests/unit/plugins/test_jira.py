@@ -12,7 +12,8 @@ from _pytest.logging import LogCaptureFixture
 
 import did.base
 import did.cli
-from did.plugins.jira import JiraStatsGroup, JiraWorklog
+import did.plugins.jira
+from did.plugins.jira import Issue, JiraStatsGroup, JiraWorklog
 
 CONFIG = """
 [general]
@@ -387,3 +388,39 @@ worklog_enable = on
                                    "not found in stat string from position "
                                    "{start}: {stat_str}")
             start = new_start
+
+
+def test_team_query(monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Team queries are attributed or fall back to single users """
+    queries = []
+    people = {"JBEAP-1": "bob", "JBEAP-2": "alice", "JBEAP-3": "carol"}
+
+    def search(query: str, stats: Any, **kwargs: Any) -> list[Issue]:
+        queries.append(query)
+        keys = ["JBEAP-1", "JBEAP-2"] if "creator" in query else ["JBEAP-3"]
+        return [
+            Issue({"key": key, "fields": {
+                "summary": "Summary", "comment": {"comments": []},
+                "creator": {"name": people[key]},
+                "assignee": {"name": people[key]}}}, parent=stats.parent)
+            for key in keys]
+
+    monkeypatch.setattr(did.plugins.jira.Issue, "search", search)
+    did.base.Config(CONFIG)
+    gathered, _ = did.cli.main(
+        "--jira-created --jira-resolved --merge "
+        "--email alice@example.org --email bob@example.org "
+        "--since 2015-09-05 --until 2015-09-06")
+    interval = "2015-09-05 AND {0} < 2015-09-07 AND project in (JBEAP)"
+    assert sorted(queries) == sorted([
+        "creator in ('alice', 'bob') AND created >= "
+        + interval.format("created"),
+        "assignee in ('alice', 'bob') AND resolved >= "
+        + interval.format("resolved"),
+        "assignee = 'alice' AND resolved >= " + interval.format("resolved"),
+        "assignee = 'bob' AND resolved >= " + interval.format("resolved"),
+        ])
+    created = [
+        [issue.key for issue in user.stats[0].stats[0].stats]
+        for user in gathered]
+    assert created == [["JBEAP-2"], ["JBEAP-1"]]
@@ -2,11 +2,17 @@
 
 import configparser
 import datetime
+import http.server
+import os
 import sys
+import threading
+import time
 import unittest
+import xmlrpc.client
 from contextlib import contextmanager
+from pathlib import Path
 from tempfile import NamedTemporaryFile
-from typing import Iterator
+from typing import Iterator, Optional
 from unittest.mock import patch
 from uuid import uuid4
 
@@ -82,6 +88,43 @@ def test_config_sets_width_properly() -> None:
     assert config.width == 123
 
 
+def test_config_compiled() -> None:
+    config = did.base.Config("""
+[general]
+email = email@example.com
+workers = 3
+[jira]
+type = jira
+url = https://issues.example.com
+[jira-team]
+type = jira
+url = https://issues.example.com/team/
+""")
+    compiled = config.compiled
+    # The snapshot is reused until a new config is parsed
+    assert did.base.Config().compiled is compiled
+    assert config.workers == 3
+    assert config.sections(kind="jira") == ["jira", "jira-team"]
+    assert config.settings("jira")["type"] == "jira"
+    assert config.section("jira") == [("url", "https://issues.example.com")]
+    with pytest.raises(TypeError):
+        config.settings("jira")["url"] = "changed"  # type: ignore[index]
+    with pytest.raises(configparser.NoSectionError):
+        config.settings("missing")
+    with pytest.raises(configparser.NoSectionError):
+        config.section("missing")
+    # The longest matching url wins
+    url = "https://issues.example.com/team/rest"
+    assert did.base.Config.for_url(url)["url"].endswith("/team/")
+    assert "type" not in did.base.Config.for_url(url)
+    assert not did.base.Config.for_url("https://other.example.com")
+    # New config gets compiled again
+    config = did.base.Config("[general]\nemail = other@example.com\nworkers = 5\n")
+    assert config.compiled is not compiled
+    assert config.workers == 5
+    assert config.sections(kind="jira") == []
+
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Date
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -203,6 +246,26 @@ def test_date_addition_subtraction() -> None:
     assert str(did.base.Date('2018-12-02') - 2) == '2018-11-30'
 
 
+def test_date_split() -> None:
+    """ Split the period into smaller parts """
+    did.base.Config("[general]\nemail = test@example.com")
+    since, until = did.base.Date("2015-09-15"), did.base.Date("2015-12-02")
+    parts = did.base.Date.split(since, until, "month")
+    assert [(str(start), str(end)) for start, end, _ in parts] == [
+        ("2015-09-15", "2015-10-01"), ("2015-10-01", "2015-11-01"),
+        ("2015-11-01", "2015-12-01"), ("2015-12-01", "2015-12-02")]
+    assert parts[1][2] == "October 2015"
+    parts = did.base.Date.split(since, until, "quarter")
+    assert [str(start) for start, _, _ in parts] == ["2015-09-15", "2015-10-01"]
+    parts = did.base.Date.split(
+        did.base.Date("2015-09-30"), did.base.Date("2015-10-14"), "week")
+    assert [str(start) for start, _, _ in parts] == [
+        "2015-09-30", "2015-10-05", "2015-10-12"]
+    assert len(did.base.Date.split(since, until, "day")) == 78
+    with pytest.raises(did.base.OptionError):
+        did.base.Date.split(since, until, "decade")
+
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  User
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -433,3 +496,413 @@ def test_week_start_config_validation() -> None:
         "[general]\nweek_start = invalid\nemail = test@example.com")
     with pytest.raises(did.base.ConfigError, match=r"Invalid week_start"):
         _ = config.week_start
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Cache
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+CACHE_CONFIG = """
+[general]
+email = test@example.com
+cache_ttl = 100
+cache_size = 1
+
+[fast]
+type = git
+url = http://fast.example.org/
+cache_ttl = 0
+"""
+
+
+@contextmanager
+def _cache(directory: str, until: str) -> Iterator[None]:
+    did.base.Config(CACHE_CONFIG)
+    did.base.Cache.enable(
+        did.base.Date("2020-01-01"), did.base.Date(until), directory=directory)
+    try:
+        yield
+    finally:
+        did.base.Cache.disable()
+
+
+def test_cache_expiration(tmp_path: Path) -> None:
+    directory = str(tmp_path)
+    future = str(did.base.TODAY + datetime.timedelta(days=7))
+    with _cache(directory, future):
+        key = did.base.Cache.key("GET", "http://example.org/", None, [])
+        assert did.base.Cache.get(key) is None
+        did.base.Cache.put(key, "http://example.org/", 200, "OK", {}, b"data")
+        entry = did.base.Cache.get(key)
+        assert entry is not None
+        assert entry["body"] == b"data"
+        assert entry["expires"] is not None
+        # Credentials are part of the key
+        assert key != did.base.Cache.key(
+            "GET", "http://example.org/", None, [("Authorization", "x")])
+        # Per-section expiration, zero disables caching
+        key = did.base.Cache.key("GET", "http://fast.example.org/a", None, [])
+        did.base.Cache.put(key, "http://fast.example.org/a", 200, "OK", {}, b"")
+        assert did.base.Cache.get(key) is None
+    # Past periods expire much later
+    with _cache(directory, "2020-02-01"):
+        key = did.base.Cache.key("GET", "http://fast.example.org/a", None, [])
+        did.base.Cache.put(key, "http://fast.example.org/a", 200, "OK", {}, b"")
+        entry = did.base.Cache.get(key)
+        assert entry is not None
+        assert entry["expires"] > time.time() + did.base.DEFAULT_CACHE_TTL
+        # Responses setting cookies are not stored
+        key = did.base.Cache.key("GET", "http://example.org/login", None, [])
+        did.base.Cache.put(
+            key, "http://example.org/login", 200, "OK",
+            {"Set-Cookie": "session=secret"}, b"")
+        assert did.base.Cache.get(key) is None
+    # Disabled cache
+    assert did.base.Cache.key("GET", "http://example.org/", None, []) is None
+
+
+def test_cache_today(tmp_path: Path) -> None:
+    """ Periods including today are cached only if enabled """
+    did.base.Config("[general]\nemail = test@example.com\n")
+    until = did.base.Date(str(did.base.TODAY + datetime.timedelta(days=1)))
+    did.base.Cache.enable(
+        did.base.Date("2020-01-01"), until, directory=str(tmp_path))
+    try:
+        key = did.base.Cache.key("GET", "http://example.org/", None, [])
+        did.base.Cache.put(key, "http://example.org/", 200, "OK", {}, b"")
+        assert did.base.Cache.get(key) is None
+    finally:
+        did.base.Cache.disable()
+
+
+def test_cache_readonly() -> None:
+    """ Only GET and known read-only POST requests are cached """
+    readonly = did.base.Cache.readonly
+    assert readonly("GET", "http://example.org/", None)
+    assert not readonly("PUT", "http://example.org/", b"")
+    assert not readonly("POST", "http://example.org/login", b"user=me")
+    assert readonly(
+        "POST", "https://reviews.llvm.org/api/differential.revision.search",
+        b"limit=100")
+    search = xmlrpc.client.dumps(({"creator": "me"},), "Bug.search")
+    login = xmlrpc.client.dumps(({"login": "me"},), "User.login")
+    multicall = xmlrpc.client.dumps(([
+        {"methodName": "ticket.get", "params": [1]},
+        {"methodName": "ticket.changeLog", "params": [1]},
+        ],), "system.multicall")
+    url = "https://bugzilla.example.org/xmlrpc.cgi"
+    assert readonly("POST", url, search.encode())
+    assert readonly("POST", url, multicall.encode())
+    assert not readonly("POST", url, login.encode())
+
+
+def test_cache_eviction(tmp_path: Path) -> None:
+    directory = str(tmp_path)
+    with _cache(directory, "2020-02-01"):
+        keys = []
+        for index in range(3):
+            url = f"http://example.org/{index}"
+            keys.append(did.base.Cache.key("GET", url, None, []))
+            did.base.Cache.put(
+                keys[-1], url, 200, "OK", {}, b"x" * (did.base.MEGABYTE // 2))
+            os.utime(
+                os.path.join(directory, f"{keys[-1]}.json"), (index, index))
+        assert did.base.Cache.get(keys[0]) is None
+        assert did.base.Cache.get(keys[2]) is not None
+
+
+def test_cache_http(tmp_path: Path) -> None:
+    requests_served = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            requests_served.append(self.path)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b'{"fetched": true}')
+
+        def log_message(self, *_args: object) -> None:
+            pass
+
+    server = http.server.HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}/data"
+    try:
+        with _cache(str(tmp_path), "2020-02-01"):
+            for _ in range(2):
+                assert did.base.session(url).get(url).json() == {"fetched": True}
+                with did.base.urlopen(url) as response:
+                    assert response.getcode() == 200
+                    assert response.read() == b'{"fetched": true}'
+            did.base.Cache.refresh = True
+            did.base.session(url).get(url)
+    finally:
+        server.shutdown()
+        server.server_close()
+    # The first requests and the refresh reach the server
+    assert len(requests_served) == 3
+
+
+def test_cassette(tmp_path: Path) -> None:
+    requests_served = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            requests_served.append(self.path)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(f'{{"count": {len(requests_served)}}}'.encode())
+
+        def log_message(self, *_args: object) -> None:
+            pass
+
+    server = http.server.HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}/data"
+    path = str(tmp_path / "responses.gz")
+    try:
+        did.base.Cassette.record(path)
+        assert did.base.session(url).get(url).json() == {"count": 1}
+        assert did.base.session(url).get(url).json() == {"count": 2}
+        with did.base.urlopen(f"{url}?raw") as response:
+            assert response.read() == b'{"count": 3}'
+        did.base.Cassette.save()
+    finally:
+        did.base.Cassette.disable()
+        server.shutdown()
+        server.server_close()
+    # Responses are replayed in order without reaching the server
+    try:
+        did.base.Cassette.replay(path)
+        assert did.base.session(url).get(url).json() == {"count": 1}
+        assert did.base.session(url).get(url).json() == {"count": 2}
+        assert did.base.session(url).get(url).json() == {"count": 2}
+        with did.base.urlopen(f"{url}?raw") as response:
+            assert response.getcode() == 200
+            assert response.read() == b'{"count": 3}'
+        with pytest.raises(did.base.ReportError, match="No recorded response"):
+            did.base.session(url).get(f"{url}?missing")
+    finally:
+        did.base.Cassette.disable()
+    assert len(requests_served) == 3
+
+
+def test_single_flight() -> None:
+    requests_served = []
+    release = threading.Event()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            requests_served.append(self.path)
+            release.wait(5)
+            self.send_response(200)
+            if self.path.endswith("cookie"):
+                self.send_header("Set-Cookie", "session=secret")
+            self.end_headers()
+            self.wfile.write(self.path.encode())
+
+        def log_message(self, *_args: object) -> None:
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    results: list[bytes] = []
+
+    def fetch() -> None:
+        results.append(did.base.session(url).get(f"{url}/data").content)
+
+    did.base.SingleFlight.enable()
+    try:
+        # Concurrent identical requests share a single round-trip
+        threads = [threading.Thread(target=fetch) for _ in range(4)]
+        for fetcher in threads:
+            fetcher.start()
+        time.sleep(0.2)
+        release.set()
+        for fetcher in threads:
+            fetcher.join()
+        assert results == [b"/data"] * 4
+        # Later ones as well, unless headers differ or cookies are set
+        did.base.session(url).get(f"{url}/data")
+        did.base.session(url).get(f"{url}/data", headers={"Accept": "text/*"})
+        for _ in range(2):
+            did.base.session(url).get(f"{url}/cookie")
+    finally:
+        did.base.SingleFlight.disable()
+        server.shutdown()
+        server.server_close()
+    assert requests_served == ["/data", "/data", "/cookie", "/cookie"]
+
+
+def test_single_flight_size() -> None:
+    """ Least recently used shared responses are dropped """
+    def share(url: str) -> Optional[str]:
+        key = did.base.SingleFlight.key("GET", url, None, [])
+        if did.base.SingleFlight.get(key) is None:
+            did.base.SingleFlight.put(key, url, 200, "OK", {}, b"x" * 40)
+        return key
+
+    did.base.SingleFlight.enable()
+    size = did.base.SingleFlight.size
+    try:
+        did.base.SingleFlight.size = 100
+        first, second = share("http://a.example.org"), share("http://b.example.org")
+        # Recently used responses are kept
+        assert did.base.SingleFlight.get(first) is not None
+        share("http://c.example.org")
+        assert did.base.SingleFlight.get(first) is not None
+        assert did.base.SingleFlight.get(second) is None
+    finally:
+        did.base.SingleFlight.size = size
+        did.base.SingleFlight.disable()
+
+
+def test_rate_limit() -> None:
+    url = "https://limited.example.org/api/search"
+    did.base.RateLimit.clear()
+    try:
+        # Unknown hosts and hosts with requests left are not delayed
+        start = time.monotonic()
+        did.base.RateLimit.wait(url)
+        did.base.RateLimit.update(url, 200, {
+            "X-RateLimit-Remaining": "1",
+            "X-RateLimit-Reset": str(time.time() + 0.3)})
+        did.base.RateLimit.wait(url)
+        did.base.RateLimit.wait("https://other.example.org/")
+        assert time.monotonic() - start < 0.2
+        # Empty bucket makes all threads wait for the reset
+        threads = [
+            threading.Thread(target=did.base.RateLimit.wait, args=(url,))
+            for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert 0.2 < time.monotonic() - start < 2
+        # Too many requests with a retry delay block the host
+        start = time.monotonic()
+        did.base.RateLimit.update(url, 429, {"Retry-After": "0.3"})
+        did.base.RateLimit.wait(url)
+        assert 0.2 < time.monotonic() - start < 2
+    finally:
+        did.base.RateLimit.clear()
+
+
+def test_rate_limit_resources() -> None:
+    host = "https://api.limited.example.org"
+    did.base.RateLimit.clear()
+    try:
+        # Exhausted search limit does not delay the core requests
+        did.base.RateLimit.update(f"{host}/search/issues?q=a", 200, {
+            "X-RateLimit-Resource": "search",
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset": str(time.time() + 0.3)})
+        did.base.RateLimit.update(f"{host}/repos/psss/did", 200, {
+            "X-RateLimit-Resource": "core",
+            "X-RateLimit-Remaining": "100",
+            "X-RateLimit-Reset": str(time.time() + 60)})
+        start = time.monotonic()
+        did.base.RateLimit.wait(f"{host}/repos/psss/did/issues/1")
+        assert time.monotonic() - start < 0.2
+        # Search requests wait for the reset of the search limit
+        did.base.RateLimit.wait(f"{host}/search/issues?q=b")
+        assert 0.2 < time.monotonic() - start < 2
+    finally:
+        did.base.RateLimit.clear()
+
+
+def test_inflight_limit() -> None:
+    did.base.Config("""
+[general]
+email = test@example.com
+[fragile]
+type = bugzilla
+url = https://fragile.example.org/
+max_inflight_requests = 2
+""")
+    url = "https://fragile.example.org/rest/bug"
+    assert did.base.InflightLimit.limit(url) == 2
+    assert did.base.InflightLimit.limit("https://other.example.org/") == 0
+    lock = threading.Lock()
+    running = []
+    maximum = []
+
+    def request() -> None:
+        with did.base.InflightLimit.slot(url):
+            with lock:
+                running.append(1)
+                maximum.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+
+    threads = [threading.Thread(target=request) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(maximum) == 2
+    did.base.InflightLimit.clear()
+    did.base.Config("""
+[general]
+email = test@example.com
+[fragile]
+url = https://fragile.example.org/
+max_inflight_requests = many
+""")
+    with pytest.raises(did.base.ConfigError):
+        did.base.InflightLimit.limit(url)
+
+
+def test_session_pool() -> None:
+    did.base.Config("""
+[general]
+email = test@example.com
+
+[slow]
+type = git
+url = https://slow.example.org/api
+pool_size = 2
+keep_alive = no
+retries = 5
+timeout = 7
+""")
+    shared = did.base.session("https://slow.example.org/api/search")
+    assert shared is did.base.session("https://slow.example.org/api/issues")
+    assert shared is not did.base.session("https://other.example.org/")
+    assert shared.headers["Connection"] == "close"
+    adapter = shared.get_adapter("https://slow.example.org/")
+    assert isinstance(adapter, did.base.CachedAdapter)
+    assert adapter.timeout == 7
+    assert adapter.max_retries.total == 5
+    # Private sessions share the connection pool
+    private = did.base.session("https://slow.example.org/api", private=True)
+    assert private is not shared
+    assert private.get_adapter("https://slow.example.org/") is adapter
+    # Plugins retrying on their own get no adapter retries
+    retrying = did.base.session("https://slow.example.org/api", retry=False)
+    assert retrying.get_adapter("https://slow.example.org/").max_retries.total == 0
+
+
+def test_logins() -> None:
+    """ Authenticated sessions are shared until expired """
+    did.base.Logins.clear()
+    key = did.base.Logins.key("jira", "https://example.org", "secret")
+    assert key != did.base.Logins.key("jira", "https://example.org", "other")
+    assert did.base.Logins.get(key) is None
+    first = did.base.session("https://example.org", private=True)
+    did.base.Logins.put(key, first)
+    assert did.base.Logins.get(key) is first
+    # Session already replaced by another thread is kept
+    second = did.base.session("https://example.org", private=True)
+    did.base.Logins.put(key, second)
+    did.base.Logins.forget(key, first)
+    assert did.base.Logins.get(key) is second
+    did.base.Logins.forget(key, second)
+    assert did.base.Logins.get(key) is None
@@ -1,13 +1,19 @@
 # coding: utf-8
 """ Tests for the command line script """
 
+import json
 import os
 import re
+from pathlib import Path
 
 import pytest
 
 import did.base
 import did.cli
+import did.plugins.bugzilla
+import did.plugins.items
+import did.plugins.sentry
+import did.stats
 import did.utils
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -72,3 +78,163 @@ def test_conflicting_options() -> None:
     for argument in ["last week --since 2025-05-29", "last week --until 2025-05-29"]:
         with pytest.raises(did.base.OptionError):
             did.cli.main(argument)
+
+
+def test_parallel_users() -> None:
+    """ Gather stats for multiple users concurrently, keep the order """
+    did.base.Config(config=MINIMAL)
+    emails = [f"user{index}@example.org" for index in range(5)]
+    arguments = [f"--email={email}" for email in emails]
+    for parallel in ["1", "3"]:
+        gathered_stats, _ = did.cli.main(
+            arguments + ["--parallel", parallel, "--merge"])
+        assert [
+            stats.user.email for stats in gathered_stats
+            if stats.user is not None] == emails
+
+
+def test_asyncio_engine(capsys: pytest.CaptureFixture[str]) -> None:
+    """ Gather stats using the asyncio engine, keep the order """
+    did.base.Config(config=f"""{MINIMAL}
+[tasks]
+type = items
+header = Work on tasks
+item1 = Task One
+""")
+    emails = [f"user{index}@example.org" for index in range(3)]
+    arguments = [f"--email={email}" for email in emails]
+    capsys.readouterr()
+    did.cli.main(arguments + [
+        "--engine", "asyncio", "--parallel", "2", "--format", "ndjson"])
+    records = [
+        json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [record["user"] for record in records] == emails
+    assert {record["text"] for record in records} == {"Task One"}
+
+
+def test_json_output(capsys: pytest.CaptureFixture[str]) -> None:
+    """ One record per item in the json and ndjson output """
+    did.base.Config(config=f"""{MINIMAL}
+[tasks]
+type = items
+header = Work on tasks
+item1 = Task One
+item2 = Task Two
+""")
+    arguments = ["--email=user@example.org", "--email=other@example.org"]
+    capsys.readouterr()
+    did.cli.main(arguments + ["--format", "ndjson"])
+    records = [
+        json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert len(records) == 4
+    assert records[0] == {
+        "user": "user@example.org", "section": "tasks", "stats": "tasks-item",
+        "name": "Work on tasks", "text": "Task One"}
+    assert records[3]["user"] == "other@example.org"
+    did.cli.main(arguments + ["--format", "json", "--merge", "--brief"])
+    records = json.loads(capsys.readouterr().out)
+    assert records == [{
+        "user": None, "section": "tasks", "stats": "tasks-item",
+        "name": "Work on tasks", "count": 2}]
+
+
+def test_split(capsys: pytest.CaptureFixture[str]) -> None:
+    """ Records of each part of the period marked with its dates """
+    did.base.Config(config=f"""{MINIMAL}
+[tasks]
+type = items
+header = Work on tasks
+item1 = Task One
+""")
+    capsys.readouterr()
+    did.cli.main([
+        "--email=user@example.org", "--format", "ndjson",
+        "--since", "2015-09-15", "--until", "2015-11-10", "--split", "month"])
+    records = [
+        json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(record["since"], record["until"]) for record in records] == [
+        ("2015-09-15", "2015-09-30"), ("2015-10-01", "2015-10-31"),
+        ("2015-11-01", "2015-11-10")]
+
+
+def test_split_undated(monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Stats without dated items are fetched for each part only """
+    did.base.Config(config=f"""{MINIMAL}
+[tasks]
+type = items
+header = Work on tasks
+item1 = Task One
+""")
+    periods = []
+    fetch = did.plugins.items.ItemStats.fetch
+
+    def counting_fetch(self: did.plugins.items.ItemStats) -> None:
+        periods.append(str(self.options.since))
+        fetch(self)
+
+    monkeypatch.setattr(did.plugins.items.ItemStats, "fetch", counting_fetch)
+    did.cli.main([
+        "--email=user@example.org", "--format", "ndjson",
+        "--since", "2015-09-15", "--until", "2015-11-10", "--split", "month"])
+    assert periods == ["2015-09-15", "2015-10-01", "2015-11-01"]
+
+
+def test_record_failed(
+        tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Failed report saves the recording, cleans up the state """
+    did.base.Config(config=f"""{MINIMAL}
+[tasks]
+type = items
+header = Work on tasks
+item1 = Task One
+""")
+
+    def failing_fetch(self: did.plugins.items.ItemStats) -> None:
+        raise RuntimeError("Fetch failed")
+
+    monkeypatch.setattr(did.plugins.items.ItemStats, "fetch", failing_fetch)
+    cassette = tmp_path / "cassette.json.gz"
+    with pytest.raises(RuntimeError):
+        did.cli.main([
+            "--email=user@example.org", "--record", str(cassette)])
+    assert cassette.exists()
+    # The shared state is cleaned up for the records output as well
+    with pytest.raises(RuntimeError):
+        did.cli.main([
+            "--email=user@example.org", "--format", "ndjson",
+            "--deadline", "60"])
+    assert did.stats.Deadline.end is None
+    assert not did.base.SingleFlight.enabled
+
+
+def test_split_history(monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Bugzilla and sentry stats are fetched for each part only """
+    did.base.Config(config=f"""{MINIMAL}
+[bz]
+type = bugzilla
+url = https://bugzilla.example.org/xmlrpc.cgi
+prefix = BZ
+
+[sentry]
+type = sentry
+url = https://sentry.example.org/api/0/
+organization = team
+token = secret
+""")
+    periods = []
+
+    def recording_fetch(self: did.stats.Stats) -> None:
+        periods.append((self.option, str(self.options.since)))
+        self.stats = []
+
+    monkeypatch.setattr(
+        did.plugins.bugzilla.VerifiedBugs, "fetch", recording_fetch)
+    monkeypatch.setattr(
+        did.plugins.sentry.ResolvedIssues, "fetch", recording_fetch)
+    did.cli.main([
+        "--email=user@example.org", "--format", "ndjson",
+        "--bz-verified", "--sentry-resolved",
+        "--since", "2015-09-15", "--until", "2015-10-10", "--split", "month"])
+    assert sorted(periods) == [
+        ("bz-verified", "2015-09-15"), ("bz-verified", "2015-10-01"),
+        ("sentry-resolved", "2015-09-15"), ("sentry-resolved", "2015-10-01")]
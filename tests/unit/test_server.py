@@ -0,0 +1,125 @@
+# coding: utf-8
+""" Tests for the report server """
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from typing import Iterator
+
+import pytest
+
+import did.base
+import did.server
+
+CONFIG = f"""{did.base.Config.example()}
+[tasks]
+type = items
+header = Work on tasks
+item1 = Task One
+"""
+
+
+@pytest.fixture(name="server")
+def fixture_server() -> Iterator[str]:
+    """ Report server running on a random port """
+    did.base.Config(config=CONFIG)
+    server = did.server.Server(port=0)
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    yield server.address
+    server.shutdown()
+    thread.join()
+
+
+def test_health(server: str) -> None:
+    """ Health check """
+    with urllib.request.urlopen(f"{server}/health") as response:
+        assert response.read() == b"OK\n"
+
+
+def test_report(server: str) -> None:
+    """ Reports accept the command line arguments """
+    url = f"{server}/report?args=--email+user@example.org+--format+ndjson"
+    with urllib.request.urlopen(url) as response:
+        assert response.headers["Content-Type"].startswith("application/x-ndjson")
+        record = json.loads(response.read())
+    assert record["user"] == "user@example.org"
+    assert record["text"] == "Task One"
+    # Arguments posted as a json list, text output by default
+    request = urllib.request.Request(
+        f"{server}/report", data=b'["last", "week"]',
+        headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        output = response.read().decode("utf-8")
+    assert output.startswith("Status report for the week")
+    assert "* Task One" in output
+
+
+def test_invalid_arguments(server: str) -> None:
+    """ Invalid arguments are reported as a bad request """
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(f"{server}/report?args=something")
+    assert error.value.code == 400
+    assert b"Invalid argument" in error.value.read()
+
+
+def test_invalid_date_range(server: str) -> None:
+    """ Errors raised while generating the report are responded """
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(
+            f"{server}/report?args=--since+2024-02-01+--until+2024-01-01")
+    assert error.value.code == 400
+    assert b"Invalid date range" in error.value.read()
+
+
+def test_options_not_allowed(server: str) -> None:
+    """ Options reading or writing files are rejected """
+    for args in ["--config+/etc/passwd", "--record=/tmp/did", "--rec+x"]:
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{server}/report?args={args}")
+        assert error.value.code == 400
+        assert b"not allowed" in error.value.read()
+    # Stats switches are fine
+    with urllib.request.urlopen(f"{server}/report?args=--tasks") as response:
+        assert b"* Task One" in response.read()
+
+
+def test_forbidden(server: str) -> None:
+    """ Cross-site requests and other host names are rejected """
+    for headers in [
+            {"Sec-Fetch-Site": "cross-site"},
+            {"Origin": "https://example.org"},
+            {"Host": "attacker.example.org"}]:
+        request = urllib.request.Request(f"{server}/report", headers=headers)
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request)
+        assert error.value.code == 403
+    # Arguments have to be posted as json
+    request = urllib.request.Request(
+        f"{server}/report", data=b"last week",
+        headers={"Content-Type": "text/plain"})
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(request)
+    assert error.value.code == 415
+
+
+def test_token() -> None:
+    """ Server with a token requires it from the clients """
+    did.base.Config(config=CONFIG)
+    server = did.server.Server(port=0, token="secret")
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    try:
+        url = f"{server.address}/report?args=--tasks"
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(url)
+        assert error.value.code == 403
+        request = urllib.request.Request(url, headers={
+            "Authorization": "Bearer secret",
+            "Host": "did.example.org"})
+        with urllib.request.urlopen(request) as response:
+            assert b"* Task One" in response.read()
+    finally:
+        server.shutdown()
+        thread.join()
@@ -1,5 +1,14 @@
 # coding: utf-8
 
+import argparse
+import asyncio
+import datetime
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
 from typing import Optional
 
 import pytest
@@ -50,6 +59,39 @@ class MyTestStatsGroup(did.stats.StatsGroup):
         super().check()
 
 
+class ConcurrentTask():
+    """ Task recording the maximum number of its concurrent runs """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.running = 0
+        self.maximum = 0
+
+    def __call__(self) -> None:
+        with self.lock:
+            self.running += 1
+            self.maximum = max(self.maximum, self.running)
+        time.sleep(0.01)
+        with self.lock:
+            self.running -= 1
+
+
+class IdentifiedItem():
+    """ Dated item with an identity """
+
+    def __init__(self, number: int, title: str, date: str) -> None:
+        self.number = number
+        self.title = title
+        self.date = date
+
+    def __str__(self) -> str:
+        return f"#{self.number} - {self.title}"
+
+    @property
+    def identity(self) -> tuple[str, int]:
+        return ("project", self.number)
+
+
 def test_stats_class(capsys: pytest.CaptureFixture[str]) -> None:
     mystat = did.stats.Stats("test_stat")
     assert mystat.name == "General statistics"
@@ -171,6 +213,43 @@ def test_userstats_class(capsys: pytest.CaptureFixture[str]) -> None:
         "    * Fetched second\n")
 
 
+def test_plugin_topology() -> None:
+    config = did.base.Config(f"""{did.base.Config.example()}
+[head]
+type = header
+order = 5
+first = First
+""")
+    topology = did.stats.PluginTopology.get()
+    assert did.stats.PluginTopology.get(config) is topology
+    assert [(section, overrides) for section, _, overrides in topology.plugins] == [
+        ("head", {"order": 5})]
+    sample = topology.sample
+    assert topology.sample is sample
+    assert sample.stats[0].order == 5
+
+    # Team stats are copied from the sample, nothing shared
+    options = argparse.Namespace(head=True)
+    team = topology.team(options)
+    assert team is not sample
+    assert [stat.option for stat in team.stats] == ["head"]
+    group = team.stats[0]
+    assert group is not sample.stats[0]
+    assert group.parent is team and group.options is options
+    assert group.stats[0].parent is group and group.stats[0].options is options
+    user_stats = did.stats.UserStats(
+        user=did.base.User(email=config.email), options=options)
+    user_stats.stats[0].stats[0].stats = ["item"]
+    team.merge(user_stats)
+    assert group.stats[0].stats == ["item"]
+    assert sample.stats[0].stats[0].stats == []
+
+    # New config gets a new topology
+    did.base.Config(did.base.Config.example())
+    assert did.stats.PluginTopology.get() is not topology
+    assert did.stats.PluginTopology.get().plugins == []
+
+
 def test_emptystats_class(capsys: pytest.CaptureFixture[str]) -> None:
     empty = did.stats.EmptyStats("empty_stat")
     empty.fetch()
@@ -190,3 +269,493 @@ def test_emptystatsgroup_class(capsys: pytest.CaptureFixture[str]) -> None:
     empty.show()
     captured = capsys.readouterr()
     assert captured.out == "* First Empty\n* Second Empty\n"
+
+
+def test_scheduler_limits() -> None:
+    scheduler = did.stats.Scheduler(workers=8, host_workers=2)
+    task = ConcurrentTask()
+    futures = [scheduler.submit(task, host="example.org") for _ in range(10)]
+    scheduler.wait(futures)
+    assert all(future.done() for future in futures)
+    assert task.maximum <= 2
+    did.stats.Scheduler(host_workers=did.base.DEFAULT_HOST_WORKERS)
+
+
+def test_section_limits(monkeypatch: pytest.MonkeyPatch) -> None:
+    config = did.base.Config(f"""{did.base.Config.example()}
+[slow]
+type = empty
+priority = 10
+max_workers = 1
+[head]
+type = header
+priority = 5
+first = First
+""")
+    monkeypatch.setitem(
+        did.stats.StatsGroupPlugin.registry, "empty", MyTestStatsGroup)
+    user_stats = did.stats.UserStats(user=did.base.User(email=config.email))
+    slow, head = sorted(user_stats.stats, key=lambda stat: stat.option, reverse=True)
+    assert (slow.priority, slow.max_workers) == (10, 1)
+    assert (head.priority, head.max_workers) == (5, None)
+    # Common section options are not plugin items
+    assert [stat.name for stat in head.stats] == ["First"]
+
+    # Section limit overrides the default plugin limit
+    scheduler = did.stats.Scheduler(workers=8)
+    task = ConcurrentTask()
+    futures = [
+        scheduler.submit(task, plugin="slow", plugin_workers=1)
+        for _ in range(5)]
+    scheduler.wait(futures)
+    assert task.maximum == 1
+    did.stats.Scheduler(workers=did.base.DEFAULT_WORKERS)
+
+
+def test_scheduler_priority() -> None:
+    scheduler = did.stats.Scheduler(workers=1)
+    started = threading.Event()
+    release = threading.Event()
+    order: list[str] = []
+
+    def blocker() -> None:
+        started.set()
+        release.wait()
+
+    first = scheduler.submit(blocker)
+    started.wait()
+    futures = [
+        scheduler.submit(lambda: order.append("low"), priority=-1),
+        scheduler.submit(lambda: order.append("normal")),
+        scheduler.submit(lambda: order.append("high"), priority=1),
+        ]
+    release.set()
+    scheduler.wait([first] + futures)
+    assert order == ["high", "normal", "low"]
+    did.stats.Scheduler(workers=did.base.DEFAULT_WORKERS)
+
+
+def test_scheduler_nested_groups() -> None:
+    """ Nested groups must not exhaust a tiny pool """
+    did.stats.Scheduler(workers=1)
+    outer = did.stats.StatsGroup("outer")
+    for index in range(3):
+        inner = MyTestStatsGroup(f"inner{index}", parent=outer)
+        outer.stats.append(inner)
+    outer.check()
+    assert [
+        [stat.stats for stat in group.stats] for group in outer.stats
+        ] == [[["Fetched first"], ["Fetched second"]]] * 3
+    did.stats.Scheduler(workers=did.base.DEFAULT_WORKERS)
+
+
+def test_scheduler_nested_groups_on_worker() -> None:
+    """ Two levels of groups checked by the only worker thread """
+    scheduler = did.stats.Scheduler(workers=1)
+    try:
+        outer = did.stats.StatsGroup("outer")
+        for index in range(2):
+            middle = did.stats.StatsGroup(f"middle{index}", parent=outer)
+            middle.stats = [
+                MyTestStatsGroup(f"inner{index}", parent=middle),
+                MyTestStats(f"leaf{index}", parent=middle)]
+            outer.stats.append(middle)
+        future = scheduler.submit(outer.check, leaf=False)
+        future.result(timeout=5)
+        assert [
+            [stat.stats for stat in middle.stats[0].stats] + [
+                middle.stats[1].stats]
+            for middle in outer.stats] == [
+            [["Fetched first"], ["Fetched second"], ["Fetched leaf0"]],
+            [["Fetched first"], ["Fetched second"], ["Fetched leaf1"]]]
+    finally:
+        did.stats.Scheduler(workers=did.base.DEFAULT_WORKERS)
+
+
+class MyItem:
+    """ Item identified by its id """
+
+    def __init__(self, id_: int, text: str) -> None:
+        self.identity = id_
+        self.text = text
+
+
+class MyUnhashableItem:
+    """ Item with equality but no hash """
+
+    def __init__(self, id_: int) -> None:
+        self.id = id_
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, MyUnhashableItem) and self.id == other.id
+
+    __hash__ = None  # type: ignore[assignment]
+
+
+def test_stats_list() -> None:
+    stats = did.stats.StatsList(["one", MyItem(1, "first")])
+    assert "one" in stats
+    assert MyItem(1, "other text") in stats
+    assert MyItem(2, "first") not in stats
+    stats.append(MyUnhashableItem(3))
+    assert MyUnhashableItem(3) in stats
+    stats.remove("one")
+    assert "one" not in stats
+    stats += ["two"]
+    assert "two" in stats
+    assert [type(item) for item in stats] == [MyItem, MyUnhashableItem, str]
+
+
+def test_stats_merge_index() -> None:
+    mystat = MyTestStats("test_stat")
+    mystat.stats = [MyItem(1, "first"), "second"]
+    assert isinstance(mystat.stats, did.stats.StatsList)
+    other = MyTestStats("test_stat")
+    other.stats = [MyItem(1, "duplicate"), "second", "third", MyUnhashableItem(4)]
+    mystat.merge(other)
+    mystat.merge(other)
+    assert [getattr(item, "text", item) for item in mystat.stats][:3] == [
+        "first", "second", "third"]
+    assert len(mystat.stats) == 4
+
+
+def test_statsgroup_stream() -> None:
+    """ Completed children are yielded in order without waiting """
+    release = threading.Event()
+
+    class BlockedStats(MyTestStats):
+        def fetch(self) -> None:
+            release.wait()
+            super().fetch()
+
+    group = did.stats.StatsGroup("stream")
+    group.stats = [
+        MyTestStats("fast", parent=group),
+        BlockedStats("slow", parent=group),
+        ]
+    stream = group.stream()
+    assert next(stream).stats == ["Fetched fast"]
+    assert not group.stats[1].stats
+    release.set()
+    assert next(stream).stats == ["Fetched slow"]
+    # Children are checked only once
+    group.stats[0].stats = []
+    group.check()
+    assert list(group.stream()) == group.stats
+    assert group.stats[0].stats == []
+
+
+def test_statsgroup_team() -> None:
+    """ Team queries fill stats of all members in chunks """
+    queries = []
+
+    class TeamStats(MyTestStats):
+        team_size = 2
+
+        def fetch_team(self, team: list[did.stats.Stats]) -> None:
+            queries.append([member.user.login for member in team])
+            for member in team:
+                assert member.user is not None
+                member.stats = [f"Fetched {member.user.login}"]
+
+    def group(email: str) -> did.stats.StatsGroup:
+        user = did.base.User(email)
+        stats_group = did.stats.StatsGroup("team", user=user)
+        stats_group.stats = [
+            TeamStats("batched", parent=stats_group),
+            MyTestStats("single", parent=stats_group)]
+        return stats_group
+
+    team = [group(f"{login}@example.org") for login in ("one", "two", "three")]
+    team[0].check_team(team)
+    assert queries == [["one", "two"]]
+    assert [member.stats[1].stats for member in team] == [[], [], []]
+    for member in team:
+        member.check()
+    # The last user alone is fetched as usual
+    assert [member.stats[0].stats for member in team] == [
+        ["Fetched one"], ["Fetched two"], ["Fetched batched"]]
+    assert queries == [["one", "two"]]
+    assert [member.stats[1].stats for member in team] == [["Fetched single"]] * 3
+
+
+def test_statsgroup_team_selected() -> None:
+    """ Team queries are used for stats selected without their group """
+    queries = []
+
+    class TeamStats(MyTestStats):
+        team_size = 2
+
+        def fetch_team(self, team: list[did.stats.Stats]) -> None:
+            queries.append(len(team))
+            for member in team:
+                member.stats = []
+
+    options = argparse.Namespace(
+        user=False, team=False, team_batched=True, team_single=False)
+    team = []
+    for login in ("one", "two"):
+        user = did.base.User(f"{login}@example.org")
+        member = did.stats.StatsGroup("user", user=user, options=options)
+        group = did.stats.StatsGroup(
+            "team", parent=member, user=user, options=options)
+        group.stats = [
+            TeamStats("team-batched", parent=group, options=options),
+            TeamStats("team-single", parent=group, options=options)]
+        member.stats = [group]
+        team.append(member)
+    team[0].check_team(team)
+    assert queries == [2]
+    assert [member.stats[0].stats[1]._filled for member in team] == [
+        False, False]
+
+
+@pytest.mark.parametrize(
+    ("module", "batched"),
+    [
+        ("git", {"GitCommits"}),
+        ("github", {"IssuesCreated", "PullRequestsCreated"}),
+        ("bugzilla", set()),
+        ("gerrit", set()),
+        ("phabricator", set()),
+        ],
+    )
+def test_team_plugins(module: str, batched: set[str]) -> None:
+    """ Only the listed stats support team queries """
+    plugin = __import__(f"did.plugins.{module}", fromlist=[module])
+    supported = {
+        name for name, value in vars(plugin).items()
+        if isinstance(value, type) and issubclass(value, did.stats.Stats)
+        and value.__module__ == plugin.__name__ and value.team_size > 1}
+    assert supported == batched
+
+
+def test_deadline(capsys: pytest.CaptureFixture[str]) -> None:
+    """ Stats not checked before the deadline are marked timed out """
+    release = threading.Event()
+
+    class BlockedStats(MyTestStats):
+        def fetch(self) -> None:
+            release.wait()
+            super().fetch()
+
+    checked = did.stats.StatsGroup("deadline")
+    checked.stats = [
+        MyTestStats("fast", "Fast", parent=checked),
+        BlockedStats("slow", "Slow", parent=checked),
+        ]
+    capsys.readouterr()
+    try:
+        did.stats.Deadline.start(0.2)
+        checked.check()
+        assert [stat.timeout for stat in checked.stats] == [False, True]
+        checked.show()
+        assert capsys.readouterr().out.splitlines() == [
+            "* Fast: 1", "    * Fetched fast", "* Slow: ? (timeout)"]
+        assert list(checked.records())[-1]["timeout"] is True
+    finally:
+        did.stats.Deadline.clear()
+        release.set()
+
+
+def test_statsgroup_async() -> None:
+    """ Asyncio engine awaits native fetches, others run in threads """
+    threads = {}
+
+    class ThreadStats(MyTestStats):
+        def fetch(self) -> None:
+            threads[self.option] = threading.current_thread()
+            super().fetch()
+
+    class NativeStats(MyTestStats):
+        async def afetch(self) -> None:
+            threads[self.option] = threading.current_thread()
+            self.fetch()
+
+    outer = did.stats.StatsGroup("outer")
+    outer.stats = [
+        ThreadStats("sync", parent=outer),
+        NativeStats("native", parent=outer),
+        MyTestStatsGroup("custom", parent=outer),
+        ]
+    asyncio.run(outer.acheck())
+    assert threads["native"] is threading.current_thread()
+    assert threads["sync"] is not threading.current_thread()
+    assert outer.stats[0].stats == ["Fetched sync"]
+    assert outer.stats[1].stats == ["Fetched native"]
+    assert [stat.stats for stat in outer.stats[2].stats] == [
+        ["Fetched first"], ["Fetched second"]]
+    # Streaming the checked group does not check the children again
+    assert list(outer.stream()) == outer.stats
+
+
+def test_deadline_async() -> None:
+    """ Asyncio engine marks stats not checked in time as timed out """
+    release = threading.Event()
+
+    class BlockedStats(MyTestStats):
+        def fetch(self) -> None:
+            release.wait()
+            super().fetch()
+
+    checked = did.stats.StatsGroup("deadline")
+    checked.stats = [
+        MyTestStats("fast", "Fast", parent=checked),
+        BlockedStats("slow", "Slow", parent=checked),
+        ]
+    try:
+        did.stats.Deadline.start(0.2)
+        asyncio.run(checked.acheck())
+        assert [stat.timeout for stat in checked.stats] == [False, True]
+    finally:
+        did.stats.Deadline.clear()
+        release.set()
+
+
+def test_snapshot(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Incremental mode fetches only items since the watermark """
+    fetched = []
+
+    class DatedItem:
+        def __init__(self, date: str) -> None:
+            self.date = date
+
+        def __str__(self) -> str:
+            return f"Item {self.date}"
+
+    class DatedStats(MyTestStats):
+        date_field = "date"
+
+        def fetch(self) -> None:
+            fetched.append(str(self.options.since))
+            self.stats = [
+                DatedItem(date) for date in sorted(dates, reverse=newest_first)
+                if str(self.options.since) <= date < str(self.options.until)]
+
+    def check() -> list[str]:
+        options = argparse.Namespace(
+            since=did.base.Date("2015-01-01"), until=did.base.Date("2015-12-31"),
+            format="text", verbose=False, full_message=False)
+        stats = DatedStats("dated", options=options)
+        stats.check()
+        return [str(item) for item in stats.stats]
+
+    did.base.Config(EMPTY_CONFIG)
+    did.stats.Snapshot.enable(directory=str(tmp_path))
+    newest_first = False
+    try:
+        monkeypatch.setattr(did.base, "TODAY", datetime.date(2015, 3, 10))
+        dates = ["2015-01-05", "2015-03-09"]
+        assert check() == ["Item 2015-01-05", "Item 2015-03-09"]
+        # Items before the watermark are taken from the snapshot
+        monkeypatch.setattr(did.base, "TODAY", datetime.date(2015, 4, 1))
+        dates = ["2015-03-09", "2015-03-20"]
+        assert check() == [
+            "Item 2015-01-05", "Item 2015-03-09", "Item 2015-03-20"]
+        assert fetched == ["2015-01-01", "2015-03-09"]
+        # Order of the items listed from the newest ones is kept
+        newest_first = True
+        did.stats.Snapshot.enable(directory=str(tmp_path / "newest"))
+        monkeypatch.setattr(did.base, "TODAY", datetime.date(2015, 3, 10))
+        dates = ["2015-01-05", "2015-03-09"]
+        assert check() == ["Item 2015-03-09", "Item 2015-01-05"]
+        monkeypatch.setattr(did.base, "TODAY", datetime.date(2015, 4, 1))
+        dates = ["2015-03-09", "2015-03-20"]
+        assert check() == [
+            "Item 2015-03-20", "Item 2015-03-09", "Item 2015-01-05"]
+    finally:
+        did.stats.Snapshot.disable()
+
+
+def test_snapshot_identity(
+        tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Stored items keep their identity for merging and dedupe """
+    items: list[IdentifiedItem] = []
+
+    class IdentifiedStats(MyTestStats):
+        date_field = "date"
+
+        def fetch(self) -> None:
+            # Items older than the watermark are returned as well
+            self.stats = list(items)
+
+    options = argparse.Namespace(
+        since=did.base.Date("2015-01-01"), until=did.base.Date("2015-12-31"),
+        format="text", verbose=False, full_message=False)
+    did.base.Config(EMPTY_CONFIG)
+    did.stats.Snapshot.enable(directory=str(tmp_path))
+    try:
+        monkeypatch.setattr(did.base, "TODAY", datetime.date(2015, 3, 10))
+        items = [IdentifiedItem(1, "First", "2015-03-01")]
+        IdentifiedStats("identified", options=options).check()
+        # Item fetched again with a new title replaces the stored one
+        monkeypatch.setattr(did.base, "TODAY", datetime.date(2016, 2, 1))
+        items = [IdentifiedItem(1, "Renamed", "2015-03-01")]
+        stats = IdentifiedStats("identified", options=options)
+        stats.check()
+        assert [str(item) for item in stats.stats] == ["#1 - Renamed"]
+        # Stored item merged with the live one of another user
+        stored = IdentifiedStats("identified", options=options)
+        stored.check()
+        assert isinstance(stored.stats[0], did.stats.SnapshotItem)
+        assert stored.stats[0].identity == ("project", 1)
+        live = IdentifiedStats("identified", options=options)
+        live.stats = [IdentifiedItem(1, "Renamed again", "2015-03-01")]
+        team = IdentifiedStats("identified", options=options)
+        team.merge(stored)
+        team.merge(live)
+        assert [str(item) for item in team.stats] == ["#1 - Renamed"]
+    finally:
+        did.stats.Snapshot.disable()
+
+
+def test_plugin_lookup() -> None:
+    available = did.stats.StatsGroupPlugin.available()
+    assert available["git"] == "did.plugins.git"
+    assert "header" in available
+    git = did.stats.StatsGroupPlugin.lookup("git")
+    assert git is not None
+    assert git.__module__ == "did.plugins.git"
+    assert did.stats.StatsGroupPlugin.lookup("nonexistent") is None
+
+
+def test_plugins_imported_lazily() -> None:
+    """ Only configured plugins are imported """
+    code = (
+        "import sys, did.base, did.stats\n"
+        "did.base.Config('[general]\\nemail = a@b.c\\n"
+        "[repos]\\ntype = git\\n')\n"
+        "did.stats.UserStats(user=did.base.User('a@b.c'))\n"
+        "print(sorted(name for name in sys.modules "
+        "if name.startswith('did.plugins.')))\n")
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True,
+        capture_output=True, text=True).stdout
+    assert output.strip() == "['did.plugins.git']"
+
+
+def test_plugin_manifest(
+        tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("DID_DIR", str(tmp_path))
+    package = tmp_path / "manifest_plugins"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    plugin = package / "manifest_stats.py"
+    plugin.write_text(
+        "from did.stats import StatsGroup\n\n\n"
+        "class ManifestStats(StatsGroup):\n"
+        "    pass\n")
+    try:
+        did.stats.StatsGroupPlugin.load_custom(str(package))
+        assert did.stats.StatsGroupPlugin.custom["manifest_stats"] == \
+            "manifest_plugins.manifest_stats"
+        manifest = did.stats.PluginManifest()
+        assert manifest.types(str(package)) == {
+            "manifest_stats": "manifest_plugins.manifest_stats"}
+        # Any change in the plugin files invalidates the record
+        os.utime(plugin, (0, 0))
+        assert manifest.types(str(package)) is None
+    finally:
+        did.stats.StatsGroupPlugin.custom.pop("manifest_stats", None)
+        did.stats.StatsGroupPlugin.registry.pop("manifest_stats", None)
+        sys.path.remove(str(tmp_path))
@@ -1,9 +1,12 @@
 # coding: utf-8
 
+import datetime
+import json
 import logging
 import os
 import sys
 from argparse import Namespace
+from pathlib import Path
 
 import pytest
 from _pytest.logging import LogCaptureFixture
@@ -80,6 +83,17 @@ def test_load_components() -> None:
     assert did.utils.load_components("did.plugins") > 0
 
 
+def test_find_components() -> None:
+    top = os.path.dirname(did.__file__)
+    found = did.utils.find_components(os.path.join(top, "plugins"))
+    assert found is not None
+    base, modules = found
+    assert base == os.path.dirname(top)
+    assert list(modules)[0] == "did.plugins"
+    assert modules["did.plugins.git"] == os.path.join(top, "plugins", "git.py")
+    assert did.utils.find_components("/does/not/exist") is None
+
+
 def test_import_failure() -> None:
     with pytest.raises(ImportError):
         # pylint: disable=protected-access
@@ -168,6 +182,26 @@ def test_item_wiki(capsys: pytest.CaptureFixture[str]) -> None:
     assert captured.out == "    * this is level 1 text\n"
 
 
+def test_fields() -> None:
+    class Slotted():
+        __slots__ = ("id", "created", "labels", "parent", "_cache")
+
+        def __init__(self) -> None:
+            self.id = 7
+            self.created = datetime.date(2024, 3, 4)
+            self.labels = ["skipped"]
+            self.parent = self._cache = "hidden"
+
+    class Custom():
+        def fields(self) -> dict[str, str]:
+            return {"key": "value"}
+
+    assert did.utils.fields("text") == {"text": "text"}
+    assert did.utils.fields(Slotted()) == {"id": 7, "created": "2024-03-04"}
+    assert did.utils.fields(Custom()) == {"key": "value"}
+    assert did.utils.fields(object())["text"].startswith("<object")
+
+
 def test_pluralize() -> None:
     pluralize = did.utils.pluralize
     assert pluralize("word") == "words"
@@ -215,6 +249,25 @@ def test_logging(capsys: pytest.CaptureFixture[str], caplog: LogCaptureFixture)
         assert "debug" in caplog.text
 
 
+def test_logging_lazy(caplog: LogCaptureFixture) -> None:
+    mylogging = did.utils.Logging('test')
+    log = mylogging.logger
+    formatted = []
+
+    def expensive(data: object) -> str:
+        formatted.append(data)
+        return did.utils.pretty(data)
+
+    mylogging.set(did.utils.LOG_WARN)
+    log.data("%s", did.utils.Lazy(expensive, {"big": "payload"}))
+    log.debug("%s", did.utils.Lazy(expensive, {"big": "payload"}))
+    assert formatted == []
+    with caplog.at_level(did.utils.LOG_DATA, "test"):
+        log.data("%s", did.utils.Lazy(expensive, {"big": "payload"}))
+    assert formatted
+    assert "{'big': 'payload'}" in caplog.text
+
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Coloring
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -285,3 +338,33 @@ def test_strtobool() -> None:
     assert did.utils.strtobool("False") == 0
     assert did.utils.strtobool("FALSE") == 0
     assert did.utils.strtobool("0") == 0
+
+
+def test_profiler(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    profiler = did.utils.Profiler
+    profiler.count("requests")
+    profiler.enable()
+    try:
+        with profiler.span("github-issues-created", "github"):
+            profiler.count("requests", 2)
+            profiler.count("cached")
+        profiler.count("requests")
+        assert profiler.totals()["requests"] == 3
+        profiler.summary()
+        trace = tmp_path / "trace.json"
+        profiler.trace(str(trace))
+    finally:
+        profiler.disable()
+    lines = capsys.readouterr().err.splitlines()
+    assert lines[0].split() == [
+        "Section", "Stats", "Wall", "Fetch", "Requests", "Bytes",
+        "Retries", "Sleeps", "Cached", "Shared"]
+    github = [line for line in lines if line.startswith("github")][0].split()
+    assert github[1] == "1"
+    assert github[4] == "2"
+    assert github[8] == "1"
+    other = [line for line in lines if line.startswith("other")][0].split()
+    assert other[4] == "1"
+    events = json.loads(trace.read_text())["traceEvents"]
+    assert [event["name"] for event in events] == ["github-issues-created"]
+    assert events[0]["ph"] == "X"